@@ -1,6 +1,5 @@
 """Main entry point for the Gemini File Search Chat Application."""
 
-from src.chat_interface import ChatInterface
 import sys
 from pathlib import Path
 
@@ -10,6 +9,9 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 def main():
     """Main function to start the application."""
+    # Imported here so the SDK import chain is only paid when the app runs
+    from src.chat_interface import ChatInterface
+
     try:
         chat_interface = ChatInterface()
         chat_interface.start()
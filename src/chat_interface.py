@@ -1,39 +1,196 @@
 """Interactive chat interface for the Gemini File Search application."""
 
-from pathlib import Path
+import hashlib
+import sys
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 from src.config import Config
-from src.gemini_client import GeminiChatClient
-from src.file_search_manager import FileSearchManager
+from src.rate_limiter import TokenBucket
+from src.response_cache import ResponseCache
+from src.semantic_cache import SemanticCache
+
+if TYPE_CHECKING:
+    # Imported lazily at runtime: both modules pull in the google-genai SDK
+    from src.gemini_client import GeminiChatClient
+    from src.file_search_manager import FileSearchManager
+
+
+_RULE = "=" * 70
+
+_WELCOME_TEMPLATE = f"""
+{_RULE}
+  GEMINI FILE SEARCH CHAT APPLICATION
+{_RULE}
+
+Model: {{model}}
+Files Directory: {{files_dir}}
+
+Type '/help' for available commands
+Type '/quit' to exit
+{_RULE}
+"""
+
+_HELP_TEXT = f"""
+{_RULE}
+AVAILABLE COMMANDS
+{_RULE}
+
+File Search Store Management:
+  /create [name]           - Create a new file search store
+  /list                    - List all file search stores
+  /refresh                 - Discard cached store data and list again
+  /select <name>           - Select a store for chat queries
+  /delete <name>           - Delete a file search store
+  /upload                  - Upload files from 'files' directory
+  /upload-batch            - Submit uploads without waiting for indexing
+  /batch-status <op>       - Show the status of a submitted upload
+  /store                   - Show current store information
+
+Chat Commands:
+  /start                   - Start a new chat session
+  /reset                   - Reset the current chat session
+  /history                 - Show chat history
+  /export [filename]       - Export chat history as markdown
+
+General:
+  /help                    - Show this help message
+  /quit or /exit           - Exit the application
+
+Note: Commands support both short (/create) and long (/create-store) forms.
+      To chat, simply type your message without a command prefix.
+{_RULE}
+"""
+
+
+def _iter_text_parts(history):
+    """Yield the text of each turn in a chat history.
+
+    Consecutive messages from the same role are joined into one turn, since
+    a streamed reply is recorded as one message per chunk.
+
+    Args:
+        history: List of messages from the chat history
+
+    Yields:
+        (role, text, message) tuples with the role upper-cased and the last
+        message of the turn
+    """
+    turn_role, texts, last = None, [], None
+    for message in history:
+        role = message.role.upper()
+        if role != turn_role:
+            if texts:
+                yield turn_role, ''.join(texts), last
+            turn_role, texts = role, []
+        for part in getattr(message, 'parts', None) or ():
+            text = getattr(part, 'text', None)
+            if text and isinstance(text, str):
+                texts.append(text)
+        last = message
+    if texts:
+        yield turn_role, ''.join(texts), last
 
 
 class ChatInterface:
     """Interactive chat interface with file search store management."""
 
+    # Command dispatch tables mapping each command (short and long forms) to
+    # the name of its handler method. Handlers are looked up on the instance
+    # at dispatch time.
+    _COMMANDS = {
+        '/help': 'show_help',
+        '/quit': '_quit',
+        '/exit': '_quit',
+        '/list': 'cmd_list_stores',
+        '/list-stores': 'cmd_list_stores',
+        '/refresh': 'cmd_refresh_stores',
+        '/upload': 'cmd_upload_files',
+        '/upload-files': 'cmd_upload_files',
+        '/upload-batch': 'cmd_upload_batch',
+        '/store': 'cmd_store_info',
+        '/store-info': 'cmd_store_info',
+        '/start': 'cmd_start_chat',
+        '/start-chat': 'cmd_start_chat',
+        '/reset': 'cmd_reset_chat',
+        '/reset-chat': 'cmd_reset_chat',
+        '/history': 'cmd_show_history',
+    }
+
+    # Commands whose handler takes the rest of the line as its argument
+    _ARG_COMMANDS = {
+        '/create': 'cmd_create_store',
+        '/create-store': 'cmd_create_store',
+        '/select': 'cmd_select_store',
+        '/select-store': 'cmd_select_store',
+        '/delete': 'cmd_delete_store',
+        '/delete-store': 'cmd_delete_store',
+        '/batch-status': 'cmd_batch_status',
+        '/export': 'cmd_export_chat',
+        '/export-chat': 'cmd_export_chat',
+    }
+
     def __init__(self):
-        """Initialize the chat interface."""
-        # Validate configuration
-        Config.validate()
-
-        # Initialize Gemini client
-        self.gemini_client = GeminiChatClient(
-            api_key=Config.GEMINI_API_KEY,
-            model_name=Config.MODEL_NAME,
-            system_instruction=Config.SYSTEM_INSTRUCTION,
-            enable_thinking=Config.ENABLE_THINKING,
-            thinking_budget=Config.THINKING_BUDGET
-        )
+        """Initialize the chat interface.
 
-        # Initialize file search manager
-        self.file_search_manager = FileSearchManager(
-            client=self.gemini_client.client,
-            store_prefix=Config.FILE_SEARCH_STORE_PREFIX
-        )
+        The Gemini client and file search manager are created on first use,
+        so commands like /help work without an API key.
+        """
+        self._gemini_client = None
+        self._file_search_manager = None
 
         self.current_store = None
         self.is_running = False
 
+    @property
+    def gemini_client(self) -> 'GeminiChatClient':
+        """Gemini chat client, created on first access."""
+        if self._gemini_client is None:
+            from src.gemini_client import GeminiChatClient
+
+            # Validate configuration
+            Config.validate()
+
+            response_cache = None
+            if Config.RESPONSE_CACHE_TTL > 0:
+                response_cache = ResponseCache(
+                    Config.CACHE_DIR / 'responses', ttl=Config.RESPONSE_CACHE_TTL
+                )
+
+            semantic_cache = None
+            if Config.SEMANTIC_CACHE_THRESHOLD > 0:
+                semantic_cache = SemanticCache(threshold=Config.SEMANTIC_CACHE_THRESHOLD)
+
+            self._gemini_client = GeminiChatClient(
+                api_key=Config.GEMINI_API_KEY,
+                model_name=Config.MODEL_NAME,
+                system_instruction=Config.SYSTEM_INSTRUCTION,
+                enable_thinking=Config.ENABLE_THINKING,
+                thinking_budget=Config.THINKING_BUDGET,
+                rate_limiter=TokenBucket(Config.RPM),
+                response_cache=response_cache,
+                semantic_cache=semantic_cache
+            )
+        return self._gemini_client
+
+    @property
+    def file_search_manager(self) -> 'FileSearchManager':
+        """File search manager sharing the chat client's connection, created on first access."""
+        if self._file_search_manager is None:
+            from src.file_search_manager import FileSearchManager
+
+            self._file_search_manager = FileSearchManager(
+                client=self.gemini_client.client,
+                store_prefix=Config.FILE_SEARCH_STORE_PREFIX,
+                cache_path=Config.CACHE_DIR / 'stores.json',
+                cache_key=hashlib.sha256((Config.GEMINI_API_KEY or '').encode()).hexdigest(),
+                rate_limiter=self.gemini_client.rate_limiter,
+                upload_index_dir=Config.CACHE_DIR / 'uploads',
+                max_concurrent_uploads=Config.MAX_CONCURRENT_UPLOADS,
+                allowed_extensions=Config.UPLOAD_EXTENSIONS
+            )
+        return self._file_search_manager
+
     def start(self):
         """Start the chat interface."""
         self.is_running = True
@@ -42,14 +199,11 @@ class ChatInterface:
 
     def display_welcome(self):
         """Display welcome message."""
-        print("\n" + "="*70)
-        print("  GEMINI FILE SEARCH CHAT APPLICATION")
-        print("="*70)
-        print(f"\nModel: {Config.MODEL_NAME}")
-        print(f"Files Directory: {Config.FILES_DIR}")
-        print("\nType '/help' for available commands")
-        print("Type '/quit' to exit")
-        print("="*70)
+        sys.stdout.write(_WELCOME_TEMPLATE.format(
+            model=Config.MODEL_NAME,
+            files_dir=Config.FILES_DIR
+        ))
+        sys.stdout.flush()
 
     def main_menu(self):
         """Main interaction loop."""
@@ -60,11 +214,10 @@ class ChatInterface:
                 if not user_input:
                     continue
 
-                # Handle commands
-                if user_input.startswith('/'):
+                # Commands start with '/'; anything else is a chat message
+                if user_input[0] == '/':
                     self.handle_command(user_input)
                 else:
-                    # Regular chat message
                     self.handle_chat_message(user_input)
 
             except KeyboardInterrupt:
@@ -81,37 +234,25 @@ class ChatInterface:
         Args:
             command: Command string starting with '/'
         """
-        parts = command.split(maxsplit=1)
-        cmd = parts[0].lower()
-        args = parts[1] if len(parts) > 1 else ""
-
-        if cmd == '/help':
-            self.show_help()
-        elif cmd == '/quit' or cmd == '/exit':
-            self.is_running = False
-        elif cmd == '/create' or cmd == '/create-store':
-            self.cmd_create_store(args)
-        elif cmd == '/list' or cmd == '/list-stores':
-            self.cmd_list_stores()
-        elif cmd == '/select' or cmd == '/select-store':
-            self.cmd_select_store(args)
-        elif cmd == '/delete' or cmd == '/delete-store':
-            self.cmd_delete_store(args)
-        elif cmd == '/upload' or cmd == '/upload-files':
-            self.cmd_upload_files()
-        elif cmd == '/store' or cmd == '/store-info':
-            self.cmd_store_info()
-        elif cmd == '/start' or cmd == '/start-chat':
-            self.cmd_start_chat()
-        elif cmd == '/reset' or cmd == '/reset-chat':
-            self.cmd_reset_chat()
-        elif cmd == '/history':
-            self.cmd_show_history()
-        elif cmd == '/export' or cmd == '/export-chat':
-            self.cmd_export_chat(args)
-        else:
-            print(f"Unknown command: {cmd}")
-            print("Type '/help' for available commands")
+        cmd, _, args = command.partition(' ')
+        cmd = cmd.lower()
+
+        name = self._ARG_COMMANDS.get(cmd)
+        if name is not None:
+            getattr(self, name)(args.strip())
+            return
+
+        name = self._COMMANDS.get(cmd)
+        if name is not None:
+            getattr(self, name)()
+            return
+
+        print(f"Unknown command: {cmd}")
+        print("Type '/help' for available commands")
+
+    def _quit(self):
+        """Stop the main interaction loop."""
+        self.is_running = False
 
     def handle_chat_message(self, message: str):
         """Handle regular chat messages.
@@ -129,34 +270,18 @@ class ChatInterface:
             print("Use '/select <store-name>' to enable file search.")
 
         # Send message and display response
+        if Config.STREAM_RESPONSES:
+            self.gemini_client.display_stream(message)
+            return
+
         response = self.gemini_client.send_message(message)
         if response:
             self.gemini_client.display_response(response)
 
     def show_help(self):
         """Display help information."""
-        print("\n" + "="*70)
-        print("AVAILABLE COMMANDS")
-        print("="*70)
-        print("\nFile Search Store Management:")
-        print("  /create [name]           - Create a new file search store")
-        print("  /list                    - List all file search stores")
-        print("  /select <name>           - Select a store for chat queries")
-        print("  /delete <name>           - Delete a file search store")
-        print("  /upload                  - Upload files from 'files' directory")
-        print("  /store                   - Show current store information")
-        print("\nChat Commands:")
-        print("  /start                   - Start a new chat session")
-        print("  /reset                   - Reset the current chat session")
-        print("  /history                 - Show chat history")
-        print("  /export [filename]       - Export chat history as markdown")
-        print("\nGeneral:")
-        print("  /help                    - Show this help message")
-        print("  /quit or /exit           - Exit the application")
-        print(
-            "\nNote: Commands support both short (/create) and long (/create-store) forms.")
-        print("      To chat, simply type your message without a command prefix.")
-        print("="*70)
+        sys.stdout.write(_HELP_TEXT)
+        sys.stdout.flush()
 
     def cmd_create_store(self, display_name: str):
         """Create a new file search store.
@@ -185,6 +310,11 @@ class ChatInterface:
         """List all file search stores."""
         self.file_search_manager.display_stores_summary()
 
+    def cmd_refresh_stores(self):
+        """Discard cached store data and list stores from the API."""
+        self.file_search_manager.invalidate()
+        self.file_search_manager.display_stores_summary()
+
     def cmd_select_store(self, store_name: str):
         """Select a file search store for chat.
 
@@ -245,11 +375,63 @@ class ChatInterface:
             self.current_store.name
         )
 
+        # Document counts changed, so cached store metadata is stale
+        self.file_search_manager.invalidate()
+
         if count > 0:
             print(f"\nSuccessfully uploaded {count} file(s)!")
         else:
             print("\nNo files uploaded. Make sure files exist in the 'files' directory.")
 
+    def cmd_upload_batch(self):
+        """Submit uploads from the files directory without waiting for indexing."""
+        if not self.current_store:
+            print("\nError: No store selected. Please select a store first.")
+            print("Use '/select <store-name>' or '/create'")
+            return
+
+        print(f"\nSubmitting files from: {Config.FILES_DIR}")
+        print(f"To store: {self.current_store.name}")
+
+        operation_names = self.file_search_manager.upload_files_batch(
+            Config.FILES_DIR,
+            self.current_store.name
+        )
+
+        self.file_search_manager.invalidate()
+
+        if not operation_names:
+            print("\nNo uploads submitted. Make sure files exist in the 'files' directory.")
+            return
+
+        print("\nUpload operations:")
+        for name in operation_names:
+            print(f"  {name}")
+        print("Use '/batch-status <operation>' to check progress.")
+
+    def cmd_batch_status(self, operation_name: str):
+        """Show the status of a submitted upload operation.
+
+        Args:
+            operation_name: Name of the upload operation
+        """
+        if not operation_name:
+            print("\nError: Please provide an operation name")
+            print("Usage: /batch-status <operation>")
+            return
+
+        operation = self.file_search_manager.get_upload_operation(operation_name)
+        if not operation:
+            print(f"\nOperation not found: {operation_name}")
+            return
+
+        if not operation.done:
+            print(f"\n{operation_name}: RUNNING")
+        elif operation.error:
+            print(f"\n{operation_name}: FAILED - {operation.error}")
+        else:
+            print(f"\n{operation_name}: DONE")
+
     def cmd_store_info(self):
         """Show information about the current store."""
         if not self.current_store:
@@ -304,12 +486,8 @@ class ChatInterface:
         print("CHAT HISTORY")
         print("="*70)
 
-        for message in history:
-            role = message.role.upper()
-            if hasattr(message, 'parts') and message.parts:
-                for part in message.parts:
-                    if hasattr(part, 'text') and part.text:
-                        print(f"\n{role}: {part.text}")
+        for role, text, _ in _iter_text_parts(history):
+            print(f"\n{role}: {text}")
 
         print("="*70)
 
@@ -335,52 +513,57 @@ class ChatInterface:
             filename += '.md'
 
         # Create exports directory if it doesn't exist
-        exports_dir = Path('exports')
+        exports_dir = Config.EXPORT_DIR
         exports_dir.mkdir(exist_ok=True)
 
         filepath = exports_dir / filename
 
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                # Write header
-                f.write("# Gemini Chat Conversation Export\n\n")
-                f.write(
-                    f"**Exported:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                f.write(f"**Model:** {Config.MODEL_NAME}\n\n")
-
-                if self.current_store:
-                    f.write(
-                        f"**File Search Store:** {self.current_store.name}\n\n")
-
-                f.write("---\n\n")
-
-                # Write conversation
-                for message in history:
-                    role = message.role.upper()
-
-                    if hasattr(message, 'parts') and message.parts:
-                        for part in message.parts:
-                            if hasattr(part, 'text') and part.text:
-                                # Format based on role
-                                if role == 'USER':
-                                    f.write(f"## You\n\n{part.text}\n\n")
-                                elif role == 'MODEL':
-                                    f.write(f"## Assistant\n\n{part.text}\n\n")
-
-                                # Add grounding metadata if available
-                                if role == 'MODEL' and hasattr(message, 'candidates'):
-                                    for candidate in message.candidates:
-                                        if hasattr(candidate, 'grounding_metadata') and candidate.grounding_metadata:
-                                            f.write(self._format_citations_markdown(
-                                                candidate.grounding_metadata))
-
-                                f.write("---\n\n")
+            with open(filepath, 'w', encoding='utf-8', buffering=1 << 16) as f:
+                for chunk in self._iter_markdown(history):
+                    f.write(chunk)
 
             print(f"\nChat exported successfully to: {filepath}")
 
         except Exception as e:
             print(f"\nError exporting chat: {e}")
 
+    def _iter_markdown(self, history):
+        """Render chat history as markdown, one chunk at a time.
+
+        Args:
+            history: List of messages from the chat history
+
+        Yields:
+            Markdown fragments in document order
+        """
+        # Header
+        yield "# Gemini Chat Conversation Export\n\n"
+        yield f"**Exported:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        yield f"**Model:** {Config.MODEL_NAME}\n\n"
+
+        if self.current_store:
+            yield f"**File Search Store:** {self.current_store.name}\n\n"
+
+        yield "---\n\n"
+
+        # Conversation
+        for role, text, message in _iter_text_parts(history):
+            # Format based on role
+            if role == 'USER':
+                yield f"## You\n\n{text}\n\n"
+            elif role == 'MODEL':
+                yield f"## Assistant\n\n{text}\n\n"
+
+            # Add grounding metadata if available
+            if role == 'MODEL' and hasattr(message, 'candidates'):
+                for candidate in message.candidates:
+                    if hasattr(candidate, 'grounding_metadata') and candidate.grounding_metadata:
+                        yield from self._iter_citations_markdown(
+                            candidate.grounding_metadata)
+
+            yield "---\n\n"
+
     def _format_citations_markdown(self, grounding_metadata) -> str:
         """Format grounding metadata as markdown.
 
@@ -390,38 +573,53 @@ class ChatInterface:
         Returns:
             Formatted markdown string
         """
-        markdown = "### Citations\n\n"
+        return "".join(self._iter_citations_markdown(grounding_metadata))
+
+    def _iter_citations_markdown(self, grounding_metadata):
+        """Render grounding metadata as markdown, one chunk at a time.
+
+        Args:
+            grounding_metadata: Grounding metadata from response
+
+        Yields:
+            Markdown fragments for the citations section
+        """
+        yield "### Citations\n\n"
 
         # Display search queries if available
-        if hasattr(grounding_metadata, 'search_entry_point') and grounding_metadata.search_entry_point:
-            if hasattr(grounding_metadata.search_entry_point, 'rendered_content'):
-                markdown += f"**Search queries used:** {grounding_metadata.search_entry_point.rendered_content}\n\n"
+        search_entry_point = getattr(grounding_metadata, 'search_entry_point', None)
+        rendered_content = getattr(search_entry_point, 'rendered_content', None)
+        if rendered_content:
+            yield f"**Search queries used:** {rendered_content}\n\n"
 
         # Display grounding chunks (sources)
-        if hasattr(grounding_metadata, 'grounding_chunks') and grounding_metadata.grounding_chunks:
-            markdown += f"**Sources ({len(grounding_metadata.grounding_chunks)}):**\n\n"
+        grounding_chunks = getattr(grounding_metadata, 'grounding_chunks', None)
+        if grounding_chunks:
+            yield f"**Sources ({len(grounding_chunks)}):**\n\n"
 
-            for i, chunk in enumerate(grounding_metadata.grounding_chunks, 1):
-                markdown += f"{i}. "
+            for i, chunk in enumerate(grounding_chunks, 1):
+                yield f"{i}. "
 
                 # Try to extract relevant information from the chunk
-                if hasattr(chunk, 'web') and chunk.web:
-                    title = chunk.web.title if hasattr(
-                        chunk.web, 'title') else 'N/A'
-                    markdown += f"**Web:** {title}\n"
-                    if hasattr(chunk.web, 'uri'):
-                        markdown += f"   - URI: {chunk.web.uri}\n"
-                elif hasattr(chunk, 'retrieved_context') and chunk.retrieved_context:
+                web = getattr(chunk, 'web', None)
+                retrieved_context = getattr(chunk, 'retrieved_context', None)
+                if web:
+                    yield f"**Web:** {getattr(web, 'title', 'N/A')}\n"
+                    uri = getattr(web, 'uri', None)
+                    if uri:
+                        yield f"   - URI: {uri}\n"
+                elif retrieved_context:
                     # For file search results
-                    if hasattr(chunk.retrieved_context, 'uri'):
-                        markdown += f"**Document:** {chunk.retrieved_context.uri}\n"
-                    if hasattr(chunk.retrieved_context, 'title'):
-                        markdown += f"   - **Title:** {chunk.retrieved_context.title}\n"
+                    uri = getattr(retrieved_context, 'uri', None)
+                    if uri:
+                        yield f"**Document:** {uri}\n"
+                    title = getattr(retrieved_context, 'title', None)
+                    if title:
+                        yield f"   - **Title:** {title}\n"
 
-                markdown += "\n"
+                yield "\n"
 
         # Display grounding supports
-        if hasattr(grounding_metadata, 'grounding_supports') and grounding_metadata.grounding_supports:
-            markdown += f"**Grounding supports:** {len(grounding_metadata.grounding_supports)} segment(s) grounded\n\n"
-
-        return markdown
+        grounding_supports = getattr(grounding_metadata, 'grounding_supports', None)
+        if grounding_supports:
+            yield f"**Grounding supports:** {len(grounding_supports)} segment(s) grounded\n\n"
@@ -2,11 +2,35 @@
 
 import os
 from pathlib import Path
+from typing import Callable, TypeVar
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+_Number = TypeVar('_Number', int, float)
+
+
+def _env_number(name: str, default: _Number, parse: Callable[[str], _Number] = int) -> _Number:
+    """Read a numeric setting from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or malformed
+        parse: Converter for the raw string (int or float)
+
+    Returns:
+        The parsed value, or `default` (with a warning) if it cannot be parsed
+    """
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return parse(raw)
+    except ValueError:
+        print(f"Warning: Ignoring invalid {name}={raw!r}; using {default}")
+        return default
+
 
 class Config:
     """Application configuration."""
@@ -17,6 +41,12 @@ class Config:
     # Model Configuration
     MODEL_NAME = 'gemini-2.5-flash'
 
+    # Print replies as they stream in instead of waiting for the full response
+    STREAM_RESPONSES = os.getenv('GEMINI_STREAM_RESPONSES', '1') != '0'
+
+    # Rate Limiting (API calls per minute shared by chat and store operations; 0 disables)
+    RPM = _env_number('GEMINI_RPM', 60)
+
     # Thinking Configuration (dynamic thinking enabled)
     ENABLE_THINKING = True
     THINKING_BUDGET = None  # Use default thinking budget
@@ -25,6 +55,26 @@ class Config:
     FILES_DIR = Path(__file__).parent.parent / 'files'
     FILE_SEARCH_STORE_PREFIX = 'file-search-chat'
 
+    # Uploads started at once by /upload and /upload-batch
+    MAX_CONCURRENT_UPLOADS = _env_number('GEMINI_MAX_CONCURRENT_UPLOADS', 8)
+
+    # File extensions /upload and /upload-batch accept, e.g. ".md,.pdf,.txt" (empty accepts all)
+    UPLOAD_EXTENSIONS = tuple(
+        ext.strip() for ext in os.getenv('GEMINI_UPLOAD_EXTENSIONS', '').split(',') if ext.strip()
+    )
+
+    # Directory chat exports are written to (relative to the working directory)
+    EXPORT_DIR = Path('exports')
+
+    # Cache Configuration (store listing persisted between sessions)
+    CACHE_DIR = Path.home() / '.cache' / 'gemini-file-search'
+
+    # Seconds identical chat requests are answered from the on-disk response cache (0 disables)
+    RESPONSE_CACHE_TTL = _env_number('GEMINI_RESPONSE_CACHE_TTL', 0)
+
+    # Cosine similarity above which a paraphrased prompt reuses a cached answer (0 disables; 0.92 is a good start)
+    SEMANTIC_CACHE_THRESHOLD = _env_number('GEMINI_SEMANTIC_CACHE_THRESHOLD', 0.0, float)
+
     # System Instruction
     SYSTEM_INSTRUCTION = """You are a helpful AI assistant with access to a knowledge base through file search.
 When answering questions, use the information from the uploaded documents to provide accurate and relevant answers.
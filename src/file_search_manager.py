@@ -1,24 +1,237 @@
 """File Search Store Manager for managing file search stores and files."""
 
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 from google import genai
+from google.genai import types
 from google.genai.errors import APIError
 
+from src.rate_limiter import TokenBucket
+
+# Maximum number of uploads in flight at once (keeps us under RPM limits)
+MAX_CONCURRENT_UPLOADS = 8
+
+# Consecutive failed uploads after which the rest of a directory is skipped
+UPLOAD_ERROR_THRESHOLD = 5
+
+# Largest file the File Search API accepts (100 MB)
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+
+# Upload operation polling: start short and back off exponentially to the cap
+INITIAL_POLL_INTERVAL = 0.25
+MAX_POLL_INTERVAL = 4.0
+
+# Seconds to wait for an upload to finish indexing before reporting it as failed
+UPLOAD_TIMEOUT = 600.0
+
+
+def _poll_delays():
+    """Yield exponentially growing poll delays with up to 10% jitter."""
+    delay = INITIAL_POLL_INTERVAL
+    while True:
+        yield delay + random.uniform(0, delay * 0.1)
+        delay = min(delay * 2, MAX_POLL_INTERVAL)
+
+
+def _report_finished(operation: Any, name: str) -> bool:
+    """Report the outcome of an upload operation that is done.
+
+    A done operation can still have failed on the server, in which case its
+    `error` is set.
+
+    Args:
+        operation: Finished upload operation
+        name: File name to show in the message
+
+    Returns:
+        True if the upload succeeded, False if the server reported an error
+    """
+    if operation.error:
+        print(f"Error uploading {name}: {operation.error}")
+        return False
+    print(f"Successfully uploaded: {name}")
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def _upload_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop all async uploads run on.
+
+    The SDK's async client keeps pooled connections bound to the loop that
+    opened them, so reusing it from a second asyncio.run() fails with "Event
+    loop is closed". A single loop owned by a daemon thread lives as long as
+    the process and can be shared by every upload.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name='upload-loop', daemon=True).start()
+    return loop
+
+
+def _run_upload(coro):
+    """Run a coroutine on the upload loop and block until it finishes.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _upload_loop())
+    try:
+        return future.result()
+    except BaseException:
+        # Stop the upload too if the caller is interrupted (e.g. Ctrl+C)
+        future.cancel()
+        raise
+
+
+def _hash_file(file_path: Path) -> str:
+    """Return a BLAKE2b digest of a file's contents.
+
+    hashlib.file_digest reads into one reusable buffer instead of allocating
+    a bytes object per chunk.
+    """
+    with open(file_path, 'rb') as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
 
 class FileSearchManager:
     """Manager for file search stores and file operations."""
 
-    def __init__(self, client: genai.Client, store_prefix: str = 'file-search-chat'):
+    # Seconds a cached store listing or lookup stays valid
+    _TTL = 30.0
+
+    # Maximum number of individual stores kept in the lookup cache
+    _MAX_CACHED_STORES = 64
+
+    # Seconds the on-disk store listing stays valid (checked against file mtime)
+    _DISK_TTL = 300.0
+
+    def __init__(
+        self,
+        client: genai.Client,
+        store_prefix: str = 'file-search-chat',
+        cache_path: Optional[Path] = None,
+        cache_key: Optional[str] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        upload_index_dir: Optional[Path] = None,
+        max_concurrent_uploads: int = MAX_CONCURRENT_UPLOADS,
+        allowed_extensions: Optional[Iterable[str]] = None,
+        sleeper: Callable[[float], None] = time.sleep,
+        error_threshold: int = UPLOAD_ERROR_THRESHOLD
+    ):
         """Initialize the FileSearchManager.
 
         Args:
             client: Initialized Gemini client
             store_prefix: Prefix for file search store display names
+            cache_path: Optional JSON file used to persist the store listing
+                across sessions (disabled when None)
+            cache_key: Identifier of the account the listing belongs to,
+                typically a hash of the API key
+            rate_limiter: Optional token bucket applied to every API call
+                (unlimited when None)
+            upload_index_dir: Optional directory holding a per-store record of
+                uploaded file hashes, used to skip unchanged files on
+                re-upload (disabled when None)
+            max_concurrent_uploads: Maximum number of uploads in flight at once
+            allowed_extensions: Optional file extensions (e.g. '.pdf') that
+                directory uploads are limited to (all files when None or empty)
+            sleeper: Function used to wait between upload status polls
+            error_threshold: Consecutive upload errors after which the
+                remaining files of a directory upload are skipped (0 never stops)
         """
         self.client = client
         self.store_prefix = store_prefix
+        self.cache_path = cache_path
+        self.cache_key = cache_key
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket()
+        self._sleep = sleeper
+        self.error_threshold = error_threshold
+        self._consecutive_errors = 0
+        self.upload_index_dir = upload_index_dir
+        self.max_concurrent_uploads = max(1, max_concurrent_uploads)
+        self.allowed_extensions = frozenset(
+            ext.lower() if ext.startswith('.') else f".{ext.lower()}"
+            for ext in allowed_extensions or ()
+        )
+        self._stores_cache: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._list_cache: Optional[Tuple[float, List[Any]]] = None
+        self._documents_cache: Dict[str, Tuple[float, List[Any]]] = {}
+
+    def invalidate(self):
+        """Drop all cached store data so the next lookup hits the API."""
+        self._stores_cache.clear()
+        self._list_cache = None
+        self._documents_cache.clear()
+        self._drop_disk_cache()
+
+    def _drop_disk_cache(self):
+        """Remove the persisted store listing, if any."""
+        if self.cache_path is None:
+            return
+        try:
+            self.cache_path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Warning: Could not remove store cache: {e}")
+
+    def _load_disk_cache(self) -> Optional[List[Any]]:
+        """Load the persisted store listing if it is fresh and for this account.
+
+        Returns:
+            List of file search store objects, or None on a miss
+        """
+        if self.cache_path is None:
+            return None
+        try:
+            if time.time() - os.path.getmtime(self.cache_path) >= self._DISK_TTL:
+                return None
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('key') != self.cache_key:
+                return None
+            return [types.FileSearchStore(**entry) for entry in data['stores']]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def _save_disk_cache(self, stores: List[Any]):
+        """Persist the store listing so later sessions can skip the API call."""
+        if self.cache_path is None:
+            return
+        try:
+            entries = [
+                store.model_dump(mode='json', exclude_none=True)
+                for store in stores
+            ]
+            payload = json.dumps({'key': self.cache_key, 'stores': entries})
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+        except (OSError, TypeError, ValueError, AttributeError) as e:
+            print(f"Warning: Could not write store cache: {e}")
+
+    def _remember_store(self, store_name: str, store: Any, timestamp: float):
+        """Cache a store by name, evicting the least recently used entries."""
+        self._stores_cache[store_name] = (timestamp, store)
+        self._stores_cache.move_to_end(store_name)
+        while len(self._stores_cache) > self._MAX_CACHED_STORES:
+            self._stores_cache.popitem(last=False)
+
+    def _is_fresh(self, timestamp: float) -> bool:
+        """Check whether a cache entry created at `timestamp` is still valid."""
+        return time.monotonic() - timestamp < self._TTL
 
     def create_store(self, display_name: Optional[str] = None) -> any:
         """Create a new file search store.
@@ -33,11 +246,17 @@ class FileSearchManager:
             display_name = f"{self.store_prefix}-{int(time.time())}"
 
         try:
-            store = self.client.file_search_stores.create(
-                config={'display_name': display_name}
-            )
+            with self.rate_limiter:
+                store = self.client.file_search_stores.create(
+                    config={'display_name': display_name}
+                )
             print(f"Created file search store: {store.name}")
             print(f"Display name: {display_name}")
+            now = time.monotonic()
+            self._remember_store(store.name, store, now)
+            if self._list_cache is not None:
+                self._list_cache = (now, self._list_cache[1] + [store])
+            self._drop_disk_cache()
             return store
         except APIError as e:
             print(f"Error creating file search store: {e}")
@@ -49,12 +268,24 @@ class FileSearchManager:
         Returns:
             List of file search store objects
         """
-        try:
-            stores = list(self.client.file_search_stores.list())
-            return stores
-        except APIError as e:
-            print(f"Error listing file search stores: {e}")
-            return []
+        if self._list_cache is not None and self._is_fresh(self._list_cache[0]):
+            return list(self._list_cache[1])
+
+        stores = self._load_disk_cache()
+        if stores is None:
+            try:
+                with self.rate_limiter:
+                    stores = list(self.client.file_search_stores.list())
+            except APIError as e:
+                print(f"Error listing file search stores: {e}")
+                return []
+            self._save_disk_cache(stores)
+
+        now = time.monotonic()
+        self._list_cache = (now, stores)
+        for store in stores:
+            self._remember_store(store.name, store, now)
+        return list(stores)
 
     def get_store(self, store_name: str) -> Optional[any]:
         """Get a specific file search store by name.
@@ -65,8 +296,15 @@ class FileSearchManager:
         Returns:
             File search store object or None if not found
         """
+        cached = self._stores_cache.get(store_name)
+        if cached is not None and self._is_fresh(cached[0]):
+            self._stores_cache.move_to_end(store_name)
+            return cached[1]
+
         try:
-            store = self.client.file_search_stores.get(name=store_name)
+            with self.rate_limiter:
+                store = self.client.file_search_stores.get(name=store_name)
+            self._remember_store(store_name, store, time.monotonic())
             return store
         except APIError as e:
             print(f"Error getting file search store: {e}")
@@ -83,11 +321,17 @@ class FileSearchManager:
             True if successful, False otherwise
         """
         try:
-            self.client.file_search_stores.delete(
-                name=store_name,
-                config={'force': force}
-            )
+            with self.rate_limiter:
+                self.client.file_search_stores.delete(
+                    name=store_name,
+                    config={'force': force}
+                )
             print(f"Deleted file search store: {store_name}")
+            self._stores_cache.pop(store_name, None)
+            self._list_cache = None
+            self._documents_cache.pop(store_name, None)
+            self._drop_disk_cache()
+            self._drop_upload_index(store_name)
             return True
         except APIError as e:
             print(f"Error deleting file search store: {e}")
@@ -97,7 +341,8 @@ class FileSearchManager:
         self,
         file_path: Path,
         store_name: str,
-        display_name: Optional[str] = None
+        display_name: Optional[str] = None,
+        timeout: float = UPLOAD_TIMEOUT
     ) -> bool:
         """Upload a file directly to a file search store.
 
@@ -105,94 +350,493 @@ class FileSearchManager:
             file_path: Path to the file to upload
             store_name: Name of the file search store
             display_name: Optional display name for the file (used in citations)
+            timeout: Seconds to wait for the upload to finish processing
 
         Returns:
             True if successful, False otherwise
         """
-        if not file_path.exists():
+        # One stat answers both "does it exist" and "is it too large"
+        try:
+            size = file_path.stat().st_size
+        except OSError:
             print(f"Error: File not found: {file_path}")
             return False
 
+        if size > MAX_UPLOAD_BYTES:
+            print(f"Error: File exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit: {file_path.name}")
+            return False
+
         if not display_name:
             display_name = file_path.name
 
         try:
             print(f"Uploading {file_path.name} to {store_name}...")
 
-            operation = self.client.file_search_stores.upload_to_file_search_store(
-                file=str(file_path),
-                file_search_store_name=store_name,
-                config={
-                    'display_name': display_name,
-                }
-            )
+            with self.rate_limiter:
+                operation = self.client.file_search_stores.upload_to_file_search_store(
+                    file=str(file_path),
+                    file_search_store_name=store_name,
+                    config={
+                        'display_name': display_name,
+                    }
+                )
 
             # Wait for the upload operation to complete
+            deadline = time.monotonic() + timeout
+            delays = _poll_delays()
             while not operation.done:
-                time.sleep(2)
-                operation = self.client.operations.get(operation)
-
-            print(f"Successfully uploaded: {display_name}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"Error uploading file: {display_name} did not finish within {timeout:g}s")
+                    return False
+                self._sleep(min(next(delays), remaining))
+                with self.rate_limiter:
+                    operation = self.client.operations.get(operation)
+
+            if not _report_finished(operation, display_name):
+                return False
+            self._documents_cache.pop(store_name, None)
             return True
 
         except APIError as e:
             print(f"Error uploading file: {e}")
             return False
 
+    def _collect_files(self, directory: Union[str, Path]) -> List[Tuple[Path, os.stat_result]]:
+        """List the regular files directly inside a directory.
+
+        Each file is stat-ed once here; the result is passed on so the upload
+        index never needs to stat the file again.
+
+        Args:
+            directory: Path to the directory containing files (str or Path)
+
+        Returns:
+            (path, stat) pairs of the files (empty if the directory is missing or empty)
+        """
+        # os.scandir takes str or Path directly and fails on a missing or
+        # non-directory path, so no separate isdir check is needed
+        try:
+            entries = os.scandir(directory)
+        except (FileNotFoundError, NotADirectoryError):
+            print(f"Error: Directory not found or invalid: {directory}")
+            return []
+
+        # DirEntry.is_file() uses the type returned by readdir, avoiding a stat per entry
+        files = []
+        with entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                # Checked before the size so skipped types never need a stat
+                if (self.allowed_extensions
+                        and os.path.splitext(entry.name)[1].lower() not in self.allowed_extensions):
+                    print(f"Skipping {entry.name}: file type not in the upload allowlist")
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError as e:
+                    print(f"Skipping {entry.name}: could not read file ({e})")
+                    continue
+                # Oversized files would only be rejected after a full upload
+                if stat.st_size > MAX_UPLOAD_BYTES:
+                    print(f"Skipping {entry.name}: exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit")
+                    continue
+                files.append((Path(entry.path), stat))
+
+        if not files:
+            print(f"No files found in {directory}")
+            return []
+
+        print(f"\nFound {len(files)} file(s) in {directory}")
+        return files
+
     def upload_files_from_directory(
         self,
-        directory: Path,
+        directory: Union[str, Path],
         store_name: str
     ) -> int:
         """Upload all files from a directory to a file search store.
 
         Args:
-            directory: Path to the directory containing files
+            directory: Path to the directory containing files (str or Path)
             store_name: Name of the file search store
 
         Returns:
             Number of files successfully uploaded
         """
-        if not directory.exists() or not directory.is_dir():
-            print(f"Error: Directory not found or invalid: {directory}")
-            return 0
+        return _run_upload(self.upload_files_from_directory_async(directory, store_name))
 
-        files = [f for f in directory.iterdir() if f.is_file()]
+    async def upload_files_from_directory_async(
+        self,
+        directory: Union[str, Path],
+        store_name: str
+    ) -> int:
+        """Upload all files from a directory from within a running event loop.
 
-        if not files:
-            print(f"No files found in {directory}")
-            return 0
+        Args:
+            directory: Path to the directory containing files (str or Path)
+            store_name: Name of the file search store
 
-        print(f"\nFound {len(files)} file(s) in {directory}")
+        Returns:
+            Number of files successfully uploaded
+        """
+        entries = self._collect_files(directory)
+        if not entries:
+            return 0
 
-        success_count = 0
-        for file_path in files:
-            if self.upload_file_to_store(file_path, store_name):
-                success_count += 1
+        index = self._load_upload_index(store_name)
+        if index is not None:
+            files, records = self._filter_uploaded(entries, index)
+            if not files:
+                print("All files are already uploaded to this store")
+                return 0
+        else:
+            files = [file_path for file_path, _ in entries]
+
+        results = await self._upload_all(files, store_name)
+        success_count = sum(1 for result in results if result)
+        self._documents_cache.pop(store_name, None)
+
+        if index is not None:
+            for file_path, record, result in zip(files, records, results):
+                if result:
+                    index['hashes'][record[2]] = file_path.name
+                    index['files'][str(file_path)] = record
+            self._save_upload_index(store_name, index)
 
         print(f"\nSuccessfully uploaded {success_count}/{len(files)} files")
         return success_count
 
+    def _upload_index_path(self, store_name: str) -> Optional[Path]:
+        """Path of the upload index for a store, or None when disabled."""
+        if self.upload_index_dir is None:
+            return None
+        safe_name = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in store_name)
+        return self.upload_index_dir / f"{safe_name}.json"
+
+    def _load_upload_index(self, store_name: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load the record of files already uploaded to a store.
+
+        Returns:
+            Dict with 'hashes' (hash -> display name) and 'files'
+            (path -> [size, mtime, hash]), or None when deduplication is disabled
+        """
+        path = self._upload_index_path(store_name)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {'hashes': dict(data['hashes']), 'files': dict(data['files'])}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {'hashes': {}, 'files': {}}
+
+    def _save_upload_index(self, store_name: str, index: Dict[str, Dict[str, Any]]):
+        """Persist the record of files uploaded to a store."""
+        path = self._upload_index_path(store_name)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+        except OSError as e:
+            print(f"Warning: Could not write upload index: {e}")
+
+    def _drop_upload_index(self, store_name: str):
+        """Remove the upload index of a deleted store, if any."""
+        path = self._upload_index_path(store_name)
+        if path is None:
+            return
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def _filter_uploaded(
+        self,
+        entries: List[Tuple[Path, os.stat_result]],
+        index: Dict[str, Dict[str, Any]]
+    ) -> Tuple[List[Path], List[List[Any]]]:
+        """Drop files whose contents were already uploaded to the store.
+
+        A file whose size and mtime match the previous run reuses the stored
+        hash instead of being read again. Files that vanish or cannot be read
+        are skipped with a warning.
+
+        Args:
+            entries: Candidate (path, stat) pairs from _collect_files
+            index: Upload index loaded by _load_upload_index
+
+        Returns:
+            Files still to upload and, in matching order, the
+            [size, mtime, hash] index record of each. The size and mtime are
+            the ones observed before hashing, so a file edited later no
+            longer matches its record and is hashed again on the next run.
+        """
+        pending, records = [], []
+        seen = set(index['hashes'])
+        for file_path, stat in entries:
+            previous = index['files'].get(str(file_path))
+            if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime:
+                file_hash = previous[2]
+            else:
+                try:
+                    file_hash = _hash_file(file_path)
+                except OSError as e:
+                    print(f"Skipping {file_path.name}: could not read file ({e})")
+                    continue
+
+            if file_hash in seen:
+                print(f"Skipping {file_path.name}: already uploaded")
+                continue
+            seen.add(file_hash)
+            pending.append(file_path)
+            records.append([stat.st_size, stat.st_mtime, file_hash])
+        return pending, records
+
+    def upload_files_batch(self, directory: Union[str, Path], store_name: str) -> List[str]:
+        """Submit uploads for all files in a directory without waiting for indexing.
+
+        Args:
+            directory: Path to the directory containing files (str or Path)
+            store_name: Name of the file search store
+
+        Returns:
+            Names of the submitted upload operations
+        """
+        files = [file_path for file_path, _ in self._collect_files(directory)]
+        if not files:
+            return []
+
+        operations = _run_upload(self._submit_all(files, store_name))
+        names = [operation.name for operation in operations if operation is not None]
+        self._documents_cache.pop(store_name, None)
+
+        print(f"\nSubmitted {len(names)}/{len(files)} uploads")
+        return names
+
+    def get_upload_operation(self, operation_name: str) -> Optional[any]:
+        """Fetch the current state of an upload operation.
+
+        Args:
+            operation_name: Name of the operation returned by upload_files_batch
+
+        Returns:
+            Operation object or None if it could not be retrieved
+        """
+        try:
+            with self.rate_limiter:
+                return self.client.operations.get(
+                    types.UploadToFileSearchStoreOperation(name=operation_name)
+                )
+        except APIError as e:
+            print(f"Error getting upload operation: {e}")
+            return None
+
+    async def wait_until_indexed(
+        self,
+        store_name: str,
+        expected_count: int,
+        timeout: float = 60.0
+    ) -> any:
+        """Wait until a store reports at least `expected_count` indexed documents.
+
+        Polls the store with the same backoff as upload operations, bypassing
+        the lookup cache, and returns as soon as indexing has caught up.
+
+        Args:
+            store_name: Name of the file search store
+            expected_count: Number of active documents to wait for
+            timeout: Seconds to wait before giving up
+
+        Returns:
+            The refreshed file search store object
+
+        Raises:
+            TimeoutError: If the documents are not indexed within `timeout`
+        """
+        deadline = time.monotonic() + timeout
+        delays = _poll_delays()
+        while True:
+            async with self.rate_limiter:
+                store = await self.client.aio.file_search_stores.get(name=store_name)
+            self._remember_store(store_name, store, time.monotonic())
+            if (store.active_documents_count or 0) >= expected_count:
+                return store
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"{store_name} indexed {store.active_documents_count or 0}/"
+                    f"{expected_count} documents within {timeout}s"
+                )
+            await asyncio.sleep(min(next(delays), remaining))
+
+    async def _upload_all(self, files: List[Path], store_name: str) -> List[bool]:
+        """Upload files concurrently, bounded by max_concurrent_uploads.
+
+        Args:
+            files: Paths of the files to upload
+            store_name: Name of the file search store
+
+        Returns:
+            Per-file success flags, in the same order as `files`
+        """
+        operations = await self._submit_all(files, store_name)
+        return await self._wait_all(files, operations)
+
+    async def _submit_all(self, files: List[Path], store_name: str) -> List[Optional[any]]:
+        """Start uploads concurrently without polling them.
+
+        Args:
+            files: Paths of the files to upload
+            store_name: Name of the file search store
+
+        Once error_threshold uploads in a row have failed, the API is assumed
+        to be down and the files not yet started are skipped.
+
+        Returns:
+            Upload operations (None for uploads that failed or were skipped)
+        """
+        self._consecutive_errors = 0
+        sem = asyncio.Semaphore(self.max_concurrent_uploads)
+        return await asyncio.gather(
+            *[self._submit_one(sem, file_path, store_name) for file_path in files]
+        )
+
+    async def _submit_one(
+        self,
+        sem: asyncio.Semaphore,
+        file_path: Path,
+        store_name: str
+    ) -> Optional[any]:
+        """Start a single upload using the async client.
+
+        Args:
+            sem: Semaphore limiting the number of concurrent uploads
+            file_path: Path to the file to upload
+            store_name: Name of the file search store
+
+        Returns:
+            Upload operation or None if the upload could not be started
+        """
+        async with sem:
+            if self._breaker_open():
+                return None
+            try:
+                print(f"Uploading {file_path.name} to {store_name}...")
+                async with self.rate_limiter:
+                    operation = await self.client.aio.file_search_stores.upload_to_file_search_store(
+                        file=str(file_path),
+                        file_search_store_name=store_name,
+                        config={
+                            'display_name': file_path.name,
+                        }
+                    )
+            except APIError as e:
+                print(f"Error uploading {file_path.name}: {e}")
+                self._consecutive_errors += 1
+                if self._consecutive_errors == self.error_threshold:
+                    print(f"Stopping after {self.error_threshold} consecutive upload errors; "
+                          "remaining files are skipped")
+                return None
+            self._consecutive_errors = 0
+            return operation
+
+    def _breaker_open(self) -> bool:
+        """Whether enough uploads failed in a row to stop starting new ones."""
+        return 0 < self.error_threshold <= self._consecutive_errors
+
+    async def _wait_all(
+        self,
+        files: List[Path],
+        operations: List[Optional[any]]
+    ) -> List[bool]:
+        """Wait for submitted uploads using a single polling loop.
+
+        Each round sleeps once, then refreshes every pending operation
+        together, instead of each upload sleeping and polling on its own.
+
+        Args:
+            files: Paths of the uploaded files
+            operations: Upload operations in the same order (None if not started)
+
+        Returns:
+            Per-file success flags, in the same order as `files`
+        """
+        results = [operation is not None for operation in operations]
+        pending = {}
+        for i, operation in enumerate(operations):
+            if operation is None:
+                continue
+            if operation.done:
+                results[i] = _report_finished(operation, files[i].name)
+            else:
+                pending[i] = operation
+
+        deadline = time.monotonic() + UPLOAD_TIMEOUT
+        delays = _poll_delays()
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                for i in pending:
+                    print(f"Error uploading {files[i].name}: did not finish within {UPLOAD_TIMEOUT:g}s")
+                    results[i] = False
+                break
+            await asyncio.sleep(min(next(delays), remaining))
+            indexes = list(pending)
+            refreshed = await asyncio.gather(
+                *[self._refresh_operation(pending[i]) for i in indexes],
+                return_exceptions=True
+            )
+            for i, operation in zip(indexes, refreshed):
+                if isinstance(operation, APIError):
+                    print(f"Error uploading {files[i].name}: {operation}")
+                    results[i] = False
+                    del pending[i]
+                elif isinstance(operation, BaseException):
+                    raise operation
+                elif operation.done:
+                    results[i] = _report_finished(operation, files[i].name)
+                    del pending[i]
+                else:
+                    pending[i] = operation
+
+        return results
+
+    async def _refresh_operation(self, operation: any) -> any:
+        """Fetch the latest state of an upload operation."""
+        async with self.rate_limiter:
+            return await self.client.aio.operations.get(operation)
+
     def list_files_in_store(self, store_name: str) -> List[any]:
         """List all files in a file search store.
 
+        The listing is cached for the same TTL as store lookups and dropped
+        whenever files are uploaded to the store.
+
         Args:
             store_name: Name of the file search store
 
         Returns:
-            List of file objects in the store
+            List of document objects in the store
         """
         try:
-            # Note: The API provides file information through the store's metadata
-            # This is a placeholder - actual implementation depends on API capabilities
             store = self.get_store(store_name)
-            if store:
-                print(f"\nFile Search Store: {store.name}")
-                print(
-                    f"Display Name: {store.display_name if hasattr(store, 'display_name') else 'N/A'}")
-                # Additional file listing would depend on API capabilities
+            if not store:
                 return []
-            return []
+
+            print(f"\nFile Search Store: {store.name}")
+            print(f"Display Name: {getattr(store, 'display_name', None) or 'N/A'}")
+
+            cached = self._documents_cache.get(store_name)
+            if cached is not None and self._is_fresh(cached[0]):
+                return cached[1]
+
+            with self.rate_limiter:
+                documents = list(self.client.file_search_stores.documents.list(parent=store_name))
+            self._documents_cache[store_name] = (time.monotonic(), documents)
+            return documents
         except APIError as e:
             print(f"Error listing files in store: {e}")
             return []
@@ -205,15 +849,19 @@ class FileSearchManager:
             print("\nNo file search stores found.")
             return
 
-        print(f"\n{'='*70}")
-        print(f"File Search Stores ({len(stores)})")
-        print(f"{'='*70}")
+        lines = [
+            f"\n{'='*70}",
+            f"File Search Stores ({len(stores)})",
+            '='*70,
+        ]
 
         for i, store in enumerate(stores, 1):
-            print(f"\n{i}. Store Name: {store.name}")
+            lines.append(f"\n{i}. Store Name: {store.name}")
             if hasattr(store, 'display_name'):
-                print(f"   Display Name: {store.display_name}")
+                lines.append(f"   Display Name: {store.display_name}")
             if hasattr(store, 'create_time'):
-                print(f"   Created: {store.create_time}")
+                lines.append(f"   Created: {store.create_time}")
 
-        print(f"\n{'='*70}")
+        lines.append(f"\n{'='*70}")
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
@@ -1,10 +1,63 @@
 """Gemini Client wrapper for chat functionality with File Search."""
 
-from typing import List, Optional
+import functools
+import hashlib
+import json
+import sys
+from typing import Iterator, List, Optional
+import httpx
 from google import genai
 from google.genai import types
 from google.genai.errors import APIError
 
+from src.rate_limiter import TokenBucket
+from src.response_cache import ResponseCache
+from src.semantic_cache import SemanticCache
+
+_RULE = "=" * 70
+
+# Model used to embed prompts for the semantic cache
+EMBEDDING_MODEL = 'gemini-embedding-001'
+
+# Keep-alive pool shared by every blocking request a client makes, so calls
+# reuse TLS connections instead of handshaking each time. The async client
+# keeps httpx's defaults: its pooled connections are tied to the event loop
+# that opened them.
+_POOL_LIMITS = httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60.0)
+HTTP_OPTIONS = types.HttpOptions(client_args={'limits': _POOL_LIMITS})
+
+
+@functools.lru_cache(maxsize=4)
+def get_client(api_key: str) -> genai.Client:
+    """Return the shared Gemini client for an API key.
+
+    Every caller with the same key gets the same client, and therefore the
+    same HTTP connection pool.
+
+    Args:
+        api_key: Gemini API key
+
+    Returns:
+        Initialized Gemini client
+    """
+    return genai.Client(api_key=api_key, http_options=HTTP_OPTIONS)
+
+
+def build_file_search_tool(store_names: List[str]) -> types.Tool:
+    """Build a File Search tool for the given stores.
+
+    Args:
+        store_names: List of file search store names
+
+    Returns:
+        Tool object to pass in a generation config
+    """
+    return types.Tool(
+        file_search=types.FileSearch(
+            file_search_store_names=list(store_names)
+        )
+    )
+
 
 class GeminiChatClient:
     """Wrapper for Gemini API chat functionality with File Search support."""
@@ -15,7 +68,10 @@ class GeminiChatClient:
         model_name: str = 'gemini-2.5-flash',
         system_instruction: Optional[str] = None,
         enable_thinking: bool = True,
-        thinking_budget: Optional[int] = None
+        thinking_budget: Optional[int] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        response_cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None
     ):
         """Initialize the Gemini Chat Client.
 
@@ -25,23 +81,67 @@ class GeminiChatClient:
             system_instruction: System instruction to guide model behavior
             enable_thinking: Whether to enable dynamic thinking
             thinking_budget: Thinking budget (None for default, 0 to disable)
+            rate_limiter: Optional token bucket applied to every API call
+                (unlimited when None)
+            response_cache: Optional cache of responses to identical requests
+                (disabled when None)
+            semantic_cache: Optional cache matching paraphrased prompts by
+                embedding similarity (disabled when None)
         """
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_client(api_key)
         self.model_name = model_name
         self.system_instruction = system_instruction
         self.enable_thinking = enable_thinking
         self.thinking_budget = thinking_budget
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket()
         self.chat = None
+        self.async_chat = None
         self.file_search_store_names = []
+        self._config = None
+        self._config_inputs = None
+        self.response_cache = response_cache
+        self.semantic_cache = semantic_cache
+        self.stats = {'hits': 0, 'misses': 0, 'semantic_hits': 0}
+        # (chat, message count, digest) of the history hashed so far
+        self._history_meta = (None, 0, '')
 
     def set_file_search_stores(self, store_names: List[str]):
         """Set the file search stores to use for queries.
 
+        The generation config is rebuilt on the next message rather than on
+        every send.
+
         Args:
             store_names: List of file search store names
         """
         self.file_search_store_names = store_names
 
+    def _build_config(self) -> Optional[types.GenerateContentConfig]:
+        """Build the generation config from the current settings.
+
+        Returns:
+            Config object, or None if there is nothing to configure
+        """
+        config_params = {}
+
+        # Add system instruction
+        if self.system_instruction:
+            config_params['system_instruction'] = self.system_instruction
+
+        # Add thinking configuration
+        if self.enable_thinking and self.thinking_budget is not None:
+            config_params['thinking_config'] = types.ThinkingConfig(
+                thinking_budget=self.thinking_budget
+            )
+
+        # Add File Search tool if stores are configured
+        if self.file_search_store_names:
+            config_params['tools'] = [
+                build_file_search_tool(self.file_search_store_names)
+            ]
+
+        return types.GenerateContentConfig(**config_params) if config_params else None
+
     def start_chat(self):
         """Start a new chat session."""
         try:
@@ -57,6 +157,38 @@ class GeminiChatClient:
             print(f"Error starting chat: {e}")
             return False
 
+    async def astart_chat(self) -> bool:
+        """Start a new chat session on the async client.
+
+        Returns:
+            True if the session was created, False otherwise
+        """
+        try:
+            self.async_chat = self.client.aio.chats.create(model=self.model_name)
+            print(f"\nAsync chat session started with model: {self.model_name}")
+            return True
+        except APIError as e:
+            print(f"Error starting chat: {e}")
+            return False
+
+    def _current_config(self) -> Optional[types.GenerateContentConfig]:
+        """Return the generation config, rebuilding it only when its inputs change.
+
+        The config is memoized on the settings it is built from, so changing
+        the stores, system instruction or thinking settings (including by
+        plain attribute assignment) takes effect on the next message.
+        """
+        inputs = (
+            self.system_instruction,
+            self.enable_thinking,
+            self.thinking_budget,
+            tuple(self.file_search_store_names),
+        )
+        if inputs != self._config_inputs:
+            self._config = self._build_config()
+            self._config_inputs = inputs
+        return self._config
+
     def send_message(self, message: str) -> Optional[any]:
         """Send a message in the chat session with File Search.
 
@@ -71,48 +203,231 @@ class GeminiChatClient:
             return None
 
         try:
-            # Build the configuration
-            config_params = {}
+            # Reuse the config built for the current stores
+            config = self._current_config()
+
+            # Serve repeated requests from the response caches
+            cache_key = context_key = embedding = None
+            if self._caching_applies():
+                context_key = self._context_key()
+
+                if self.response_cache is not None:
+                    cache_key = ResponseCache.make_key(context=context_key, prompt=message)
+                    cached = self.response_cache.get(cache_key)
+                    if cached is not None:
+                        self.stats['hits'] += 1
+                        return self._replay_cached(message, cached)
+                    self.stats['misses'] += 1
+
+                if self.semantic_cache is not None:
+                    embedding = self._embed(message)
+                    if embedding is not None:
+                        cached = self.semantic_cache.lookup(context_key, embedding)
+                        if cached is not None:
+                            self.stats['semantic_hits'] += 1
+                            return self._replay_cached(message, cached)
 
-            # Add system instruction
-            if self.system_instruction:
-                config_params['system_instruction'] = self.system_instruction
+            # Send message
+            with self.rate_limiter:
+                if config:
+                    response = self.chat.send_message(message, config=config)
+                else:
+                    response = self.chat.send_message(message)
+
+            if (cache_key is not None or embedding is not None) and response.candidates:
+                payload = response.to_json_dict()
+                payload.pop('sdk_http_response', None)
+                if cache_key is not None:
+                    self.response_cache.set(cache_key, payload)
+                if embedding is not None:
+                    self.semantic_cache.add(context_key, embedding, payload)
+
+            return response
+
+        except APIError as e:
+            print(f"\nError sending message: {e}")
+            return None
+
+    def _caching_applies(self) -> bool:
+        """Whether responses in the current configuration may be cached."""
+        if self.response_cache is None and self.semantic_cache is None:
+            return False
+        # An explicit thinking budget makes responses vary run to run
+        return not (self.enable_thinking and self.thinking_budget not in (None, 0))
+
+    def _context_key(self) -> str:
+        """Hash everything besides the prompt that shapes the next response.
+
+        Covers model, system instruction, thinking budget, File Search stores
+        and the conversation so far, so cached answers never cross contexts.
+        """
+        return ResponseCache.make_key(
+            model=self.model_name,
+            system=self.system_instruction,
+            thinking=self.thinking_budget,
+            tools=sorted(self.file_search_store_names),
+            history=self._history_digest()
+        )
+
+    def _history_digest(self) -> str:
+        """Return a running hash of the chat history.
+
+        Only messages added since the previous call are hashed; the digest is
+        chained onto the one stored in `_history_meta`.
+        """
+        history = self.chat.get_history()
+        chat, count, digest = self._history_meta
+        if chat is not self.chat or count > len(history):
+            count, digest = 0, ''
+
+        for content in history[count:]:
+            encoded = json.dumps(content.to_json_dict(), sort_keys=True, default=str)
+            digest = hashlib.sha256((digest + encoded).encode('utf-8')).hexdigest()
 
-            # Add thinking configuration
-            if self.enable_thinking and self.thinking_budget is not None:
-                config_params['thinking_config'] = types.ThinkingConfig(
-                    thinking_budget=self.thinking_budget
+        self._history_meta = (self.chat, len(history), digest)
+        return digest
+
+    def _embed(self, message: str) -> Optional[List[float]]:
+        """Embed a prompt for semantic cache lookup.
+
+        Returns:
+            Embedding values, or None if the embedding call failed
+        """
+        try:
+            with self.rate_limiter:
+                result = self.client.models.embed_content(
+                    model=EMBEDDING_MODEL,
+                    contents=message
                 )
+            return list(result.embeddings[0].values)
+        except (APIError, IndexError, TypeError) as e:
+            print(f"Warning: Could not embed prompt for cache lookup: {e}")
+            return None
 
-            # Add File Search tool if stores are configured
-            if self.file_search_store_names:
-                config_params['tools'] = [
-                    types.Tool(
-                        file_search=types.FileSearch(
-                            file_search_store_names=self.file_search_store_names
-                        )
-                    )
-                ]
+    def _replay_cached(self, message: str, payload: dict) -> types.GenerateContentResponse:
+        """Rebuild a cached response and add the turn to the chat history.
 
-            # Create config object if we have any parameters
-            config = types.GenerateContentConfig(
-                **config_params) if config_params else None
+        Args:
+            message: User message that produced the cached response
+            payload: Serialised response from the cache
 
-            # Send message
+        Returns:
+            Response object equivalent to the original
+        """
+        response = types.GenerateContentResponse.model_validate(payload)
+        self.chat.record_history(
+            user_input=types.UserContent(parts=[types.Part(text=message)]),
+            model_output=[response.candidates[0].content],
+            automatic_function_calling_history=[],
+            is_valid=True
+        )
+        return response
+
+    def send_message_stream(self, message: str) -> Iterator[any]:
+        """Send a message and yield the response in chunks as they arrive.
+
+        The chat history is updated once the stream has been fully consumed.
+        Responses are not cached on this path.
+
+        Args:
+            message: User message
+
+        Yields:
+            Partial response objects, each carrying the next piece of text
+        """
+        if not self.chat:
+            print("Error: Chat session not started. Call start_chat() first.")
+            return
+
+        try:
+            config = self._current_config()
+            self.rate_limiter.acquire()
             if config:
-                response = self.chat.send_message(message, config=config)
+                yield from self.chat.send_message_stream(message, config=config)
             else:
-                response = self.chat.send_message(message)
+                yield from self.chat.send_message_stream(message)
+        except APIError as e:
+            print(f"\nError sending message: {e}")
 
-            return response
+    def display_stream(self, message: str) -> bool:
+        """Send a message and print the reply as it streams in, then its citations.
+
+        Falls back to send_message and display_response when a response
+        cache is configured, so cached answers are still used.
 
+        Args:
+            message: User message
+
+        Returns:
+            True if any part of a response was received
+        """
+        if self._caching_applies():
+            response = self.send_message(message)
+            self.display_response(response)
+            return response is not None
+
+        received = False
+        grounding_metadata = None
+        for chunk in self.send_message_stream(message):
+            if not received:
+                sys.stdout.write("\nAssistant: ")
+                received = True
+            if chunk.text:
+                sys.stdout.write(chunk.text)
+                sys.stdout.flush()
+            # Grounding metadata arrives with the final chunks
+            if chunk.candidates and chunk.candidates[0].grounding_metadata:
+                grounding_metadata = chunk.candidates[0].grounding_metadata
+
+        if received:
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+            if grounding_metadata:
+                self._display_citations(grounding_metadata)
+        return received
+
+    async def asend_message(self, message: str) -> Optional[any]:
+        """Send a message in the async chat session without blocking the event loop.
+
+        Independent sessions can be awaited concurrently, e.g. with
+        asyncio.gather.
+
+        Args:
+            message: User message
+
+        Returns:
+            Response object or None if error
+        """
+        if not self.async_chat:
+            print("Error: Chat session not started. Call astart_chat() first.")
+            return None
+
+        try:
+            config = self._current_config()
+            async with self.rate_limiter:
+                if config:
+                    return await self.async_chat.send_message(message, config=config)
+                return await self.async_chat.send_message(message)
         except APIError as e:
             print(f"\nError sending message: {e}")
             return None
 
-    def get_chat_history(self) -> List[any]:
+    async def aget_chat_history(self) -> List[any]:
+        """Get the history of the async chat session.
+
+        Returns:
+            List of messages in the chat history
+        """
+        if not self.async_chat:
+            return []
+        return list(self.async_chat.get_history())
+
+    def get_chat_history(self, *, limit: Optional[int] = None) -> List[any]:
         """Get the chat history.
 
+        Args:
+            limit: If given, return only the most recent `limit` messages
+
         Returns:
             List of messages in the chat history
         """
@@ -120,7 +435,10 @@ class GeminiChatClient:
             return []
 
         try:
-            return list(self.chat.get_history())
+            history = self.chat.get_history()
+            if limit is not None:
+                return list(history[-limit:]) if limit > 0 else []
+            return list(history)
         except APIError as e:
             print(f"Error getting chat history: {e}")
             return []
@@ -138,11 +456,10 @@ class GeminiChatClient:
         print(f"\nAssistant: {response.text}")
 
         # Display grounding metadata (citations) if available
-        if response.candidates and len(response.candidates) > 0:
-            candidate = response.candidates[0]
-
-            if hasattr(candidate, 'grounding_metadata') and candidate.grounding_metadata:
-                self._display_citations(candidate.grounding_metadata)
+        if response.candidates:
+            grounding_metadata = getattr(response.candidates[0], 'grounding_metadata', None)
+            if grounding_metadata:
+                self._display_citations(grounding_metadata)
 
     def _display_citations(self, grounding_metadata: any):
         """Display citation information from grounding metadata.
@@ -150,48 +467,59 @@ class GeminiChatClient:
         Args:
             grounding_metadata: Grounding metadata from the response
         """
-        print("\n" + "="*70)
-        print("CITATIONS")
-        print("="*70)
+        lines = ["\n" + _RULE, "CITATIONS", _RULE]
 
         # Display search queries if available
-        if hasattr(grounding_metadata, 'search_entry_point') and grounding_metadata.search_entry_point:
-            print("\nSearch queries used:")
-            if hasattr(grounding_metadata.search_entry_point, 'rendered_content'):
-                print(
-                    f"  {grounding_metadata.search_entry_point.rendered_content}")
+        search_entry_point = getattr(grounding_metadata, 'search_entry_point', None)
+        if search_entry_point:
+            lines.append("\nSearch queries used:")
+            rendered_content = getattr(search_entry_point, 'rendered_content', None)
+            if rendered_content:
+                lines.append(f"  {rendered_content}")
 
         # Display grounding chunks (sources)
-        if hasattr(grounding_metadata, 'grounding_chunks') and grounding_metadata.grounding_chunks:
-            print(f"\nSources ({len(grounding_metadata.grounding_chunks)}):")
+        grounding_chunks = getattr(grounding_metadata, 'grounding_chunks', None)
+        if grounding_chunks:
+            lines.append(f"\nSources ({len(grounding_chunks)}):")
 
-            for i, chunk in enumerate(grounding_metadata.grounding_chunks, 1):
-                print(f"\n{i}. ", end="")
+            for i, chunk in enumerate(grounding_chunks, 1):
+                entry = []
 
                 # Try to extract relevant information from the chunk
-                if hasattr(chunk, 'web') and chunk.web:
-                    print(
-                        f"Web: {chunk.web.title if hasattr(chunk.web, 'title') else 'N/A'}")
-                    if hasattr(chunk.web, 'uri'):
-                        print(f"   URI: {chunk.web.uri}")
-                elif hasattr(chunk, 'retrieved_context') and chunk.retrieved_context:
+                web = getattr(chunk, 'web', None)
+                retrieved_context = getattr(chunk, 'retrieved_context', None)
+                if web:
+                    entry.append(f"Web: {getattr(web, 'title', 'N/A')}")
+                    uri = getattr(web, 'uri', None)
+                    if uri:
+                        entry.append(f"   URI: {uri}")
+                elif retrieved_context:
                     # For file search results
-                    if hasattr(chunk.retrieved_context, 'uri'):
-                        print(f"Document: {chunk.retrieved_context.uri}")
-                    if hasattr(chunk.retrieved_context, 'title'):
-                        print(f"   Title: {chunk.retrieved_context.title}")
+                    uri = getattr(retrieved_context, 'uri', None)
+                    if uri:
+                        entry.append(f"Document: {uri}")
+                    title = getattr(retrieved_context, 'title', None)
+                    if title:
+                        entry.append(f"   Title: {title}")
                 else:
                     # Fallback: display available attributes
-                    print(f"Chunk: {chunk}")
+                    entry.append(f"Chunk: {chunk}")
+
+                # The first line of each entry follows its number
+                lines.append(f"\n{i}. " + (entry[0] if entry else ""))
+                lines.extend(entry[1:])
 
         # Display grounding supports (which parts of the answer are grounded)
-        if hasattr(grounding_metadata, 'grounding_supports') and grounding_metadata.grounding_supports:
-            print(
-                f"\nGrounding supports: {len(grounding_metadata.grounding_supports)} segment(s) grounded")
+        grounding_supports = getattr(grounding_metadata, 'grounding_supports', None)
+        if grounding_supports:
+            lines.append(f"\nGrounding supports: {len(grounding_supports)} segment(s) grounded")
 
-        print("="*70)
+        lines.append(_RULE)
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
     def reset_chat(self):
         """Reset the chat session."""
         self.chat = None
+        self.async_chat = None
         print("\nChat session reset.")
@@ -0,0 +1,78 @@
+"""Token-bucket rate limiter shared by the API wrappers."""
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Limit API calls to a steady rate per minute with an initial burst.
+
+    Usable as a context manager around blocking calls (``with bucket:``) and
+    as an async context manager around coroutine calls (``async with
+    bucket:``). A rate of 0 or None disables limiting.
+    """
+
+    def __init__(self, rate_per_minute: Optional[int] = None, burst: Optional[int] = None):
+        """Initialize the token bucket.
+
+        Args:
+            rate_per_minute: Sustained number of calls allowed per minute
+            burst: Number of calls allowed back to back (defaults to the rate)
+        """
+        self.rate_per_minute = rate_per_minute or 0
+        self.burst = burst or self.rate_per_minute
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether calls are being limited."""
+        return self.rate_per_minute > 0
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it.
+
+        Returns:
+            Seconds to wait (0.0 when a token was available)
+        """
+        if not self.enabled:
+            return 0.0
+
+        rate = self.rate_per_minute / 60.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / rate
+
+    def acquire(self):
+        """Block until a call is allowed."""
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a call is allowed."""
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
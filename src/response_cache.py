@@ -0,0 +1,80 @@
+"""On-disk cache of model responses keyed by the full request payload."""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """Exact-match response cache stored as one JSON file per request.
+
+    Entries expire `ttl` seconds after they were written (checked against the
+    file mtime). Only serialisable payloads are stored; callers decide what
+    goes in and how to rebuild a response from it.
+    """
+
+    def __init__(self, directory: Path, ttl: float):
+        """Initialize the response cache.
+
+        Args:
+            directory: Directory holding the cache entries (created on first write)
+            ttl: Seconds an entry stays valid
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """Hash the parts of a request into a cache key.
+
+        Args:
+            **parts: JSON-serialisable request components
+
+        Returns:
+            Hex SHA-256 digest of the canonical JSON encoding
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for a key, or None on a miss or expiry."""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) >= self.ttl:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, payload: Dict[str, Any]):
+        """Store a payload under a key.
+
+        Writes go to a temporary file that is renamed into place, so readers
+        never see a partial entry.
+        """
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Warning: Could not write response cache: {e}")
+
+    def clear(self):
+        """Remove every cached entry."""
+        if not self.directory.exists():
+            return
+        for path in self.directory.glob('*.json'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
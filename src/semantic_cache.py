@@ -0,0 +1,70 @@
+"""In-process cache that matches prompts by embedding similarity."""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Default cosine similarity above which two prompts count as equivalent
+DEFAULT_THRESHOLD = 0.92
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    """Scale a vector to unit length so dot products are cosine similarities."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if not norm:
+        return list(vector)
+    return [x / norm for x in vector]
+
+
+class SemanticCache:
+    """Nearest-neighbour cache of responses keyed by prompt embeddings.
+
+    Entries are partitioned by a context key (system instruction, stores and
+    conversation so far), so a prompt only matches earlier prompts asked in
+    the same context.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        """Initialize the semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cached response to be reused
+        """
+        self.threshold = threshold
+        self._entries: Dict[str, List[Tuple[List[float], Any]]] = {}
+
+    def lookup(self, context_key: str, embedding: Sequence[float]) -> Optional[Any]:
+        """Find the cached payload whose prompt is most similar to `embedding`.
+
+        Args:
+            context_key: Identifier of the conversation context
+            embedding: Embedding of the incoming prompt
+
+        Returns:
+            Cached payload, or None if nothing exceeds the threshold
+        """
+        entries = self._entries.get(context_key)
+        if not entries:
+            return None
+
+        query = _normalize(embedding)
+        best_score, best_payload = -1.0, None
+        for vector, payload in entries:
+            score = sum(a * b for a, b in zip(query, vector))
+            if score > best_score:
+                best_score, best_payload = score, payload
+
+        return best_payload if best_score >= self.threshold else None
+
+    def add(self, context_key: str, embedding: Sequence[float], payload: Any):
+        """Cache a payload under a prompt embedding.
+
+        Args:
+            context_key: Identifier of the conversation context
+            embedding: Embedding of the prompt that produced the payload
+            payload: Response data to return on a later match
+        """
+        self._entries.setdefault(context_key, []).append((_normalize(embedding), payload))
+
+    def clear(self):
+        """Remove every cached entry."""
+        self._entries.clear()
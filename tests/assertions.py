@@ -0,0 +1,26 @@
+"""Assertion helpers for checking how the code under test called the SDK."""
+
+from pathlib import Path
+from typing import Any, Optional, Union
+
+
+def assert_upload_called(client: Any, store: str, *, file: Optional[Union[str, Path]] = None,
+                         display_name: Optional[str] = None, aio: bool = False):
+    """Assert the last file upload went to `store` with the expected arguments.
+
+    Args:
+        client: Mock Gemini client passed to the code under test
+        store: Expected file search store name
+        file: Expected path of the uploaded file (checked when given)
+        display_name: Expected document display name (checked when given)
+        aio: Inspect the async client (`client.aio`) instead of the sync one
+    """
+    upload = (client.aio if aio else client).file_search_stores.upload_to_file_search_store
+    assert upload.called, "no file was uploaded"
+
+    kwargs = upload.call_args.kwargs
+    assert kwargs['file_search_store_name'] == store
+    if file is not None:
+        assert kwargs['file'] == str(file)
+    if display_name is not None:
+        assert kwargs['config']['display_name'] == display_name
@@ -0,0 +1,217 @@
+"""Shared pytest fixtures."""
+
+import io
+import sys
+from datetime import datetime
+from contextlib import ExitStack
+from types import ModuleType, SimpleNamespace
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+
+
+# Attributes ChatInterface may touch on the wrappers it creates. Listing them
+# up front keeps typos in tests from passing silently and lets Mock skip
+# building children for anything else.
+_CLIENT_SPEC = (
+    'chat', 'client', 'rate_limiter', 'send_message', 'display_response',
+    'display_stream', 'set_file_search_stores', 'start_chat', 'reset_chat',
+    'get_chat_history'
+)
+_FSM_SPEC = (
+    'create_store', 'get_store', 'delete_store', 'display_stores_summary',
+    'invalidate', 'upload_files_from_directory', 'upload_files_batch',
+    'get_upload_operation'
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_gemini_client():
+    """Drop cached Gemini clients so each test sees its own patched client.
+
+    Only touches src.gemini_client if something already imported it, so test
+    modules that never need the SDK don't pay for importing google-genai.
+    """
+    def clear():
+        get_client = getattr(sys.modules.get('src.gemini_client'), 'get_client', None)
+        if get_client is not None:
+            get_client.cache_clear()
+
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture
+def mock_genai_client():
+    """Patch genai.Client so GeminiChatClient gets a mock SDK client."""
+    with patch('src.gemini_client.genai.Client', new_callable=Mock) as mock_client_cls:
+        yield mock_client_cls
+
+
+@pytest.fixture
+def make_client(mock_genai_client):
+    """Factory for GeminiChatClient instances backed by the patched SDK client."""
+    from src.gemini_client import GeminiChatClient
+
+    def make(**kwargs):
+        kwargs.setdefault('api_key', 'test-key')
+        return GeminiChatClient(**kwargs)
+    return make
+
+
+@pytest.fixture
+def mock_chat(mock_genai_client):
+    """Chat session handed out by the patched client's chats.create."""
+    chat = Mock()
+    mock_genai_client.return_value.chats.create.return_value = chat
+    return chat
+
+
+def _stub_module(stack: ExitStack, name: str, **attrs) -> ModuleType:
+    """Register a stand-in for module `name` until the stack closes."""
+    module = ModuleType(name)
+    module.__dict__.update(attrs)
+    original = sys.modules.get(name)
+    sys.modules[name] = module
+
+    def restore():
+        if original is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = original
+
+    stack.callback(restore)
+    return module
+
+
+@pytest.fixture(scope='module')
+def interface_factory():
+    """Patch Config.validate and create the mocked wrapper classes once per module.
+
+    Returns a callable that resets the mocked classes and builds a fresh
+    ChatInterface, so each test still sees its own interface and mock
+    instances. The callable takes an ExitStack: ChatInterface imports its
+    wrappers lazily, so stub modules standing in for them are registered in
+    sys.modules until that stack closes. That keeps the real wrappers (and
+    google-genai behind them) from being imported just to be mocked out,
+    without the stubs outliving the test that needed them.
+    """
+    from src.chat_interface import ChatInterface
+
+    with ExitStack() as module_stack:
+        validate = module_stack.enter_context(patch('src.chat_interface.Config.validate'))
+        client_cls = MagicMock(name='GeminiChatClient')
+        fsm_cls = MagicMock(name='FileSearchManager')
+
+        def build(stack: ExitStack) -> SimpleNamespace:
+            _stub_module(stack, 'src.gemini_client', GeminiChatClient=client_cls)
+            _stub_module(stack, 'src.file_search_manager', FileSearchManager=fsm_cls)
+            for mock in (validate, client_cls, fsm_cls):
+                mock.reset_mock(return_value=True, side_effect=True)
+            validate.return_value = True
+            client = client_cls.return_value = Mock(spec_set=_CLIENT_SPEC)
+            # No session yet; starting one succeeds and messages get a reply
+            client.chat = None
+            client.start_chat.return_value = True
+            client.get_chat_history.return_value = []
+            client.send_message.return_value = SimpleNamespace(
+                text='Response', candidates=[]
+            )
+            fsm_cls.return_value = Mock(spec_set=_FSM_SPEC)
+            return SimpleNamespace(
+                interface=ChatInterface(),
+                client=client_cls.return_value,
+                fsm=fsm_cls.return_value,
+                client_cls=client_cls,
+                fsm_cls=fsm_cls,
+                validate=validate
+            )
+
+        yield build
+
+
+@pytest.fixture
+def patched_interface(interface_factory):
+    """ChatInterface whose config check and API wrappers are replaced with mocks.
+
+    Returns a namespace with the interface, the mocked client and file search
+    manager instances it will create, and the mocked classes themselves. The
+    stub wrapper modules are removed from sys.modules after the test.
+    """
+    with ExitStack() as stack:
+        yield interface_factory(stack)
+
+
+@pytest.fixture
+def interface(patched_interface):
+    """The patched ChatInterface with no store selected and the loop stopped."""
+    iface = patched_interface.interface
+    iface.current_store = None
+    iface.is_running = False
+    return iface
+
+
+@pytest.fixture
+def scripted_input(monkeypatch):
+    """Replace input() with a stub that returns the given responses in order.
+
+    Call the fixture with the responses, e.g. ``scripted_input('', '/quit')``.
+    Exception instances among the responses are raised instead of returned.
+    """
+    def install(*responses):
+        answers = iter(responses)
+
+        def fake_input(prompt=''):
+            answer = next(answers)
+            if isinstance(answer, BaseException):
+                raise answer
+            return answer
+
+        monkeypatch.setattr('builtins.input', fake_input)
+
+    return install
+
+
+@pytest.fixture
+def export_dir(monkeypatch, tmp_path):
+    """Point chat exports at a temporary directory."""
+    directory = tmp_path / 'exports'
+    monkeypatch.setattr('src.config.Config.EXPORT_DIR', directory)
+    return directory
+
+
+class FakeFile(io.StringIO):
+    """In-memory file whose contents stay readable after its with block exits."""
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+@pytest.fixture
+def fake_open(monkeypatch):
+    """Replace open() with in-memory files.
+
+    Returns a dict mapping each opened path (as a string) to its FakeFile, so
+    tests can check which files were written and what they contain.
+    """
+    files = {}
+
+    def _open(path, mode='r', *args, **kwargs):
+        files[str(path)] = FakeFile()
+        return files[str(path)]
+
+    monkeypatch.setattr('builtins.open', _open)
+    return files
+
+
+@pytest.fixture
+def frozen_now(monkeypatch):
+    """Pin datetime.now() in src.chat_interface to midnight on 2024-01-01."""
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2024, 1, 1, tzinfo=tz)
+
+    monkeypatch.setattr('src.chat_interface.datetime', FrozenDatetime)
+    return FrozenDatetime
@@ -0,0 +1,59 @@
+"""Factories for the plain data objects the tests feed to the code under test."""
+
+import functools
+from types import SimpleNamespace
+from typing import Any, Optional, Sequence
+
+
+@functools.lru_cache(maxsize=None)
+def make_message(role: str, text: str) -> SimpleNamespace:
+    """Build a chat history message with a single text part.
+
+    Messages are cached by (role, text), so tests asking for the same shape
+    share one instance. Treat the result as read-only.
+
+    Args:
+        role: Message role ('user' or 'model')
+        text: Text of the message's only part
+
+    Returns:
+        Message with `role`, `parts` and empty `candidates`
+    """
+    return SimpleNamespace(role=role, parts=(SimpleNamespace(text=text),), candidates=())
+
+
+def make_grounding(chunks: Sequence[Any] = (), supports: int = 0,
+                   query: Optional[str] = None) -> SimpleNamespace:
+    """Build grounding metadata as attached to a model response candidate.
+
+    Args:
+        chunks: Grounding chunks (objects with `web` / `retrieved_context`)
+        supports: Number of grounding supports to include
+        query: Rendered search entry point content, or None for no entry point
+
+    Returns:
+        Grounding metadata with `search_entry_point`, `grounding_chunks` and
+        `grounding_supports`
+    """
+    return SimpleNamespace(
+        search_entry_point=SimpleNamespace(rendered_content=query) if query else None,
+        grounding_chunks=list(chunks),
+        grounding_supports=[SimpleNamespace() for _ in range(supports)]
+    )
+
+
+def make_reply(text: str, grounding: Optional[SimpleNamespace] = None) -> SimpleNamespace:
+    """Build a model history message whose only candidate carries `grounding`.
+
+    Args:
+        text: Text of the reply's only part
+        grounding: Grounding metadata for the candidate (see make_grounding)
+
+    Returns:
+        Message with `role`, `parts` and one candidate
+    """
+    return SimpleNamespace(
+        role='model',
+        parts=(SimpleNamespace(text=text),),
+        candidates=(SimpleNamespace(grounding_metadata=grounding),)
+    )
@@ -1,251 +1,168 @@
 """Tests for the ChatInterface module."""
 
+import re
 import pytest
-from pathlib import Path
-from unittest.mock import Mock, MagicMock, patch, mock_open
-from datetime import datetime
-from src.chat_interface import ChatInterface
+from types import SimpleNamespace
+from unittest.mock import Mock, MagicMock, patch, call
+from src.chat_interface import ChatInterface, _iter_text_parts
 from src.config import Config
+from tests.factories import make_grounding, make_message
 
+# Command names (without the slash) mentioned in printed text
+_COMMAND_PATTERN = re.compile(r'(?<![\w/])/([a-z]+(?:-[a-z]+)*)')
 
-class TestChatInterfaceInit:
-    """Test cases for ChatInterface initialization."""
+# Landmarks every welcome banner contains
+_WELCOME_PATTERN = re.compile(r'GEMINI FILE SEARCH CHAT APPLICATION|Model:|/help')
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_init_success(self, mock_fsm, mock_client, mock_validate):
-        """Test successful initialization."""
-        mock_validate.return_value = True
 
-        interface = ChatInterface()
+class TestChatInterfaceInit:
+    """Test cases for ChatInterface initialization."""
 
+    def test_init_success(self, interface, patched_interface):
+        """Test successful initialization defers client construction."""
         assert interface.current_store is None
         assert interface.is_running is False
-        mock_validate.assert_called_once()
-        mock_client.assert_called_once()
-        mock_fsm.assert_called_once()
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_init_creates_gemini_client(self, mock_fsm, mock_client, mock_validate):
-        """Test that initialization creates GeminiChatClient."""
-        mock_validate.return_value = True
-
-        interface = ChatInterface()
-
-        mock_client.assert_called_once()
-        call_kwargs = mock_client.call_args[1]
+        patched_interface.validate.assert_not_called()
+        patched_interface.client_cls.assert_not_called()
+        patched_interface.fsm_cls.assert_not_called()
+
+    def test_init_creates_gemini_client(self, interface, patched_interface):
+        """Test that first access creates GeminiChatClient."""
+        client = interface.gemini_client
+
+        assert client is interface.gemini_client
+        patched_interface.validate.assert_called_once()
+        patched_interface.client_cls.assert_called_once()
+        call_kwargs = patched_interface.client_cls.call_args[1]
         assert 'api_key' in call_kwargs
         assert 'model_name' in call_kwargs
         assert 'system_instruction' in call_kwargs
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_init_creates_file_search_manager(self, mock_fsm, mock_client, mock_validate):
-        """Test that initialization creates FileSearchManager."""
-        mock_validate.return_value = True
-        mock_client_instance = Mock()
-        mock_client_instance.client = Mock()
-        mock_client.return_value = mock_client_instance
-
-        interface = ChatInterface()
-
-        mock_fsm.assert_called_once()
+    def test_init_creates_file_search_manager(self, interface, patched_interface):
+        """Test that first access creates FileSearchManager."""
+        patched_interface.client.client = Mock()
 
+        manager = interface.file_search_manager
 
-class TestStartMethod:
-    """Test cases for start method."""
+        assert manager is interface.file_search_manager
+        patched_interface.fsm_cls.assert_called_once()
+        call_kwargs = patched_interface.fsm_cls.call_args[1]
+        assert call_kwargs['client'] == patched_interface.client.client
+        assert call_kwargs['rate_limiter'] is patched_interface.client.rate_limiter
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch.object(ChatInterface, 'display_welcome')
-    @patch.object(ChatInterface, 'main_menu')
-    def test_start(self, mock_menu, mock_welcome, mock_fsm, mock_client, mock_validate):
-        """Test start method."""
-        mock_validate.return_value = True
+    def test_help_does_not_create_clients(self, interface, patched_interface):
+        """Test that /help works without validating config or creating clients."""
+        interface.handle_command('/help')
 
-        interface = ChatInterface()
-        interface.start()
+        patched_interface.validate.assert_not_called()
+        patched_interface.client_cls.assert_not_called()
 
-        assert interface.is_running is True
-        mock_welcome.assert_called_once()
-        mock_menu.assert_called_once()
 
+@patch.object(ChatInterface, 'display_welcome', autospec=True)
+@patch.object(ChatInterface, 'main_menu', autospec=True)
+def test_start(mock_menu, mock_welcome, interface):
+    """Test start method."""
+    interface.start()
 
-class TestDisplayWelcome:
-    """Test cases for display_welcome method."""
+    assert interface.is_running is True
+    mock_welcome.assert_called_once_with(interface)
+    mock_menu.assert_called_once_with(interface)
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_display_welcome(self, mock_fsm, mock_client, mock_validate, capsys):
-        """Test display welcome message."""
-        mock_validate.return_value = True
 
-        interface = ChatInterface()
-        interface.display_welcome()
+def test_display_welcome(interface, capsys):
+    """Test display welcome message."""
+    interface.display_welcome()
 
-        captured = capsys.readouterr()
-        assert 'GEMINI FILE SEARCH CHAT APPLICATION' in captured.out
-        assert 'Model:' in captured.out
-        assert '/help' in captured.out
+    captured = capsys.readouterr()
+    found = set(_WELCOME_PATTERN.findall(captured.out))
+    assert found == {'GEMINI FILE SEARCH CHAT APPLICATION', 'Model:', '/help'}
 
 
 class TestHandleCommand:
     """Test cases for handle_command method."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_handle_help_command(self, mock_fsm, mock_client, mock_validate, capsys):
-        """Test handling /help command."""
-        mock_validate.return_value = True
-
-        interface = ChatInterface()
-        interface.handle_command('/help')
-
-        captured = capsys.readouterr()
-        assert 'AVAILABLE COMMANDS' in captured.out
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_handle_quit_command(self, mock_fsm, mock_client, mock_validate):
-        """Test handling /quit command."""
-        mock_validate.return_value = True
-
-        interface = ChatInterface()
-        interface.is_running = True
-        interface.handle_command('/quit')
-
-        assert interface.is_running is False
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_handle_exit_command(self, mock_fsm, mock_client, mock_validate):
-        """Test handling /exit command."""
-        mock_validate.return_value = True
-
-        interface = ChatInterface()
+    @pytest.mark.parametrize('command, expected_attr, expected_value', [
+        ('/quit', 'is_running', False),
+        ('/exit', 'is_running', False),
+    ])
+    def test_handle_command_state(self, interface, command, expected_attr, expected_value):
+        """Test commands that change interface state."""
         interface.is_running = True
-        interface.handle_command('/exit')
+        interface.handle_command(command)
 
-        assert interface.is_running is False
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch.object(ChatInterface, 'cmd_create_store')
-    def test_handle_create_command(self, mock_cmd, mock_fsm, mock_client, mock_validate):
-        """Test handling /create command."""
-        mock_validate.return_value = True
+        assert getattr(interface, expected_attr) == expected_value
 
-        interface = ChatInterface()
-        interface.handle_command('/create test-store')
-
-        mock_cmd.assert_called_once_with('test-store')
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_handle_unknown_command(self, mock_fsm, mock_client, mock_validate, capsys):
-        """Test handling unknown command."""
-        mock_validate.return_value = True
-
-        interface = ChatInterface()
-        interface.handle_command('/unknown')
+    @pytest.mark.parametrize('command, needle', [
+        ('/help', 'AVAILABLE COMMANDS'),
+        ('/unknown', 'Unknown command'),
+    ])
+    def test_handle_command_stdout(self, interface, command, needle, capsys):
+        """Test commands whose result is printed."""
+        interface.handle_command(command)
 
         captured = capsys.readouterr()
-        assert 'Unknown command' in captured.out
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch.object(ChatInterface, 'cmd_list_stores')
-    def test_handle_list_stores_short_form(self, mock_cmd, mock_fsm, mock_client, mock_validate):
-        """Test handling /list command (short form)."""
-        mock_validate.return_value = True
+        assert needle in captured.out
 
+    @pytest.mark.parametrize('command, method, args', [
+        ('/create test-store', 'cmd_create_store', ('test-store',)),
+        ('/list', 'cmd_list_stores', ()),
+        ('/list-stores', 'cmd_list_stores', ()),
+    ])
+    def test_handle_command_dispatch(self, command, method, args):
+        """Test that short and long command forms reach their handler."""
+        # Dispatch touches no clients, so no config or API patches are needed
         interface = ChatInterface()
-        interface.handle_command('/list')
-
-        mock_cmd.assert_called_once()
+        with patch.object(ChatInterface, method, autospec=True) as mock_cmd:
+            interface.handle_command(command)
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch.object(ChatInterface, 'cmd_list_stores')
-    def test_handle_list_stores_long_form(self, mock_cmd, mock_fsm, mock_client, mock_validate):
-        """Test handling /list-stores command (long form)."""
-        mock_validate.return_value = True
+        mock_cmd.assert_called_once_with(interface, *args)
 
-        interface = ChatInterface()
-        interface.handle_command('/list-stores')
+    def test_command_tables_name_existing_handlers(self):
+        """Test that every dispatch table entry names a ChatInterface method."""
+        tables = {**ChatInterface._COMMANDS, **ChatInterface._ARG_COMMANDS}
 
-        mock_cmd.assert_called_once()
+        assert '/create' in ChatInterface._ARG_COMMANDS
+        for name in tables.values():
+            assert callable(getattr(ChatInterface, name))
 
 
 class TestHandleChatMessage:
     """Test cases for handle_chat_message method."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_handle_chat_message_without_session(self, mock_fsm, mock_client, mock_validate, capsys):
+    def test_handle_chat_message_without_session(self, interface, patched_interface, capsys):
         """Test handling chat message without active session."""
-        mock_validate.return_value = True
-        mock_client_instance = Mock()
-        mock_client_instance.chat = None
-        mock_client.return_value = mock_client_instance
+        patched_interface.client.chat = None
 
-        interface = ChatInterface()
         interface.handle_chat_message('Hello')
 
         captured = capsys.readouterr()
         assert 'start a chat session first' in captured.out
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_handle_chat_message_with_session(self, mock_fsm, mock_client, mock_validate):
+    @patch('src.chat_interface.Config.STREAM_RESPONSES', False)
+    def test_handle_chat_message_with_session(self, interface, patched_interface):
         """Test handling chat message with active session."""
-        mock_validate.return_value = True
-        mock_client_instance = Mock()
-        mock_chat = Mock()
-        mock_response = Mock()
-        mock_response.text = 'Response'
-        mock_response.candidates = []
+        client = patched_interface.client
+        client.chat = Mock()
 
-        mock_client_instance.chat = mock_chat
-        mock_client_instance.send_message.return_value = mock_response
-        mock_client.return_value = mock_client_instance
+        interface.handle_chat_message('Hello')
+
+        client.send_message.assert_called_once_with('Hello')
+        client.display_response.assert_called_once_with(client.send_message.return_value)
+
+    @patch('src.chat_interface.Config.STREAM_RESPONSES', True)
+    def test_handle_chat_message_streams(self, interface, patched_interface):
+        """Test that streaming mode prints the reply through display_stream."""
+        patched_interface.client.chat = Mock()
 
-        interface = ChatInterface()
         interface.handle_chat_message('Hello')
 
-        mock_client_instance.send_message.assert_called_once_with('Hello')
-        mock_client_instance.display_response.assert_called_once_with(mock_response)
+        patched_interface.client.display_stream.assert_called_once_with('Hello')
+        patched_interface.client.send_message.assert_not_called()
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_handle_chat_message_without_store(self, mock_fsm, mock_client, mock_validate, capsys):
+    def test_handle_chat_message_without_store(self, interface, patched_interface, capsys):
         """Test handling chat message without selected store."""
-        mock_validate.return_value = True
-        mock_client_instance = Mock()
-        mock_chat = Mock()
-        mock_response = Mock()
-
-        mock_client_instance.chat = mock_chat
-        mock_client_instance.send_message.return_value = mock_response
-        mock_client.return_value = mock_client_instance
+        patched_interface.client.chat = Mock()
 
-        interface = ChatInterface()
         interface.current_store = None
         interface.handle_chat_message('Hello')
 
@@ -253,433 +170,267 @@ class TestHandleChatMessage:
         assert 'No file search store selected' in captured.out
 
 
-class TestCmdCreateStore:
-    """Test cases for cmd_create_store method."""
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input', return_value='n')
-    def test_cmd_create_store_with_name(self, mock_input, mock_fsm, mock_client, mock_validate):
-        """Test creating a store with a name."""
-        mock_validate.return_value = True
-        mock_store = Mock()
-        mock_store.name = 'test-store-123'
-
-        mock_fsm_instance = Mock()
-        mock_fsm_instance.create_store.return_value = mock_store
-        mock_fsm.return_value = mock_fsm_instance
-
-        interface = ChatInterface()
-        interface.cmd_create_store('my-store')
-
-        mock_fsm_instance.create_store.assert_called_once_with(display_name='my-store')
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input', return_value='y')
-    def test_cmd_create_store_and_select(self, mock_input, mock_fsm, mock_client, mock_validate):
-        """Test creating a store and selecting it."""
-        mock_validate.return_value = True
-        mock_store = Mock()
-        mock_store.name = 'test-store-123'
-
-        mock_fsm_instance = Mock()
-        mock_fsm_instance.create_store.return_value = mock_store
-        mock_fsm.return_value = mock_fsm_instance
-
-        mock_client_instance = Mock()
-        mock_client.return_value = mock_client_instance
-
-        interface = ChatInterface()
-        interface.cmd_create_store('my-store')
-
-        assert interface.current_store == mock_store
-        mock_client_instance.set_file_search_stores.assert_called_once_with([mock_store.name])
-
-
-class TestCmdSelectStore:
-    """Test cases for cmd_select_store method."""
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_select_store_success(self, mock_fsm, mock_client, mock_validate):
-        """Test selecting a store successfully."""
-        mock_validate.return_value = True
-        mock_store = Mock()
-        mock_store.name = 'store-123'
-
-        mock_fsm_instance = Mock()
-        mock_fsm_instance.get_store.return_value = mock_store
-        mock_fsm.return_value = mock_fsm_instance
-
-        mock_client_instance = Mock()
-        mock_client.return_value = mock_client_instance
-
-        interface = ChatInterface()
-        interface.cmd_select_store('store-123')
-
-        assert interface.current_store == mock_store
-        mock_client_instance.set_file_search_stores.assert_called_once_with([mock_store.name])
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_select_store_not_found(self, mock_fsm, mock_client, mock_validate, capsys):
-        """Test selecting a store that doesn't exist."""
-        mock_validate.return_value = True
-
-        mock_fsm_instance = Mock()
-        mock_fsm_instance.get_store.return_value = None
-        mock_fsm.return_value = mock_fsm_instance
-
-        interface = ChatInterface()
-        interface.cmd_select_store('nonexistent')
-
-        captured = capsys.readouterr()
-        assert 'Store not found' in captured.out
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_select_store_no_name(self, mock_fsm, mock_client, mock_validate, capsys):
-        """Test selecting a store without providing a name."""
-        mock_validate.return_value = True
-
-        interface = ChatInterface()
-        interface.cmd_select_store('')
-
-        captured = capsys.readouterr()
-        assert 'provide a store name' in captured.out
+@pytest.mark.parametrize('answer, selects', [
+    ('n', False),
+    ('y', True),
+])
+def test_cmd_create_store(interface, patched_interface, scripted_input,
+                          answer, selects):
+    """Test creating a store and optionally selecting it."""
+    mock_store = SimpleNamespace(name='test-store-123')
+    patched_interface.fsm.create_store.return_value = mock_store
+    scripted_input(answer)
+
+    interface.cmd_create_store('my-store')
+
+    patched_interface.fsm.create_store.assert_called_once_with(display_name='my-store')
+    assert (interface.current_store is mock_store) is selects
+    expected_calls = [call([mock_store.name])] if selects else []
+    assert patched_interface.client.set_file_search_stores.call_args_list == expected_calls
+
+
+@pytest.mark.parametrize('found, store_name, needle', [
+    (True, 'store-123', 'Selected store: store-123'),
+    (False, 'nonexistent', 'Store not found'),
+    (False, '', 'provide a store name'),
+])
+def test_cmd_select_store(interface, patched_interface, capsys, found, store_name, needle):
+    """Test selecting an existing, missing or unnamed store."""
+    mock_store = SimpleNamespace(name=store_name)
+    patched_interface.fsm.get_store.return_value = mock_store if found else None
+
+    interface.cmd_select_store(store_name)
+
+    captured = capsys.readouterr()
+    assert needle in captured.out
+    assert (interface.current_store is mock_store) is found
+    expected_calls = [call([store_name])] if found else []
+    assert patched_interface.client.set_file_search_stores.call_args_list == expected_calls
+
+
+@pytest.mark.parametrize('answer, is_current, deletes, needle', [
+    ('yes', False, True, ''),
+    ('no', False, False, 'cancelled'),
+    ('yes', True, True, 'Current store deselected'),
+])
+def test_cmd_delete_store(interface, patched_interface, scripted_input, capsys,
+                          answer, is_current, deletes, needle):
+    """Test confirmed, cancelled and current-store deletions."""
+    mock_store = SimpleNamespace(name='store-123')
+    patched_interface.fsm.delete_store.return_value = True
+    if is_current:
+        interface.current_store = mock_store
+    scripted_input(answer)
 
+    interface.cmd_delete_store('store-123')
 
-class TestCmdDeleteStore:
-    """Test cases for cmd_delete_store method."""
+    captured = capsys.readouterr()
+    assert needle in captured.out
+    assert patched_interface.fsm.delete_store.call_args_list == (
+        [call('store-123')] if deletes else []
+    )
+    if is_current:
+        assert interface.current_store is None
+        patched_interface.client.set_file_search_stores.assert_called_once_with([])
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input', return_value='yes')
-    def test_cmd_delete_store_success(self, mock_input, mock_fsm, mock_client, mock_validate):
-        """Test deleting a store successfully."""
-        mock_validate.return_value = True
 
-        mock_fsm_instance = Mock()
-        mock_fsm_instance.delete_store.return_value = True
-        mock_fsm.return_value = mock_fsm_instance
+class TestCmdUploadFiles:
+    """Test cases for cmd_upload_files method."""
 
-        interface = ChatInterface()
-        interface.cmd_delete_store('store-123')
+    def test_cmd_upload_files_success(self, interface, patched_interface):
+        """Test uploading files successfully."""
+        mock_store = SimpleNamespace(name='store-123')
 
-        mock_fsm_instance.delete_store.assert_called_once_with('store-123')
+        patched_interface.fsm.upload_files_from_directory.return_value = 3
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input', return_value='no')
-    def test_cmd_delete_store_cancelled(self, mock_input, mock_fsm, mock_client, mock_validate, capsys):
-        """Test canceling store deletion."""
-        mock_validate.return_value = True
+        interface.current_store = mock_store
+        interface.cmd_upload_files()
 
-        mock_fsm_instance = Mock()
-        mock_fsm.return_value = mock_fsm_instance
+        patched_interface.fsm.upload_files_from_directory.assert_called_once()
 
-        interface = ChatInterface()
-        interface.cmd_delete_store('store-123')
+    def test_cmd_upload_files_no_store(self, interface, capsys):
+        """Test uploading files without selected store."""
+        interface.current_store = None
+        interface.cmd_upload_files()
 
         captured = capsys.readouterr()
-        assert 'cancelled' in captured.out
-        mock_fsm_instance.delete_store.assert_not_called()
+        assert 'No store selected' in captured.out
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input', return_value='yes')
-    def test_cmd_delete_current_store(self, mock_input, mock_fsm, mock_client, mock_validate):
-        """Test deleting the currently selected store."""
-        mock_validate.return_value = True
 
-        mock_store = Mock()
-        mock_store.name = 'store-123'
+class TestCmdUploadBatch:
+    """Test cases for cmd_upload_batch and cmd_batch_status methods."""
 
-        mock_fsm_instance = Mock()
-        mock_fsm_instance.delete_store.return_value = True
-        mock_fsm.return_value = mock_fsm_instance
+    def test_cmd_upload_batch_lists_operations(self, interface, patched_interface, capsys):
+        """Test that submitted operation names are displayed."""
+        mock_store = SimpleNamespace(name='store-123')
 
-        mock_client_instance = Mock()
-        mock_client.return_value = mock_client_instance
+        patched_interface.fsm.upload_files_batch.return_value = ['operations/op-1']
 
-        interface = ChatInterface()
         interface.current_store = mock_store
-        interface.cmd_delete_store('store-123')
-
-        assert interface.current_store is None
-        mock_client_instance.set_file_search_stores.assert_called_once_with([])
-
-
-class TestCmdUploadFiles:
-    """Test cases for cmd_upload_files method."""
+        interface.handle_command('/upload-batch')
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_upload_files_success(self, mock_fsm, mock_client, mock_validate):
-        """Test uploading files successfully."""
-        mock_validate.return_value = True
-
-        mock_store = Mock()
-        mock_store.name = 'store-123'
-
-        mock_fsm_instance = Mock()
-        mock_fsm_instance.upload_files_from_directory.return_value = 3
-        mock_fsm.return_value = mock_fsm_instance
+        captured = capsys.readouterr()
+        assert 'operations/op-1' in captured.out
+        patched_interface.fsm.invalidate.assert_called_once()
 
-        interface = ChatInterface()
-        interface.current_store = mock_store
-        interface.cmd_upload_files()
+    def test_cmd_upload_batch_no_store(self, interface, capsys):
+        """Test batch upload without selected store."""
+        interface.cmd_upload_batch()
 
-        mock_fsm_instance.upload_files_from_directory.assert_called_once()
+        captured = capsys.readouterr()
+        assert 'No store selected' in captured.out
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_upload_files_no_store(self, mock_fsm, mock_client, mock_validate, capsys):
-        """Test uploading files without selected store."""
-        mock_validate.return_value = True
+    def test_cmd_batch_status(self, interface, patched_interface, capsys):
+        """Test showing the status of a finished upload."""
+        patched_interface.fsm.get_upload_operation.return_value = SimpleNamespace(done=True, error=None)
 
-        interface = ChatInterface()
-        interface.current_store = None
-        interface.cmd_upload_files()
+        interface.handle_command('/batch-status operations/op-1')
 
         captured = capsys.readouterr()
-        assert 'No store selected' in captured.out
+        assert 'operations/op-1: DONE' in captured.out
+        patched_interface.fsm.get_upload_operation.assert_called_once_with('operations/op-1')
 
 
 class TestCmdStartChat:
     """Test cases for cmd_start_chat method."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_start_chat_new(self, mock_fsm, mock_client, mock_validate):
+    def test_cmd_start_chat_new(self, interface, patched_interface):
         """Test starting a new chat session."""
-        mock_validate.return_value = True
-
-        mock_client_instance = Mock()
-        mock_client_instance.chat = None
-        mock_client_instance.start_chat.return_value = True
-        mock_client.return_value = mock_client_instance
-
-        interface = ChatInterface()
         interface.cmd_start_chat()
 
-        mock_client_instance.start_chat.assert_called_once()
+        patched_interface.client.start_chat.assert_called_once()
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input', return_value='n')
-    def test_cmd_start_chat_existing_cancelled(self, mock_input, mock_fsm, mock_client, mock_validate):
+    def test_cmd_start_chat_existing_cancelled(self, interface, patched_interface, scripted_input):
         """Test canceling restart of existing chat session."""
-        mock_validate.return_value = True
+        scripted_input('n')
 
-        mock_client_instance = Mock()
-        mock_client_instance.chat = Mock()
-        mock_client.return_value = mock_client_instance
+        patched_interface.client.chat = Mock()
 
-        interface = ChatInterface()
         interface.cmd_start_chat()
 
-        mock_client_instance.start_chat.assert_not_called()
+        patched_interface.client.start_chat.assert_not_called()
 
 
 class TestCmdExportChat:
     """Test cases for cmd_export_chat method."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_export_chat_no_history(self, mock_fsm, mock_client, mock_validate, capsys):
+    def test_cmd_export_chat_no_history(self, interface, patched_interface, capsys):
         """Test exporting chat with no history."""
-        mock_validate.return_value = True
-
-        mock_client_instance = Mock()
-        mock_client_instance.get_chat_history.return_value = []
-        mock_client.return_value = mock_client_instance
+        patched_interface.client.get_chat_history.return_value = []
 
-        interface = ChatInterface()
         interface.cmd_export_chat('')
 
         captured = capsys.readouterr()
         assert 'No chat history' in captured.out
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('pathlib.Path.mkdir')
-    def test_cmd_export_chat_success(self, mock_mkdir, mock_file, mock_fsm, mock_client, mock_validate):
+    def test_cmd_export_chat_success(self, interface, patched_interface, fake_open, export_dir):
         """Test exporting chat successfully."""
-        mock_validate.return_value = True
-
         # Create mock messages
-        mock_message = Mock()
-        mock_message.role = 'user'
-        mock_part = Mock()
-        mock_part.text = 'Test message'
-        mock_message.parts = [mock_part]
-        mock_message.candidates = []
+        mock_message = make_message('user', 'Test message')
 
-        mock_client_instance = Mock()
-        mock_client_instance.get_chat_history.return_value = [mock_message]
-        mock_client.return_value = mock_client_instance
+        patched_interface.client.get_chat_history.return_value = [mock_message]
 
-        interface = ChatInterface()
         interface.cmd_export_chat('test_export')
 
-        mock_file.assert_called_once()
-        # Check that the file was opened for writing
-        call_args = mock_file.call_args
-        assert 'test_export.md' in str(call_args[0][0])
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('pathlib.Path.mkdir')
-    def test_cmd_export_chat_auto_timestamp(self, mock_mkdir, mock_file, mock_fsm, mock_client, mock_validate):
-        """Test exporting chat with auto-generated timestamp filename."""
-        mock_validate.return_value = True
+        [(path, written)] = fake_open.items()
+        assert path.endswith('test_export.md')
+        assert '## You\n\nTest message' in written.getvalue()
 
-        mock_message = Mock()
-        mock_message.role = 'user'
-        mock_part = Mock()
-        mock_part.text = 'Test'
-        mock_message.parts = [mock_part]
-        mock_message.candidates = []
+    def test_cmd_export_chat_auto_timestamp(self, interface, patched_interface, fake_open, export_dir,
+                                            frozen_now):
+        """Test exporting chat with auto-generated timestamp filename."""
+        mock_message = make_message('user', 'Test')
 
-        mock_client_instance = Mock()
-        mock_client_instance.get_chat_history.return_value = [mock_message]
-        mock_client.return_value = mock_client_instance
+        patched_interface.client.get_chat_history.return_value = [mock_message]
 
-        interface = ChatInterface()
         interface.cmd_export_chat('')
 
-        mock_file.assert_called_once()
-        call_args = mock_file.call_args
-        assert 'chat_export_' in str(call_args[0][0])
+        [path] = fake_open
+        assert path.endswith('chat_export_20240101_000000.md')
+
+    def test_cmd_export_chat_writes_markdown(self, interface, patched_interface, export_dir):
+        """Test that the exported file contains the rendered conversation."""
+        mock_user = make_message('user', 'Hello')
+        mock_model = make_message('model', 'Hi there')
+
+        patched_interface.client.get_chat_history.return_value = [mock_user, mock_model]
+
+        interface.cmd_export_chat('conversation')
+
+        content = (export_dir / 'conversation.md').read_text(encoding='utf-8')
+        assert content.startswith('# Gemini Chat Conversation Export')
+        assert '## You\n\nHello' in content
+        assert '## Assistant\n\nHi there' in content
 
 
 class TestFormatCitationsMarkdown:
     """Test cases for _format_citations_markdown method."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_format_citations_with_search_queries(self, mock_fsm, mock_client, mock_validate):
+    def test_format_citations_with_search_queries(self, interface):
         """Test formatting citations with search queries."""
-        mock_validate.return_value = True
-
-        mock_grounding = Mock()
-        mock_search = Mock()
-        mock_search.rendered_content = 'query text'
-        mock_grounding.search_entry_point = mock_search
-        mock_grounding.grounding_chunks = []
-        mock_grounding.grounding_supports = []
+        mock_grounding = make_grounding(query='query text')
 
-        interface = ChatInterface()
         result = interface._format_citations_markdown(mock_grounding)
 
         assert 'Citations' in result
         assert 'query text' in result
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_format_citations_with_web_chunks(self, mock_fsm, mock_client, mock_validate):
+    def test_format_citations_with_web_chunks(self, interface):
         """Test formatting citations with web chunks."""
-        mock_validate.return_value = True
-
-        mock_chunk = Mock()
-        mock_web = Mock()
-        mock_web.title = 'Web Page'
-        mock_web.uri = 'https://example.com'
-        mock_chunk.web = mock_web
-        mock_chunk.retrieved_context = None
+        mock_web = SimpleNamespace(title='Web Page', uri='https://example.com')
+        mock_chunk = SimpleNamespace(web=mock_web, retrieved_context=None)
 
-        mock_grounding = Mock()
-        mock_grounding.search_entry_point = None
-        mock_grounding.grounding_chunks = [mock_chunk]
-        mock_grounding.grounding_supports = []
+        mock_grounding = make_grounding([mock_chunk])
 
-        interface = ChatInterface()
         result = interface._format_citations_markdown(mock_grounding)
 
         assert 'Web Page' in result
         assert 'https://example.com' in result
 
+    def test_format_citations_with_partial_web_chunk(self, interface):
+        """Test formatting a web chunk that has no title or URI."""
+        mock_chunk = SimpleNamespace(web=SimpleNamespace(), retrieved_context=None)
 
-class TestShowHelp:
-    """Test cases for show_help method."""
+        mock_grounding = make_grounding([mock_chunk])
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_show_help_displays_commands(self, mock_fsm, mock_client, mock_validate, capsys):
-        """Test that help displays all available commands."""
-        mock_validate.return_value = True
+        result = interface._format_citations_markdown(mock_grounding)
 
-        interface = ChatInterface()
-        interface.show_help()
+        assert '**Web:** N/A' in result
+        assert 'URI:' not in result
 
-        captured = capsys.readouterr()
-        assert 'AVAILABLE COMMANDS' in captured.out
-        assert '/create' in captured.out
-        assert '/list' in captured.out
-        assert '/select' in captured.out
-        assert '/delete' in captured.out
-        assert '/upload' in captured.out
-        assert '/store' in captured.out
-        assert '/start' in captured.out
-        assert '/reset' in captured.out
-        assert '/history' in captured.out
-        assert '/export' in captured.out
-        assert '/help' in captured.out
-        assert '/quit' in captured.out
+
+def test_show_help_displays_commands(interface, capsys):
+    """Test that help displays all available commands."""
+    interface.show_help()
+
+    captured = capsys.readouterr()
+    assert 'AVAILABLE COMMANDS' in captured.out
+    assert set(_COMMAND_PATTERN.findall(captured.out)) >= {
+        'create', 'list', 'refresh', 'select', 'delete', 'upload',
+        'upload-batch', 'batch-status', 'store', 'start', 'reset',
+        'history', 'export', 'help', 'quit', 'exit',
+    }
 
 
 class TestCmdStoreInfo:
     """Test cases for cmd_store_info method."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_store_info_no_store(self, mock_fsm, mock_client, mock_validate, capsys):
+    def test_cmd_store_info_no_store(self, interface, capsys):
         """Test store info when no store is selected."""
-        mock_validate.return_value = True
-
-        interface = ChatInterface()
         interface.current_store = None
         interface.cmd_store_info()
 
         captured = capsys.readouterr()
         assert 'No store currently selected' in captured.out
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_store_info_with_store(self, mock_fsm, mock_client, mock_validate, capsys):
+    def test_cmd_store_info_with_store(self, interface, capsys):
         """Test store info when store is selected."""
-        mock_validate.return_value = True
-
-        mock_store = Mock()
-        mock_store.name = 'store-123'
-        mock_store.display_name = 'Test Store'
-        mock_store.create_time = '2024-01-01T00:00:00Z'
+        mock_store = SimpleNamespace(
+            name='store-123',
+            display_name='Test Store',
+            create_time='2024-01-01T00:00:00Z'
+        )
 
-        interface = ChatInterface()
         interface.current_store = mock_store
         interface.cmd_store_info()
 
@@ -692,222 +443,138 @@ class TestCmdStoreInfo:
 class TestCmdResetChat:
     """Test cases for cmd_reset_chat method."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_reset_chat_no_session(self, mock_fsm, mock_client, mock_validate, capsys):
+    def test_cmd_reset_chat_no_session(self, interface, patched_interface, capsys):
         """Test reset chat when no session exists."""
-        mock_validate.return_value = True
-
-        mock_client_instance = Mock()
-        mock_client_instance.chat = None
-        mock_client.return_value = mock_client_instance
+        patched_interface.client.chat = None
 
-        interface = ChatInterface()
         interface.cmd_reset_chat()
 
         captured = capsys.readouterr()
         assert 'No active chat session' in captured.out
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_reset_chat_with_session(self, mock_fsm, mock_client, mock_validate):
+    def test_cmd_reset_chat_with_session(self, interface, patched_interface):
         """Test reset chat when session exists."""
-        mock_validate.return_value = True
-
-        mock_client_instance = Mock()
         mock_chat = Mock()
-        mock_client_instance.chat = mock_chat
-        mock_client.return_value = mock_client_instance
+        patched_interface.client.chat = mock_chat
 
-        interface = ChatInterface()
         interface.cmd_reset_chat()
 
-        mock_client_instance.reset_chat.assert_called_once()
-
-
-class TestCmdShowHistory:
-    """Test cases for cmd_show_history method."""
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_show_history_empty(self, mock_fsm, mock_client, mock_validate, capsys):
-        """Test show history when history is empty."""
-        mock_validate.return_value = True
-
-        mock_client_instance = Mock()
-        mock_client_instance.get_chat_history.return_value = []
-        mock_client.return_value = mock_client_instance
-
-        interface = ChatInterface()
-        interface.cmd_show_history()
-
-        captured = capsys.readouterr()
-        assert 'No chat history available' in captured.out
+        patched_interface.client.reset_chat.assert_called_once()
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_show_history_with_messages(self, mock_fsm, mock_client, mock_validate, capsys):
-        """Test show history with messages."""
-        mock_validate.return_value = True
 
-        # Create mock messages
-        mock_message1 = Mock()
-        mock_message1.role = 'user'
-        mock_part1 = Mock()
-        mock_part1.text = 'Hello'
-        mock_message1.parts = [mock_part1]
-
-        mock_message2 = Mock()
-        mock_message2.role = 'model'
-        mock_part2 = Mock()
-        mock_part2.text = 'Hi there'
-        mock_message2.parts = [mock_part2]
-
-        mock_client_instance = Mock()
-        mock_client_instance.get_chat_history.return_value = [mock_message1, mock_message2]
-        mock_client.return_value = mock_client_instance
+class TestIterTextParts:
+    """Test cases for the _iter_text_parts helper."""
 
-        interface = ChatInterface()
-        interface.cmd_show_history()
+    def test_skips_empty_and_missing_text(self):
+        """Test that only non-empty text parts are yielded."""
+        user = SimpleNamespace(role='user', parts=[SimpleNamespace(text='Hi'), SimpleNamespace(text='')])
+        model = SimpleNamespace(role='model', parts=None)
+        tool = SimpleNamespace(role='model', parts=[object(), SimpleNamespace(text='Answer')])
 
-        captured = capsys.readouterr()
-        assert 'CHAT HISTORY' in captured.out
-        assert 'USER:' in captured.out.upper()
-        assert 'MODEL:' in captured.out.upper()
-        assert 'Hello' in captured.out
-        assert 'Hi there' in captured.out
+        result = list(_iter_text_parts([user, model, tool]))
 
+        assert result == [('USER', 'Hi', user), ('MODEL', 'Answer', tool)]
 
-class TestCmdListStores:
-    """Test cases for cmd_list_stores method."""
+    def test_joins_streamed_chunks_into_one_turn(self):
+        """Test that consecutive messages from one role form a single turn."""
+        user = SimpleNamespace(role='user', parts=[SimpleNamespace(text='Hi')])
+        chunk1 = SimpleNamespace(role='model', parts=[SimpleNamespace(text='Hel')])
+        chunk2 = SimpleNamespace(role='model', parts=[SimpleNamespace(text='lo')])
+        follow_up = SimpleNamespace(role='user', parts=[SimpleNamespace(text='Thanks')])
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_cmd_list_stores_calls_display(self, mock_fsm, mock_client, mock_validate):
-        """Test that list stores calls display_stores_summary."""
-        mock_validate.return_value = True
-
-        mock_fsm_instance = Mock()
-        mock_fsm.return_value = mock_fsm_instance
+        result = list(_iter_text_parts([user, chunk1, chunk2, follow_up]))
 
-        interface = ChatInterface()
-        interface.cmd_list_stores()
+        assert result == [
+            ('USER', 'Hi', user),
+            ('MODEL', 'Hello', chunk2),
+            ('USER', 'Thanks', follow_up),
+        ]
 
-        mock_fsm_instance.display_stores_summary.assert_called_once()
 
+@pytest.fixture(params=[
+    [],
+    [('user', 'Hello')],
+    [('model', 'Hi there')],
+    [('user', 'Hello'), ('model', 'Hi there')],
+], ids=['empty', 'user-only', 'model-only', 'both'])
+def history(request):
+    """Chat history variants built from (role, text) pairs."""
+    return [make_message(role, text) for role, text in request.param]
 
-class TestMainMenuLoop:
-    """Test cases for main_menu loop handling."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input')
-    def test_main_menu_empty_input(self, mock_input, mock_fsm, mock_client, mock_validate):
-        """Test that empty input is handled correctly."""
-        mock_validate.return_value = True
+def test_cmd_show_history(interface, patched_interface, history, capsys):
+    """Test show history prints every message, or a notice when there are none."""
+    patched_interface.client.get_chat_history.return_value = history
 
-        # First call returns empty string, second call triggers exit
-        mock_input.side_effect = ['', '/quit']
+    interface.cmd_show_history()
 
-        interface = ChatInterface()
-        interface.is_running = True
-        interface.main_menu()
+    out = capsys.readouterr().out
+    if not history:
+        assert 'No chat history available' in out
+        return
+    assert 'CHAT HISTORY' in out
+    for message in history:
+        assert f"\n{message.role.upper()}: {message.parts[0].text}" in out
 
-        assert interface.is_running is False
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input')
-    def test_main_menu_keyboard_interrupt(self, mock_input, mock_fsm, mock_client, mock_validate, capsys):
-        """Test that KeyboardInterrupt is handled gracefully."""
-        mock_validate.return_value = True
-        mock_input.side_effect = KeyboardInterrupt()
+class TestCmdListStores:
+    """Test cases for cmd_list_stores method."""
 
-        interface = ChatInterface()
-        interface.is_running = True
-        interface.main_menu()
+    def test_cmd_list_stores_calls_display(self, interface, patched_interface):
+        """Test that list stores calls display_stores_summary."""
+        interface.cmd_list_stores()
 
-        captured = capsys.readouterr()
-        assert 'Interrupted by user' in captured.out
-        assert interface.is_running is False
+        patched_interface.fsm.display_stores_summary.assert_called_once()
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input')
-    def test_main_menu_exception_handling(self, mock_input, mock_fsm, mock_client, mock_validate, capsys):
-        """Test that exceptions are handled gracefully."""
-        mock_validate.return_value = True
+    def test_cmd_refresh_invalidates_before_listing(self, interface, patched_interface):
+        """Test that /refresh drops cached stores and lists again."""
+        interface.handle_command('/refresh')
 
-        # First input raises exception, second quits
-        mock_input.side_effect = [ValueError('Test error'), '/quit']
+        assert patched_interface.fsm.method_calls == [
+            call.invalidate(),
+            call.display_stores_summary()
+        ]
 
-        interface = ChatInterface()
-        interface.is_running = True
 
-        # Mock handle_command to raise an error
-        original_handle = interface.handle_command
-        def handle_with_error(cmd):
-            if cmd != '/quit':
-                raise ValueError('Test error')
-            original_handle(cmd)
+@pytest.mark.parametrize('responses, expected', [
+    (('', '/quit'), None),
+    ((KeyboardInterrupt(),), 'Interrupted by user'),
+    ((ValueError('Test error'), '/quit'), 'Error: Test error'),
+], ids=['empty-input', 'keyboard-interrupt', 'exception'])
+def test_main_menu(interface, scripted_input, capsys, responses, expected):
+    """Test that the loop skips blank input, survives errors and stops cleanly."""
+    scripted_input(*responses)
 
-        interface.handle_command = handle_with_error
-        interface.main_menu()
+    interface.is_running = True
+    interface.main_menu()
 
-        captured = capsys.readouterr()
-        assert 'Error:' in captured.out
+    out = capsys.readouterr().out
+    if expected:
+        assert expected in out
+    assert 'Goodbye!' in out
+    assert interface.is_running is False
 
 
 class TestFormatCitationsMarkdownComplete:
     """Additional tests for _format_citations_markdown method."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_format_citations_with_file_search_chunks(self, mock_fsm, mock_client, mock_validate):
+    def test_format_citations_with_file_search_chunks(self, interface):
         """Test formatting citations with file search chunks."""
-        mock_validate.return_value = True
-
-        mock_chunk = Mock()
-        mock_chunk.web = None
-        mock_retrieved = Mock()
-        mock_retrieved.uri = 'document.pdf'
-        mock_retrieved.title = 'Test Document'
-        mock_chunk.retrieved_context = mock_retrieved
+        mock_retrieved = SimpleNamespace(uri='document.pdf', title='Test Document')
+        mock_chunk = SimpleNamespace(web=None, retrieved_context=mock_retrieved)
 
-        mock_grounding = Mock()
-        mock_grounding.search_entry_point = None
-        mock_grounding.grounding_chunks = [mock_chunk]
-        mock_grounding.grounding_supports = []
+        mock_grounding = make_grounding([mock_chunk])
 
-        interface = ChatInterface()
         result = interface._format_citations_markdown(mock_grounding)
 
         assert 'Citations' in result
         assert 'document.pdf' in result
         assert 'Test Document' in result
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    def test_format_citations_with_grounding_supports(self, mock_fsm, mock_client, mock_validate):
+    def test_format_citations_with_grounding_supports(self, interface):
         """Test formatting citations with grounding supports."""
-        mock_validate.return_value = True
-
-        mock_grounding = Mock()
-        mock_grounding.search_entry_point = None
-        mock_grounding.grounding_chunks = []
-        mock_grounding.grounding_supports = [Mock(), Mock()]
+        mock_grounding = make_grounding(supports=2)
 
-        interface = ChatInterface()
         result = interface._format_citations_markdown(mock_grounding)
 
         assert '2 segment(s) grounded' in result
@@ -916,58 +583,22 @@ class TestFormatCitationsMarkdownComplete:
 class TestExportChatEdgeCases:
     """Additional edge case tests for export chat."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('pathlib.Path.mkdir')
-    def test_cmd_export_chat_with_md_extension(self, mock_mkdir, mock_file, mock_fsm, mock_client, mock_validate):
+    def test_cmd_export_chat_with_md_extension(self, interface, patched_interface, export_dir):
         """Test exporting chat with .md extension already included."""
-        mock_validate.return_value = True
-
-        mock_message = Mock()
-        mock_message.role = 'user'
-        mock_part = Mock()
-        mock_part.text = 'Test'
-        mock_message.parts = [mock_part]
-        mock_message.candidates = []
+        patched_interface.client.get_chat_history.return_value = [make_message('user', 'Test')]
 
-        mock_client_instance = Mock()
-        mock_client_instance.get_chat_history.return_value = [mock_message]
-        mock_client.return_value = mock_client_instance
-
-        interface = ChatInterface()
         interface.cmd_export_chat('test.md')
 
-        mock_file.assert_called_once()
-        call_args = mock_file.call_args
         # Should not add .md twice
-        assert str(call_args[0][0]).endswith('.md')
-        assert not str(call_args[0][0]).endswith('.md.md')
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.open')
-    @patch('pathlib.Path.mkdir')
-    def test_cmd_export_chat_write_error(self, mock_mkdir, mock_file, mock_fsm, mock_client, mock_validate, capsys):
-        """Test export chat when file write fails."""
-        mock_validate.return_value = True
+        assert [path.name for path in export_dir.iterdir()] == ['test.md']
 
-        mock_message = Mock()
-        mock_message.role = 'user'
-        mock_part = Mock()
-        mock_part.text = 'Test'
-        mock_message.parts = [mock_part]
-
-        mock_client_instance = Mock()
-        mock_client_instance.get_chat_history.return_value = [mock_message]
-        mock_client.return_value = mock_client_instance
+    def test_cmd_export_chat_write_error(self, interface, patched_interface, export_dir, capsys):
+        """Test export chat when file write fails."""
+        patched_interface.client.get_chat_history.return_value = [make_message('user', 'Test')]
 
-        # Make file open raise an error
-        mock_file.side_effect = IOError('Write failed')
+        # A directory in the way of the export file makes open() fail
+        (export_dir / 'test.md').mkdir(parents=True)
 
-        interface = ChatInterface()
         interface.cmd_export_chat('test')
 
         captured = capsys.readouterr()
@@ -977,15 +608,9 @@ class TestExportChatEdgeCases:
 class TestChatInterfaceIntegration:
     """Integration tests for ChatInterface."""
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input')
-    def test_command_parsing(self, mock_input, mock_fsm, mock_client, mock_validate):
+    def test_command_parsing(self, interface, scripted_input):
         """Test that commands are parsed correctly."""
-        mock_validate.return_value = True
-
-        interface = ChatInterface()
+        scripted_input('n')
 
         # Test command with no arguments
         interface.handle_command('/help')
@@ -996,61 +621,44 @@ class TestChatInterfaceIntegration:
         # Test command with multiple words
         interface.handle_command('/select store-with-long-name')
 
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input', return_value='y')
-    def test_full_workflow_create_select_upload(self, mock_input, mock_fsm, mock_client, mock_validate):
-        """Test complete workflow: create store, select it, upload files."""
-        mock_validate.return_value = True
-
-        # Setup mocks
-        mock_store = Mock()
-        mock_store.name = 'store-123'
-
-        mock_fsm_instance = Mock()
-        mock_fsm_instance.create_store.return_value = mock_store
-        mock_fsm_instance.upload_files_from_directory.return_value = 3
-        mock_fsm.return_value = mock_fsm_instance
-
-        mock_client_instance = Mock()
-        mock_client.return_value = mock_client_instance
-
-        interface = ChatInterface()
+    @patch('src.chat_interface.Config.STREAM_RESPONSES', False)
+    def test_full_workflow(self, interface, patched_interface, scripted_input, fake_open, export_dir):
+        """Test create, upload, chat, export and delete against one interface."""
+        scripted_input('y', 'yes')
+
+        client, fsm = patched_interface.client, patched_interface.fsm
+        mock_store = SimpleNamespace(name='store-123')
+        fsm.create_store.return_value = mock_store
+        fsm.upload_files_from_directory.return_value = 3
+        fsm.delete_store.return_value = True
+        client.get_chat_history.return_value = [
+            make_message('user', 'Hello'),
+            make_message('model', 'Response'),
+        ]
 
         # Create and select store
         interface.cmd_create_store('test-store')
         assert interface.current_store == mock_store
+        client.set_file_search_stores.assert_called_with(['store-123'])
 
         # Upload files
         interface.cmd_upload_files()
-        mock_fsm_instance.upload_files_from_directory.assert_called_once()
-
-    @patch('src.chat_interface.Config.validate')
-    @patch('src.chat_interface.GeminiChatClient')
-    @patch('src.chat_interface.FileSearchManager')
-    @patch('builtins.input', return_value='yes')
-    def test_full_workflow_with_delete(self, mock_input, mock_fsm, mock_client, mock_validate):
-        """Test complete workflow including store deletion."""
-        mock_validate.return_value = True
-
-        mock_store = Mock()
-        mock_store.name = 'store-123'
-
-        mock_fsm_instance = Mock()
-        mock_fsm_instance.create_store.return_value = mock_store
-        mock_fsm_instance.get_store.return_value = mock_store
-        mock_fsm_instance.delete_store.return_value = True
-        mock_fsm.return_value = mock_fsm_instance
+        fsm.upload_files_from_directory.assert_called_once()
 
-        mock_client_instance = Mock()
-        mock_client.return_value = mock_client_instance
-
-        interface = ChatInterface()
+        # Start chat and send a message
+        interface.cmd_start_chat()
+        client.start_chat.assert_called_once()
+        client.chat = Mock()
+        interface.handle_chat_message('Hello')
+        client.send_message.assert_called_once_with('Hello')
 
-        # Select and delete store
-        interface.cmd_select_store('store-123')
-        assert interface.current_store == mock_store
+        # Export the conversation
+        interface.cmd_export_chat('test')
+        [written] = fake_open.values()
+        assert '## Assistant\n\nResponse' in written.getvalue()
 
+        # Delete the selected store, which also deselects it
         interface.cmd_delete_store('store-123')
+        fsm.delete_store.assert_called_once_with('store-123')
         assert interface.current_store is None
+        client.set_file_search_stores.assert_called_with([])
@@ -1,10 +1,8 @@
 """Tests for the Config module."""
 
-import os
 import pytest
 from pathlib import Path
-from unittest.mock import patch, MagicMock
-from src.config import Config
+from src.config import Config, _env_number
 
 
 class TestConfig:
@@ -36,6 +34,11 @@ class TestConfig:
         """Test that FILE_SEARCH_STORE_PREFIX has correct default."""
         assert Config.FILE_SEARCH_STORE_PREFIX == 'file-search-chat'
 
+    def test_rpm_is_non_negative_int(self):
+        """Test that RPM is an integer rate (0 disables limiting)."""
+        assert isinstance(Config.RPM, int)
+        assert Config.RPM >= 0
+
     def test_system_instruction_not_empty(self):
         """Test that SYSTEM_INSTRUCTION is not empty."""
         assert Config.SYSTEM_INSTRUCTION
@@ -46,46 +49,37 @@ class TestConfig:
         """Test that FILES_DIR is a Path object."""
         assert isinstance(Config.FILES_DIR, Path)
 
-    @patch.dict(os.environ, {'GEMINI_API_KEY': 'test-api-key-123'})
-    def test_validate_with_api_key(self):
+    def test_upload_extensions_is_tuple(self):
+        """Test that UPLOAD_EXTENSIONS is a tuple of extension strings."""
+        assert isinstance(Config.UPLOAD_EXTENSIONS, tuple)
+        assert all(isinstance(ext, str) and ext for ext in Config.UPLOAD_EXTENSIONS)
+
+    def test_export_dir_is_path(self):
+        """Test that EXPORT_DIR is a Path object."""
+        assert isinstance(Config.EXPORT_DIR, Path)
+
+    def test_validate_with_api_key(self, monkeypatch):
         """Test validation succeeds when API key is present."""
-        # Temporarily set the API key
-        original_key = Config.GEMINI_API_KEY
-        Config.GEMINI_API_KEY = 'test-api-key-123'
+        monkeypatch.setattr(Config, 'GEMINI_API_KEY', 'test-api-key-123')
 
-        try:
-            result = Config.validate()
-            assert result is True
-        finally:
-            Config.GEMINI_API_KEY = original_key
+        assert Config.validate() is True
 
-    def test_validate_without_api_key(self):
+    def test_validate_without_api_key(self, monkeypatch):
         """Test validation fails when API key is missing."""
-        # Temporarily remove the API key
-        original_key = Config.GEMINI_API_KEY
-        Config.GEMINI_API_KEY = None
-
-        try:
-            with pytest.raises(ValueError, match="GEMINI_API_KEY not found"):
-                Config.validate()
-        finally:
-            Config.GEMINI_API_KEY = original_key
-
-    @patch.dict(os.environ, {'GEMINI_API_KEY': 'test-api-key-123'})
-    def test_validate_creates_files_directory(self, tmp_path):
+        monkeypatch.setattr(Config, 'GEMINI_API_KEY', None)
+
+        with pytest.raises(ValueError, match="GEMINI_API_KEY not found"):
+            Config.validate()
+
+    def test_validate_creates_files_directory(self, monkeypatch, tmp_path):
         """Test that validate creates FILES_DIR if it doesn't exist."""
-        # Temporarily set FILES_DIR to a non-existent path
-        original_dir = Config.FILES_DIR
         test_dir = tmp_path / 'test_files'
-        Config.FILES_DIR = test_dir
-        Config.GEMINI_API_KEY = 'test-api-key-123'
+        monkeypatch.setattr(Config, 'FILES_DIR', test_dir)
+        monkeypatch.setattr(Config, 'GEMINI_API_KEY', 'test-api-key-123')
 
-        try:
-            assert not test_dir.exists()
-            Config.validate()
-            assert test_dir.exists()
-        finally:
-            Config.FILES_DIR = original_dir
+        assert not test_dir.exists()
+        Config.validate()
+        assert test_dir.exists()
 
     def test_api_key_from_environment(self):
         """Test that API key is loaded from environment."""
@@ -94,29 +88,42 @@ class TestConfig:
         api_key = Config.GEMINI_API_KEY
         assert api_key is None or isinstance(api_key, str)
 
+    def test_env_number_parses_valid_values(self, monkeypatch):
+        """Test that numeric settings are read from the environment."""
+        monkeypatch.setenv('GEMINI_RPM', '30')
+        monkeypatch.setenv('GEMINI_SEMANTIC_CACHE_THRESHOLD', '0.9')
+        assert _env_number('GEMINI_RPM', 60) == 30
+        assert _env_number('GEMINI_SEMANTIC_CACHE_THRESHOLD', 0.0, float) == 0.9
+
+    def test_env_number_falls_back_on_malformed_value(self, monkeypatch, capsys):
+        """Test that a malformed numeric setting warns and uses the default."""
+        monkeypatch.setenv('GEMINI_RPM', 'sixty')
+        assert _env_number('GEMINI_RPM', 60) == 60
+        assert "Ignoring invalid GEMINI_RPM='sixty'" in capsys.readouterr().out
+
+    def test_env_number_unset_uses_default(self, monkeypatch, capsys):
+        """Test that an unset or blank numeric setting uses the default silently."""
+        monkeypatch.delenv('GEMINI_RPM', raising=False)
+        assert _env_number('GEMINI_RPM', 60) == 60
+        monkeypatch.setenv('GEMINI_RPM', '  ')
+        assert _env_number('GEMINI_RPM', 60) == 60
+        assert capsys.readouterr().out == ''
+
 
 class TestConfigIntegration:
     """Integration tests for Config class."""
 
-    @patch.dict(os.environ, {'GEMINI_API_KEY': 'test-integration-key'})
-    def test_full_validation_flow(self, tmp_path):
+    def test_full_validation_flow(self, monkeypatch, tmp_path):
         """Test complete validation flow."""
-        original_key = Config.GEMINI_API_KEY
-        original_dir = Config.FILES_DIR
-
         test_dir = tmp_path / 'integration_files'
-        Config.FILES_DIR = test_dir
-        Config.GEMINI_API_KEY = 'test-integration-key'
-
-        try:
-            # Directory should not exist yet
-            assert not test_dir.exists()
-
-            # Validate should succeed and create directory
-            result = Config.validate()
-            assert result is True
-            assert test_dir.exists()
-            assert test_dir.is_dir()
-        finally:
-            Config.GEMINI_API_KEY = original_key
-            Config.FILES_DIR = original_dir
+        monkeypatch.setattr(Config, 'FILES_DIR', test_dir)
+        monkeypatch.setattr(Config, 'GEMINI_API_KEY', 'test-integration-key')
+
+        # Directory should not exist yet
+        assert not test_dir.exists()
+
+        # Validate should succeed and create directory
+        result = Config.validate()
+        assert result is True
+        assert test_dir.exists()
+        assert test_dir.is_dir()
@@ -1,27 +1,39 @@
 """Tests for the FileSearchManager module."""
 
+import asyncio
+import hashlib
+import operator
+import os
 import time
 import pytest
 from pathlib import Path
-from unittest.mock import Mock, MagicMock, patch, call
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, MagicMock, patch, call
+from google import genai
+from google.genai import types
 from google.genai.errors import APIError
-from src.file_search_manager import FileSearchManager
+from src.file_search_manager import FileSearchManager, _hash_file
+from tests.assertions import assert_upload_called
+
+
+@pytest.fixture
+def mock_client():
+    """Mock Gemini client limited to the attributes genai.Client really has."""
+    return Mock(spec=genai.Client)
 
 
 class TestFileSearchManagerInit:
     """Test cases for FileSearchManager initialization."""
 
-    def test_init_with_defaults(self):
+    def test_init_with_defaults(self, mock_client):
         """Test initialization with default parameters."""
-        mock_client = Mock()
         manager = FileSearchManager(mock_client)
 
         assert manager.client == mock_client
         assert manager.store_prefix == 'file-search-chat'
 
-    def test_init_with_custom_prefix(self):
+    def test_init_with_custom_prefix(self, mock_client):
         """Test initialization with custom store prefix."""
-        mock_client = Mock()
         custom_prefix = 'custom-prefix'
         manager = FileSearchManager(mock_client, store_prefix=custom_prefix)
 
@@ -32,9 +44,8 @@ class TestFileSearchManagerInit:
 class TestCreateStore:
     """Test cases for create_store method."""
 
-    def test_create_store_with_display_name(self):
+    def test_create_store_with_display_name(self, mock_client):
         """Test creating a store with custom display name."""
-        mock_client = Mock()
         mock_store = Mock()
         mock_store.name = 'fileSearchStores/abc123'
         mock_client.file_search_stores.create.return_value = mock_store
@@ -47,17 +58,16 @@ class TestCreateStore:
             config={'display_name': 'test-store'}
         )
 
-    def test_create_store_without_display_name(self):
+    def test_create_store_without_display_name(self, mock_client, monkeypatch):
         """Test creating a store without display name (auto-generated)."""
-        mock_client = Mock()
         mock_store = Mock()
         mock_store.name = 'fileSearchStores/xyz789'
         mock_client.file_search_stores.create.return_value = mock_store
 
         manager = FileSearchManager(mock_client)
 
-        with patch('time.time', return_value=1234567890):
-            result = manager.create_store()
+        monkeypatch.setattr('time.time', lambda: 1234567890)
+        result = manager.create_store()
 
         assert result == mock_store
         mock_client.file_search_stores.create.assert_called_once()
@@ -66,9 +76,8 @@ class TestCreateStore:
         assert 'display_name' in call_args[1]['config']
         assert call_args[1]['config']['display_name'] == 'file-search-chat-1234567890'
 
-    def test_create_store_api_error(self):
+    def test_create_store_api_error(self, mock_client):
         """Test creating a store when API returns an error."""
-        mock_client = Mock()
         mock_client.file_search_stores.create.side_effect = APIError(400, {'error': {'message': 'API Error'}})
 
         manager = FileSearchManager(mock_client)
@@ -80,9 +89,8 @@ class TestCreateStore:
 class TestListStores:
     """Test cases for list_stores method."""
 
-    def test_list_stores_success(self):
+    def test_list_stores_success(self, mock_client):
         """Test listing stores successfully."""
-        mock_client = Mock()
         mock_store1 = Mock()
         mock_store1.name = 'store1'
         mock_store2 = Mock()
@@ -96,9 +104,8 @@ class TestListStores:
         assert result[0].name == 'store1'
         assert result[1].name == 'store2'
 
-    def test_list_stores_empty(self):
+    def test_list_stores_empty(self, mock_client):
         """Test listing stores when none exist."""
-        mock_client = Mock()
         mock_client.file_search_stores.list.return_value = []
 
         manager = FileSearchManager(mock_client)
@@ -107,23 +114,12 @@ class TestListStores:
         assert len(result) == 0
         assert result == []
 
-    def test_list_stores_api_error(self):
-        """Test listing stores when API returns an error."""
-        mock_client = Mock()
-        mock_client.file_search_stores.list.side_effect = APIError(500, {'error': {'message': 'API Error'}})
-
-        manager = FileSearchManager(mock_client)
-        result = manager.list_stores()
-
-        assert result == []
-
 
 class TestGetStore:
     """Test cases for get_store method."""
 
-    def test_get_store_success(self):
+    def test_get_store_success(self, mock_client):
         """Test getting a specific store successfully."""
-        mock_client = Mock()
         mock_store = Mock()
         mock_store.name = 'store1'
         mock_client.file_search_stores.get.return_value = mock_store
@@ -134,23 +130,12 @@ class TestGetStore:
         assert result == mock_store
         mock_client.file_search_stores.get.assert_called_once_with(name='store1')
 
-    def test_get_store_not_found(self):
-        """Test getting a store that doesn't exist."""
-        mock_client = Mock()
-        mock_client.file_search_stores.get.side_effect = APIError(404, {'error': {'message': 'Not Found'}})
-
-        manager = FileSearchManager(mock_client)
-        result = manager.get_store('nonexistent')
-
-        assert result is None
-
 
 class TestDeleteStore:
     """Test cases for delete_store method."""
 
-    def test_delete_store_success(self):
+    def test_delete_store_success(self, mock_client):
         """Test deleting a store successfully."""
-        mock_client = Mock()
         manager = FileSearchManager(mock_client)
 
         result = manager.delete_store('store1', force=True)
@@ -161,9 +146,8 @@ class TestDeleteStore:
             config={'force': True}
         )
 
-    def test_delete_store_without_force(self):
+    def test_delete_store_without_force(self, mock_client):
         """Test deleting a store without force flag."""
-        mock_client = Mock()
         manager = FileSearchManager(mock_client)
 
         result = manager.delete_store('store1', force=False)
@@ -174,49 +158,70 @@ class TestDeleteStore:
             config={'force': False}
         )
 
-    def test_delete_store_api_error(self):
-        """Test deleting a store when API returns an error."""
-        mock_client = Mock()
-        mock_client.file_search_stores.delete.side_effect = APIError(500, {'error': {'message': 'Delete Failed'}})
+
+class TestApiErrors:
+    """Test that store operations fall back to a safe value on API errors."""
+
+    @pytest.mark.parametrize('method, args, sdk_method, status, expected', [
+        pytest.param('list_stores', (), 'file_search_stores.list', 500, [], id='list_stores'),
+        pytest.param('get_store', ('nonexistent',), 'file_search_stores.get', 404, None, id='get_store'),
+        pytest.param('delete_store', ('store1',), 'file_search_stores.delete', 500, False, id='delete_store'),
+        pytest.param('list_files_in_store', ('nonexistent',), 'file_search_stores.get', 404, [],
+                     id='list_files_in_store'),
+    ])
+    def test_api_error_returns_fallback(self, mock_client, method, args, sdk_method, status, expected):
+        """Test that an APIError from the SDK is reported rather than raised."""
+        operator.attrgetter(sdk_method)(mock_client).side_effect = APIError(
+            status, {'error': {'message': 'API Error'}}
+        )
 
         manager = FileSearchManager(mock_client)
-        result = manager.delete_store('store1')
+        result = getattr(manager, method)(*args)
 
-        assert result is False
+        assert result == expected
 
 
 class TestUploadFileToStore:
     """Test cases for upload_file_to_store method."""
 
-    def test_upload_file_success(self, tmp_path):
+    def test_upload_file_success(self, mock_client, tmp_path):
         """Test uploading a file successfully."""
         # Create a test file
         test_file = tmp_path / 'test.txt'
         test_file.write_text('test content')
 
-        mock_client = Mock()
         mock_operation = Mock()
         mock_operation.done = False
         mock_client.file_search_stores.upload_to_file_search_store.return_value = mock_operation
-        mock_client.operations.get.return_value = Mock(done=True)
-
-        manager = FileSearchManager(mock_client)
+        mock_client.operations.get.return_value = Mock(done=True, error=None)
 
-        with patch('time.sleep'):  # Speed up test by mocking sleep
-            result = manager.upload_file_to_store(test_file, 'store1')
+        manager = FileSearchManager(mock_client, sleeper=lambda _: None)
+        result = manager.upload_file_to_store(test_file, 'store1')
 
         assert result is True
         mock_client.file_search_stores.upload_to_file_search_store.assert_called_once()
 
-    def test_upload_file_with_custom_display_name(self, tmp_path):
+    @patch('src.file_search_manager.MAX_UPLOAD_BYTES', 4)
+    def test_upload_file_too_large(self, mock_client, tmp_path):
+        """Test that files over the size limit are rejected before uploading."""
+        test_file = tmp_path / 'big.txt'
+        test_file.write_text('too much content')
+
+        manager = FileSearchManager(mock_client)
+
+        result = manager.upload_file_to_store(test_file, 'store1')
+
+        assert result is False
+        mock_client.file_search_stores.upload_to_file_search_store.assert_not_called()
+
+    def test_upload_file_with_custom_display_name(self, mock_client, tmp_path):
         """Test uploading a file with custom display name."""
         test_file = tmp_path / 'test.txt'
         test_file.write_text('test content')
 
-        mock_client = Mock()
-        mock_operation = Mock()
-        mock_operation.done = True
-        mock_client.file_search_stores.upload_to_file_search_store.return_value = mock_operation
+        mock_client.file_search_stores.upload_to_file_search_store.return_value = Mock(
+            done=True, error=None
+        )
 
         manager = FileSearchManager(mock_client)
         result = manager.upload_file_to_store(
@@ -226,12 +231,10 @@ class TestUploadFileToStore:
         )
 
         assert result is True
-        call_args = mock_client.file_search_stores.upload_to_file_search_store.call_args
-        assert call_args[1]['config']['display_name'] == 'custom_name.txt'
+        assert_upload_called(mock_client, 'store1', file=test_file, display_name='custom_name.txt')
 
-    def test_upload_file_not_found(self):
+    def test_upload_file_not_found(self, mock_client):
         """Test uploading a file that doesn't exist."""
-        mock_client = Mock()
         manager = FileSearchManager(mock_client)
 
         result = manager.upload_file_to_store(
@@ -242,12 +245,11 @@ class TestUploadFileToStore:
         assert result is False
         mock_client.file_search_stores.upload_to_file_search_store.assert_not_called()
 
-    def test_upload_file_api_error(self, tmp_path):
+    def test_upload_file_api_error(self, mock_client, tmp_path):
         """Test uploading a file when API returns an error."""
         test_file = tmp_path / 'test.txt'
         test_file.write_text('test content')
 
-        mock_client = Mock()
         mock_client.file_search_stores.upload_to_file_search_store.side_effect = APIError(500, {'error': {'message': 'Upload Failed'}})
 
         manager = FileSearchManager(mock_client)
@@ -255,64 +257,296 @@ class TestUploadFileToStore:
 
         assert result is False
 
-    def test_upload_file_waits_for_completion(self, tmp_path):
-        """Test that upload waits for operation to complete."""
+    def test_upload_file_operation_error(self, mock_client, tmp_path):
+        """Test that an operation that finished with an error counts as a failure."""
         test_file = tmp_path / 'test.txt'
         test_file.write_text('test content')
 
-        mock_client = Mock()
+        mock_client.file_search_stores.upload_to_file_search_store.return_value = Mock(
+            done=True, error={'code': 13, 'message': 'Indexing failed'}
+        )
+
+        manager = FileSearchManager(mock_client)
+        result = manager.upload_file_to_store(test_file, 'store1')
+
+        assert result is False
+
+    def test_upload_file_waits_for_completion(self, mock_client, tmp_path):
+        """Test that upload waits for operation to complete."""
+        test_file = tmp_path / 'test.txt'
+        test_file.write_text('test content')
 
         # Simulate operation completing after 2 checks
         mock_operation1 = Mock(done=False)
         mock_operation2 = Mock(done=False)
-        mock_operation3 = Mock(done=True)
+        mock_operation3 = Mock(done=True, error=None)
 
         mock_client.file_search_stores.upload_to_file_search_store.return_value = mock_operation1
         mock_client.operations.get.side_effect = [mock_operation2, mock_operation3]
 
-        manager = FileSearchManager(mock_client)
-
-        with patch('time.sleep') as mock_sleep:
-            result = manager.upload_file_to_store(test_file, 'store1')
+        mock_sleep = Mock()
+        manager = FileSearchManager(mock_client, sleeper=mock_sleep)
+        result = manager.upload_file_to_store(test_file, 'store1')
 
         assert result is True
         assert mock_sleep.call_count == 2
         assert mock_client.operations.get.call_count == 2
 
+    def test_upload_file_backs_off_between_polls(self, mock_client, tmp_path):
+        """Test that poll delays grow exponentially up to the cap."""
+        test_file = tmp_path / 'test.txt'
+        test_file.write_text('test content')
+
+        mock_client.file_search_stores.upload_to_file_search_store.return_value = Mock(done=False)
+        mock_client.operations.get.side_effect = [Mock(done=False)] * 6 + [Mock(done=True, error=None)]
+
+        mock_sleep = Mock()
+        manager = FileSearchManager(mock_client, sleeper=mock_sleep)
+
+        with patch('src.file_search_manager.random.uniform', return_value=0):
+            manager.upload_file_to_store(test_file, 'store1')
+
+        delays = [c.args[0] for c in mock_sleep.call_args_list]
+        assert delays == [0.25, 0.5, 1.0, 2.0, 4.0, 4.0, 4.0]
+
+    def test_upload_file_times_out(self, mock_client, tmp_path, capsys):
+        """Test that an upload still processing after the timeout is reported as failed."""
+        test_file = tmp_path / 'test.txt'
+        test_file.write_text('test content')
+
+        mock_client.file_search_stores.upload_to_file_search_store.return_value = Mock(done=False)
+        mock_client.operations.get.return_value = Mock(done=False)
+
+        mock_sleep = Mock()
+        manager = FileSearchManager(mock_client, sleeper=mock_sleep)
+
+        with patch('time.monotonic', side_effect=[0.0, 5.0, 11.0]):
+            result = manager.upload_file_to_store(test_file, 'store1', timeout=10)
+
+        assert result is False
+        assert mock_sleep.call_count == 1
+        assert mock_client.operations.get.call_count == 1
+        assert 'did not finish within 10s' in capsys.readouterr().out
+
 
 class TestUploadFilesFromDirectory:
     """Test cases for upload_files_from_directory method."""
 
-    def test_upload_files_from_directory_success(self, tmp_path):
+    def test_upload_files_from_directory_success(self, mock_client, tmp_path):
         """Test uploading multiple files from a directory."""
         # Create test files
         (tmp_path / 'file1.txt').write_text('content1')
         (tmp_path / 'file2.txt').write_text('content2')
         (tmp_path / 'file3.txt').write_text('content3')
 
-        mock_client = Mock()
-        mock_operation = Mock(done=True)
-        mock_client.file_search_stores.upload_to_file_search_store.return_value = mock_operation
+        mock_operation = Mock(done=True, error=None)
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            return_value=mock_operation
+        )
 
         manager = FileSearchManager(mock_client)
         result = manager.upload_files_from_directory(tmp_path, 'store1')
 
         assert result == 3
-        assert mock_client.file_search_stores.upload_to_file_search_store.call_count == 3
+        assert mock_client.aio.file_search_stores.upload_to_file_search_store.call_count == 3
+
+    def test_upload_files_respects_concurrency_limit(self, mock_client, tmp_path):
+        """Test that no more than max_concurrent_uploads uploads run at once."""
+        for i in range(5):
+            (tmp_path / f'file{i}.txt').write_text(f'content{i}')
+
+        in_flight, peak = 0, 0
+
+        async def upload(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return Mock(done=True, error=None)
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            side_effect=upload
+        )
+
+        manager = FileSearchManager(mock_client, max_concurrent_uploads=2)
+        result = manager.upload_files_from_directory(tmp_path, 'store1')
+
+        assert result == 5
+        assert peak == 2
+
+    def test_upload_files_completing_out_of_order(self, mock_client, tmp_path):
+        """Test that results map back to the right files when uploads finish out of order."""
+        for name in ('a.txt', 'b.txt', 'c.txt'):
+            (tmp_path / name).write_text(name)
+
+        finished = []
+
+        async def upload(file, **kwargs):
+            name = Path(file).name
+            # Later files finish first
+            for _ in range({'a.txt': 3, 'b.txt': 2, 'c.txt': 1}[name]):
+                await asyncio.sleep(0)
+            finished.append(name)
+            if name == 'b.txt':
+                raise APIError(500, {'error': {'message': 'Upload Failed'}})
+            return Mock(done=True, error=None)
 
-    def test_upload_files_from_empty_directory(self, tmp_path):
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            side_effect=upload
+        )
+
+        manager = FileSearchManager(mock_client)
+        operations = asyncio.run(
+            manager._submit_all([tmp_path / n for n in ('a.txt', 'b.txt', 'c.txt')], 'store1')
+        )
+
+        assert finished == ['c.txt', 'b.txt', 'a.txt']
+        assert [op is not None for op in operations] == [True, False, True]
+
+    def test_uploads_share_one_persistent_loop(self, mock_client, tmp_path):
+        """Test that repeated uploads reuse one open loop for the async client."""
+        (tmp_path / 'file1.txt').write_text('content1')
+        loops = []
+
+        async def upload(**kwargs):
+            loops.append(asyncio.get_running_loop())
+            return Mock(done=True, error=None)
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            side_effect=upload
+        )
+
+        manager = FileSearchManager(mock_client)
+        manager.upload_files_from_directory(tmp_path, 'store1')
+        manager.upload_files_batch(tmp_path, 'store1')
+
+        assert len(loops) == 2
+        assert loops[0] is loops[1]
+        assert not loops[0].is_closed()
+
+    def test_upload_files_from_directory_async(self, mock_client, tmp_path):
+        """Test that the async variant runs inside an existing event loop."""
+        (tmp_path / 'file1.txt').write_text('content1')
+        (tmp_path / 'file2.txt').write_text('content2')
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            return_value=Mock(done=True, error=None)
+        )
+
+        manager = FileSearchManager(mock_client)
+
+        async def caller():
+            return await manager.upload_files_from_directory_async(tmp_path, 'store1')
+
+        assert asyncio.run(caller()) == 2
+        assert mock_client.aio.file_search_stores.upload_to_file_search_store.call_count == 2
+
+    @patch('src.file_search_manager.UPLOAD_TIMEOUT', 0)
+    def test_upload_files_stops_waiting_after_timeout(self, mock_client, tmp_path):
+        """Test that uploads still processing at the timeout count as failures."""
+        (tmp_path / 'slow.txt').write_text('content')
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            return_value=Mock(done=False)
+        )
+        mock_client.aio.operations.get = AsyncMock(return_value=Mock(done=False))
+
+        manager = FileSearchManager(mock_client)
+        result = manager.upload_files_from_directory(tmp_path, 'store1')
+
+        assert result == 0
+        mock_client.aio.operations.get.assert_not_called()
+
+    def test_upload_files_circuit_breaker_trips(self, mock_client, tmp_path, capsys):
+        """Test that uploads stop being started after too many errors in a row."""
+        for i in range(10):
+            (tmp_path / f'file{i}.txt').write_text(f'content{i}')
+
+        upload = mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            side_effect=APIError(503, {'error': {'message': 'Unavailable'}})
+        )
+
+        manager = FileSearchManager(mock_client, max_concurrent_uploads=1, error_threshold=3)
+        result = manager.upload_files_from_directory(tmp_path, 'store1')
+
+        assert result == 0
+        assert upload.call_count == 3
+        assert 'Stopping after 3 consecutive upload errors' in capsys.readouterr().out
+
+    def test_upload_files_success_resets_error_count(self, mock_client, tmp_path):
+        """Test that a successful upload resets the consecutive error count."""
+        for i in range(4):
+            (tmp_path / f'file{i}.txt').write_text(f'content{i}')
+
+        error = APIError(503, {'error': {'message': 'Unavailable'}})
+        upload = mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            side_effect=[error, Mock(done=True, error=None), error, Mock(done=True, error=None)]
+        )
+
+        manager = FileSearchManager(mock_client, max_concurrent_uploads=1, error_threshold=2)
+        result = manager.upload_files_from_directory(tmp_path, 'store1')
+
+        assert result == 2
+        assert upload.call_count == 4
+
+    def test_upload_files_from_directory_accepts_str(self, mock_client, tmp_path):
+        """Test that a plain string directory path is accepted."""
+        (tmp_path / 'file1.txt').write_text('content1')
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            return_value=Mock(done=True, error=None)
+        )
+
+        manager = FileSearchManager(mock_client)
+        result = manager.upload_files_from_directory(str(tmp_path), 'store1')
+
+        assert result == 1
+        assert_upload_called(mock_client, 'store1', file=tmp_path / 'file1.txt', aio=True)
+
+    @patch('src.file_search_manager.MAX_UPLOAD_BYTES', 4)
+    def test_upload_files_skips_oversized_files(self, mock_client, tmp_path):
+        """Test that oversized files are filtered out of a directory upload."""
+        (tmp_path / 'small.txt').write_text('ok')
+        (tmp_path / 'big.txt').write_text('too much content')
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            return_value=Mock(done=True, error=None)
+        )
+
+        manager = FileSearchManager(mock_client)
+        result = manager.upload_files_from_directory(tmp_path, 'store1')
+
+        assert result == 1
+        assert_upload_called(mock_client, 'store1', file=tmp_path / 'small.txt', aio=True)
+
+    def test_upload_files_skips_disallowed_extension(self, mock_client, tmp_path):
+        """Test that files outside the extension allowlist are never uploaded."""
+        (tmp_path / 'notes.MD').write_text('notes')
+        (tmp_path / 'image.png').write_text('not a document')
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            return_value=Mock(done=True, error=None)
+        )
+
+        manager = FileSearchManager(mock_client, allowed_extensions=['md', '.pdf'])
+        result = manager.upload_files_from_directory(tmp_path, 'store1')
+
+        assert manager.allowed_extensions == {'.md', '.pdf'}
+        assert result == 1
+        assert_upload_called(mock_client, 'store1', file=tmp_path / 'notes.MD', aio=True)
+
+    def test_upload_files_from_empty_directory(self, mock_client, tmp_path):
         """Test uploading from an empty directory."""
-        mock_client = Mock()
         manager = FileSearchManager(mock_client)
 
         result = manager.upload_files_from_directory(tmp_path, 'store1')
 
         assert result == 0
-        mock_client.file_search_stores.upload_to_file_search_store.assert_not_called()
+        mock_client.aio.file_search_stores.upload_to_file_search_store.assert_not_called()
 
-    def test_upload_files_directory_not_found(self):
+    def test_upload_files_directory_not_found(self, mock_client):
         """Test uploading from a non-existent directory."""
-        mock_client = Mock()
         manager = FileSearchManager(mock_client)
 
         result = manager.upload_files_from_directory(
@@ -322,28 +556,40 @@ class TestUploadFilesFromDirectory:
 
         assert result == 0
 
-    def test_upload_files_partial_success(self, tmp_path):
+    def test_upload_files_from_file_path(self, mock_client, tmp_path, capsys):
+        """Test that a file passed as the directory is rejected without uploading."""
+        not_a_dir = tmp_path / 'file.txt'
+        not_a_dir.write_text('content')
+
+        manager = FileSearchManager(mock_client)
+        result = manager.upload_files_from_directory(not_a_dir, 'store1')
+
+        assert result == 0
+        assert 'Directory not found or invalid' in capsys.readouterr().out
+        mock_client.aio.file_search_stores.upload_to_file_search_store.assert_not_called()
+
+    def test_upload_files_partial_success(self, mock_client, tmp_path):
         """Test uploading files with some failures."""
         # Create test files
         (tmp_path / 'file1.txt').write_text('content1')
         (tmp_path / 'file2.txt').write_text('content2')
 
-        mock_client = Mock()
-
         # First upload succeeds, second fails
-        mock_operation_success = Mock(done=True)
-        mock_client.file_search_stores.upload_to_file_search_store.side_effect = [
-            mock_operation_success,
-            APIError(500, {'error': {'message': 'Upload Failed'}})
-        ]
+        mock_operation_success = Mock(done=True, error=None)
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            side_effect=[
+                mock_operation_success,
+                APIError(500, {'error': {'message': 'Upload Failed'}})
+            ]
+        )
 
         manager = FileSearchManager(mock_client)
         result = manager.upload_files_from_directory(tmp_path, 'store1')
 
         assert result == 1
-        assert mock_client.file_search_stores.upload_to_file_search_store.call_count == 2
+        assert mock_client.aio.file_search_stores.upload_to_file_search_store.call_count == 2
 
-    def test_upload_files_ignores_subdirectories(self, tmp_path):
+    def test_upload_files_ignores_subdirectories(self, mock_client, tmp_path):
         """Test that subdirectories are ignored during upload."""
         # Create files and a subdirectory
         (tmp_path / 'file1.txt').write_text('content1')
@@ -351,9 +597,10 @@ class TestUploadFilesFromDirectory:
         subdir.mkdir()
         (subdir / 'file2.txt').write_text('content2')
 
-        mock_client = Mock()
-        mock_operation = Mock(done=True)
-        mock_client.file_search_stores.upload_to_file_search_store.return_value = mock_operation
+        mock_operation = Mock(done=True, error=None)
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            return_value=mock_operation
+        )
 
         manager = FileSearchManager(mock_client)
         result = manager.upload_files_from_directory(tmp_path, 'store1')
@@ -361,41 +608,208 @@ class TestUploadFilesFromDirectory:
         # Should only upload the file in the root directory
         assert result == 1
 
+    def test_upload_files_waits_for_pending_operations(self, mock_client, tmp_path):
+        """Test that pending upload operations are polled until done."""
+        (tmp_path / 'file1.txt').write_text('content1')
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            return_value=Mock(done=False)
+        )
+        mock_client.aio.operations.get = AsyncMock(return_value=Mock(done=True, error=None))
+
+        manager = FileSearchManager(mock_client)
+        with patch('src.file_search_manager.asyncio.sleep', AsyncMock()):
+            result = manager.upload_files_from_directory(tmp_path, 'store1')
+
+        assert result == 1
+        mock_client.aio.operations.get.assert_awaited_once()
+
+    def test_upload_files_polls_batch_in_shared_rounds(self, mock_client, tmp_path):
+        """Test that all pending uploads share one sleep per polling round."""
+        for i in range(3):
+            (tmp_path / f'file{i}.txt').write_text('content')
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            side_effect=lambda **kwargs: Mock(done=False)
+        )
+        mock_client.aio.operations.get = AsyncMock(
+            side_effect=[Mock(done=False), Mock(done=True, error=None), Mock(done=True, error=None), Mock(done=True, error=None)]
+        )
+
+        manager = FileSearchManager(mock_client)
+        with patch('src.file_search_manager.asyncio.sleep', AsyncMock()) as mock_sleep:
+            result = manager.upload_files_from_directory(tmp_path, 'store1')
+
+        assert result == 3
+        assert mock_sleep.await_count == 2
+        assert mock_client.aio.operations.get.await_count == 4
+
+    def test_upload_files_poll_error_counts_as_failure(self, mock_client, tmp_path):
+        """Test that an API error while polling fails only that upload."""
+        (tmp_path / 'file1.txt').write_text('content1')
+        (tmp_path / 'file2.txt').write_text('content2')
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            side_effect=lambda **kwargs: Mock(done=False)
+        )
+        mock_client.aio.operations.get = AsyncMock(
+            side_effect=[APIError(500, {'error': {'message': 'Poll Failed'}}), Mock(done=True, error=None)]
+        )
+
+        manager = FileSearchManager(mock_client)
+        with patch('src.file_search_manager.asyncio.sleep', AsyncMock()):
+            result = manager.upload_files_from_directory(tmp_path, 'store1')
+
+        assert result == 1
+
+
+class TestUploadFilesBatch:
+    """Test cases for upload_files_batch and get_upload_operation."""
+
+    def test_upload_files_batch_returns_operation_names(self, mock_client, tmp_path):
+        """Test that batch upload submits files without polling."""
+        (tmp_path / 'file1.txt').write_text('content1')
+
+        mock_operation = Mock(done=False)
+        mock_operation.name = 'operations/op-1'
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            return_value=mock_operation
+        )
+        mock_client.aio.operations.get = AsyncMock()
+
+        manager = FileSearchManager(mock_client)
+        result = manager.upload_files_batch(tmp_path, 'store1')
+
+        assert result == ['operations/op-1']
+        mock_client.aio.operations.get.assert_not_called()
+
+    def test_upload_files_batch_skips_failed_submissions(self, mock_client, tmp_path):
+        """Test that uploads which fail to start are left out."""
+        (tmp_path / 'file1.txt').write_text('content1')
+
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            side_effect=APIError(500, {'error': {'message': 'Upload Failed'}})
+        )
+
+        manager = FileSearchManager(mock_client)
+        result = manager.upload_files_batch(tmp_path, 'store1')
+
+        assert result == []
+
+    def test_get_upload_operation(self, mock_client):
+        """Test fetching an upload operation by name."""
+        mock_operation = Mock(done=True, error=None)
+        mock_client.operations.get.return_value = mock_operation
+
+        manager = FileSearchManager(mock_client)
+        result = manager.get_upload_operation('operations/op-1')
+
+        assert result == mock_operation
+        assert mock_client.operations.get.call_args[0][0].name == 'operations/op-1'
+
+    def test_get_upload_operation_api_error(self, mock_client):
+        """Test fetching an upload operation when API returns an error."""
+        mock_client.operations.get.side_effect = APIError(404, {'error': {'message': 'Not Found'}})
+
+        manager = FileSearchManager(mock_client)
+        result = manager.get_upload_operation('operations/missing')
+
+        assert result is None
+
+
+class TestWaitUntilIndexed:
+    """Test cases for wait_until_indexed method."""
+
+    def test_returns_once_documents_are_active(self, mock_client):
+        """Test that polling stops as soon as the expected count is reached."""
+        mock_client.aio.file_search_stores.get = AsyncMock(side_effect=[
+            Mock(active_documents_count=None),
+            Mock(active_documents_count=1),
+            Mock(active_documents_count=2),
+        ])
+
+        manager = FileSearchManager(mock_client)
+        with patch('src.file_search_manager.asyncio.sleep', AsyncMock()) as mock_sleep:
+            store = asyncio.run(manager.wait_until_indexed('store1', 2))
+
+        assert store.active_documents_count == 2
+        assert mock_client.aio.file_search_stores.get.await_count == 3
+        assert mock_sleep.await_count == 2
+
+    def test_already_indexed_does_not_sleep(self, mock_client):
+        """Test that an up-to-date store returns without waiting."""
+        mock_client.aio.file_search_stores.get = AsyncMock(
+            return_value=Mock(active_documents_count=3)
+        )
+
+        manager = FileSearchManager(mock_client)
+        with patch('src.file_search_manager.asyncio.sleep', AsyncMock()) as mock_sleep:
+            asyncio.run(manager.wait_until_indexed('store1', 3))
+
+        mock_sleep.assert_not_called()
+
+    def test_raises_on_timeout(self, mock_client):
+        """Test that a store that never catches up raises TimeoutError."""
+        mock_client.aio.file_search_stores.get = AsyncMock(
+            return_value=Mock(active_documents_count=0)
+        )
+
+        manager = FileSearchManager(mock_client)
+        with patch('src.file_search_manager.asyncio.sleep', AsyncMock()):
+            with pytest.raises(TimeoutError):
+                asyncio.run(manager.wait_until_indexed('store1', 1, timeout=0))
+
 
 class TestListFilesInStore:
     """Test cases for list_files_in_store method."""
 
-    def test_list_files_in_store_success(self):
+    def test_list_files_in_store_success(self, mock_client):
         """Test listing files in a store."""
-        mock_client = Mock()
         mock_store = Mock()
         mock_store.name = 'store1'
         mock_store.display_name = 'Test Store'
+        documents = [SimpleNamespace(name='doc1'), SimpleNamespace(name='doc2')]
         mock_client.file_search_stores.get.return_value = mock_store
+        mock_client.file_search_stores.documents.list.return_value = iter(documents)
 
         manager = FileSearchManager(mock_client)
         result = manager.list_files_in_store('store1')
 
-        # Currently returns empty list as per implementation
-        assert result == []
+        assert result == documents
+        mock_client.file_search_stores.documents.list.assert_called_once_with(parent='store1')
 
-    def test_list_files_in_store_not_found(self):
-        """Test listing files in a non-existent store."""
-        mock_client = Mock()
-        mock_client.file_search_stores.get.side_effect = APIError(404, {'error': {'message': 'Not Found'}})
+    def test_list_files_in_store_uses_cache(self, mock_client):
+        """Test that repeated listings within the TTL hit the API once."""
+        mock_client.file_search_stores.documents.list.return_value = [SimpleNamespace(name='doc1')]
 
         manager = FileSearchManager(mock_client)
-        result = manager.list_files_in_store('nonexistent')
+        first = manager.list_files_in_store('store1')
+        second = manager.list_files_in_store('store1')
 
-        assert result == []
+        assert first == second
+        mock_client.file_search_stores.documents.list.assert_called_once()
+
+    def test_list_files_in_store_cache_dropped_on_upload(self, mock_client, tmp_path):
+        """Test that uploading to a store refetches its file listing."""
+        test_file = tmp_path / 'test.txt'
+        test_file.write_text('test content')
+
+        mock_client.file_search_stores.documents.list.return_value = []
+        mock_client.file_search_stores.upload_to_file_search_store.return_value = Mock(done=True, error=None)
+
+        manager = FileSearchManager(mock_client)
+        manager.list_files_in_store('store1')
+        manager.upload_file_to_store(test_file, 'store1')
+        manager.list_files_in_store('store1')
+
+        assert mock_client.file_search_stores.documents.list.call_count == 2
 
 
 class TestDisplayStoresSummary:
     """Test cases for display_stores_summary method."""
 
-    def test_display_stores_summary_with_stores(self, capsys):
+    def test_display_stores_summary_with_stores(self, mock_client, capsys):
         """Test displaying summary with stores."""
-        mock_client = Mock()
         mock_store1 = Mock()
         mock_store1.name = 'store1'
         mock_store1.display_name = 'Test Store 1'
@@ -415,9 +829,22 @@ class TestDisplayStoresSummary:
         assert 'store1' in captured.out
         assert 'store2' in captured.out
 
-    def test_display_stores_summary_empty(self, capsys):
+    def test_display_stores_summary_single_write(self, mock_client):
+        """Test that the whole summary goes out in one stdout write."""
+        mock_client.file_search_stores.list.return_value = [
+            SimpleNamespace(name=f'store{i}', display_name=f'Store {i}') for i in range(5)
+        ]
+
+        manager = FileSearchManager(mock_client)
+
+        with patch('src.file_search_manager.sys.stdout') as mock_stdout:
+            manager.display_stores_summary()
+
+        mock_stdout.write.assert_called_once()
+        assert 'store4' in mock_stdout.write.call_args[0][0]
+
+    def test_display_stores_summary_empty(self, mock_client, capsys):
         """Test displaying summary with no stores."""
-        mock_client = Mock()
         mock_client.file_search_stores.list.return_value = []
 
         manager = FileSearchManager(mock_client)
@@ -425,3 +852,381 @@ class TestDisplayStoresSummary:
 
         captured = capsys.readouterr()
         assert 'No file search stores found' in captured.out
+
+
+class TestStoreCache:
+    """Test cases for the in-process store cache."""
+
+    def test_list_stores_uses_cache(self, mock_client):
+        """Test that repeated listings within the TTL hit the API once."""
+        mock_client.file_search_stores.list.return_value = [Mock()]
+
+        manager = FileSearchManager(mock_client)
+        manager.list_stores()
+        manager.list_stores()
+
+        assert mock_client.file_search_stores.list.call_count == 1
+
+    def test_list_stores_refetches_after_ttl(self, mock_client):
+        """Test that an expired listing is fetched again."""
+        mock_client.file_search_stores.list.return_value = []
+
+        manager = FileSearchManager(mock_client)
+        with patch('src.file_search_manager.time.monotonic', side_effect=[0.0, 100.0, 100.0]):
+            manager.list_stores()
+            manager.list_stores()
+
+        assert mock_client.file_search_stores.list.call_count == 2
+
+    def test_get_store_served_from_listing(self, mock_client):
+        """Test that get_store reuses stores returned by list_stores."""
+        mock_store = Mock()
+        mock_store.name = 'store1'
+        mock_client.file_search_stores.list.return_value = [mock_store]
+
+        manager = FileSearchManager(mock_client)
+        manager.list_stores()
+        result = manager.get_store('store1')
+
+        assert result == mock_store
+        mock_client.file_search_stores.get.assert_not_called()
+
+    def test_create_store_updates_cached_listing(self, mock_client):
+        """Test that a created store joins the cached listing without a refetch."""
+        existing, created = Mock(), Mock()
+        created.name = 'store2'
+        mock_client.file_search_stores.list.return_value = [existing]
+        mock_client.file_search_stores.create.return_value = created
+
+        manager = FileSearchManager(mock_client)
+        manager.list_stores()
+        manager.create_store(display_name='new-store')
+
+        assert manager.list_stores() == [existing, created]
+        assert manager.get_store('store2') is created
+        assert mock_client.file_search_stores.list.call_count == 1
+        mock_client.file_search_stores.get.assert_not_called()
+
+    def test_delete_store_invalidates_cache(self, mock_client):
+        """Test that deleting a store drops it from the cache."""
+        mock_store = Mock()
+        mock_store.name = 'store1'
+        mock_client.file_search_stores.get.return_value = mock_store
+        mock_client.file_search_stores.list.return_value = [mock_store]
+
+        manager = FileSearchManager(mock_client)
+        manager.list_stores()
+        manager.delete_store('store1')
+        manager.get_store('store1')
+        manager.list_stores()
+
+        mock_client.file_search_stores.get.assert_called_once_with(name='store1')
+        assert mock_client.file_search_stores.list.call_count == 2
+
+    def test_invalidate_clears_cache(self, mock_client):
+        """Test that invalidate forces the next listing to hit the API."""
+        mock_client.file_search_stores.list.return_value = []
+
+        manager = FileSearchManager(mock_client)
+        manager.list_stores()
+        manager.invalidate()
+        manager.list_stores()
+
+        assert mock_client.file_search_stores.list.call_count == 2
+
+
+class TestStoreCacheEviction:
+    """Test cases for the bounded store lookup cache."""
+
+    def test_get_store_evicts_least_recently_used(self):
+        """Test that the oldest untouched entry is dropped once the cap is hit."""
+        mock_client = Mock()
+        mock_client.file_search_stores.get.side_effect = lambda name: Mock()
+
+        manager = FileSearchManager(mock_client)
+        with patch.object(FileSearchManager, '_MAX_CACHED_STORES', 2):
+            manager.get_store('a')
+            manager.get_store('b')
+            manager.get_store('a')
+            manager.get_store('c')
+
+        assert list(manager._stores_cache) == ['a', 'c']
+        assert mock_client.file_search_stores.get.call_count == 3
+
+
+class TestStoreDiskCache:
+    """Test cases for the on-disk store listing cache."""
+
+    def _manager(self, cache_path, key='key-a'):
+        mock_client = Mock()
+        mock_client.file_search_stores.list.return_value = [
+            types.FileSearchStore(name='fileSearchStores/s1', display_name='Store 1')
+        ]
+        return FileSearchManager(mock_client, cache_path=cache_path, cache_key=key)
+
+    def test_listing_persists_across_instances(self, tmp_path):
+        """Test that a fresh manager reads the listing written by a previous one."""
+        cache_path = tmp_path / 'stores.json'
+        self._manager(cache_path).list_stores()
+
+        manager = self._manager(cache_path)
+        stores = manager.list_stores()
+
+        manager.client.file_search_stores.list.assert_not_called()
+        assert [s.name for s in stores] == ['fileSearchStores/s1']
+        assert stores[0].display_name == 'Store 1'
+
+    def test_different_key_refetches(self, tmp_path):
+        """Test that a listing cached for another API key is ignored."""
+        cache_path = tmp_path / 'stores.json'
+        self._manager(cache_path, key='key-a').list_stores()
+
+        manager = self._manager(cache_path, key='key-b')
+        manager.list_stores()
+
+        manager.client.file_search_stores.list.assert_called_once()
+
+    def test_expired_file_refetches(self, tmp_path):
+        """Test that a listing older than the disk TTL is ignored."""
+        cache_path = tmp_path / 'stores.json'
+        self._manager(cache_path).list_stores()
+        old = time.time() - FileSearchManager._DISK_TTL - 1
+        os.utime(cache_path, (old, old))
+
+        manager = self._manager(cache_path)
+        manager.list_stores()
+
+        manager.client.file_search_stores.list.assert_called_once()
+
+    def test_invalidate_removes_file(self, tmp_path):
+        """Test that invalidate deletes the persisted listing."""
+        cache_path = tmp_path / 'stores.json'
+        manager = self._manager(cache_path)
+        manager.list_stores()
+        assert cache_path.exists()
+
+        manager.invalidate()
+
+        assert not cache_path.exists()
+
+    def test_corrupt_file_refetches(self, tmp_path):
+        """Test that an unreadable cache file falls back to the API."""
+        cache_path = tmp_path / 'stores.json'
+        cache_path.write_text('not json')
+
+        manager = self._manager(cache_path)
+        manager.list_stores()
+
+        manager.client.file_search_stores.list.assert_called_once()
+
+
+class TestUploadDeduplication:
+    """Test cases for skipping files already uploaded to a store."""
+
+    def _manager(self, index_dir, error=None):
+        mock_client = Mock()
+        mock_client.aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+            return_value=Mock(done=True, error=error)
+        )
+        return FileSearchManager(mock_client, upload_index_dir=index_dir)
+
+    def test_hash_file_matches_blake2b_of_contents(self, tmp_path):
+        """Test that file hashes stay compatible with existing upload indexes."""
+        path = tmp_path / 'a.bin'
+        path.write_bytes(os.urandom(300_000))
+
+        expected = hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+
+        assert _hash_file(path) == expected
+
+    def test_reupload_skips_unchanged_files(self, tmp_path):
+        """Test that a second run uploads nothing when files are unchanged."""
+        files_dir = tmp_path / 'files'
+        files_dir.mkdir()
+        (files_dir / 'a.txt').write_text('alpha')
+        index_dir = tmp_path / 'index'
+
+        assert self._manager(index_dir).upload_files_from_directory(files_dir, 'fileSearchStores/s1') == 1
+
+        manager = self._manager(index_dir)
+        result = manager.upload_files_from_directory(files_dir, 'fileSearchStores/s1')
+
+        assert result == 0
+        manager.client.aio.file_search_stores.upload_to_file_search_store.assert_not_called()
+        assert (index_dir / 'fileSearchStores_s1.json').exists()
+
+    def test_modified_file_is_uploaded_again(self, tmp_path):
+        """Test that changed contents are uploaded on the next run."""
+        files_dir = tmp_path / 'files'
+        files_dir.mkdir()
+        (files_dir / 'a.txt').write_text('alpha')
+        index_dir = tmp_path / 'index'
+        self._manager(index_dir).upload_files_from_directory(files_dir, 'store1')
+
+        (files_dir / 'a.txt').write_text('alpha, revised')
+        manager = self._manager(index_dir)
+        result = manager.upload_files_from_directory(files_dir, 'store1')
+
+        assert result == 1
+
+    def test_identical_files_uploaded_once(self, tmp_path):
+        """Test that duplicate contents within one directory are sent once."""
+        files_dir = tmp_path / 'files'
+        files_dir.mkdir()
+        (files_dir / 'a.txt').write_text('same')
+        (files_dir / 'b.txt').write_text('same')
+
+        manager = self._manager(tmp_path / 'index')
+        result = manager.upload_files_from_directory(files_dir, 'store1')
+
+        assert result == 1
+        assert manager.client.aio.file_search_stores.upload_to_file_search_store.await_count == 1
+
+    def test_failed_upload_is_not_recorded(self, tmp_path):
+        """Test that files whose upload failed are retried on the next run."""
+        files_dir = tmp_path / 'files'
+        files_dir.mkdir()
+        (files_dir / 'a.txt').write_text('alpha')
+        index_dir = tmp_path / 'index'
+
+        failing = self._manager(index_dir)
+        failing.client.aio.file_search_stores.upload_to_file_search_store.side_effect = APIError(
+            500, {'error': {'message': 'Upload Failed'}}
+        )
+        assert failing.upload_files_from_directory(files_dir, 'store1') == 0
+
+        assert self._manager(index_dir).upload_files_from_directory(files_dir, 'store1') == 1
+
+    def test_server_side_failure_is_not_recorded(self, tmp_path, capsys):
+        """Test that an operation finishing with an error is retried on the next run."""
+        files_dir = tmp_path / 'files'
+        files_dir.mkdir()
+        (files_dir / 'a.txt').write_text('alpha')
+        index_dir = tmp_path / 'index'
+
+        failing = self._manager(index_dir, error={'code': 13, 'message': 'Indexing failed'})
+        assert failing.upload_files_from_directory(files_dir, 'store1') == 0
+        assert 'Error uploading a.txt' in capsys.readouterr().out
+
+        assert self._manager(index_dir).upload_files_from_directory(files_dir, 'store1') == 1
+
+    def test_file_edited_during_upload_is_uploaded_again(self, tmp_path):
+        """Test that the index keeps the stat the hash was computed from."""
+        files_dir = tmp_path / 'files'
+        files_dir.mkdir()
+        (files_dir / 'a.txt').write_text('alpha')
+        index_dir = tmp_path / 'index'
+
+        async def edit_while_uploading(**kwargs):
+            (files_dir / 'a.txt').write_text('alpha, edited mid-upload')
+            return Mock(done=True, error=None)
+
+        first = self._manager(index_dir)
+        first.client.aio.file_search_stores.upload_to_file_search_store.side_effect = edit_while_uploading
+        assert first.upload_files_from_directory(files_dir, 'store1') == 1
+
+        assert self._manager(index_dir).upload_files_from_directory(files_dir, 'store1') == 1
+
+    def test_file_removed_after_upload_is_still_recorded(self, tmp_path):
+        """Test that a file deleted mid-run does not stop the index being saved."""
+        files_dir = tmp_path / 'files'
+        files_dir.mkdir()
+        (files_dir / 'a.txt').write_text('alpha')
+        index_dir = tmp_path / 'index'
+
+        async def delete_after_upload(**kwargs):
+            (files_dir / 'a.txt').unlink()
+            return Mock(done=True, error=None)
+
+        first = self._manager(index_dir)
+        first.client.aio.file_search_stores.upload_to_file_search_store.side_effect = delete_after_upload
+        assert first.upload_files_from_directory(files_dir, 'store1') == 1
+
+        # Same contents under a new name are recognised as already uploaded
+        (files_dir / 'b.txt').write_text('alpha')
+        manager = self._manager(index_dir)
+        assert manager.upload_files_from_directory(files_dir, 'store1') == 0
+        manager.client.aio.file_search_stores.upload_to_file_search_store.assert_not_called()
+
+    def test_unreadable_file_is_skipped(self, tmp_path, capsys):
+        """Test that a file that cannot be hashed is skipped, not fatal."""
+        files_dir = tmp_path / 'files'
+        files_dir.mkdir()
+        (files_dir / 'a.txt').write_text('alpha')
+        (files_dir / 'b.txt').write_text('beta')
+
+        real_hash = _hash_file
+
+        def hash_file(path):
+            if path.name == 'a.txt':
+                raise PermissionError(13, 'Permission denied')
+            return real_hash(path)
+
+        manager = self._manager(tmp_path / 'index')
+        with patch('src.file_search_manager._hash_file', side_effect=hash_file):
+            result = manager.upload_files_from_directory(files_dir, 'store1')
+
+        assert result == 1
+        assert_upload_called(manager.client, 'store1', file=files_dir / 'b.txt', aio=True)
+        assert 'Skipping a.txt: could not read file' in capsys.readouterr().out
+
+    def test_each_file_is_stat_once(self, tmp_path):
+        """Test that scanning, dedup and the index write share one stat per file."""
+        files_dir = tmp_path / 'files'
+        files_dir.mkdir()
+        for name in ('a.txt', 'b.txt', 'c.txt'):
+            (files_dir / name).write_text(name)
+
+        stats = []
+        real_scandir, real_stat = os.scandir, os.stat
+
+        class CountingEntry:
+            def __init__(self, entry):
+                self._entry = entry
+
+            def __getattr__(self, name):
+                return getattr(self._entry, name)
+
+            def stat(self, **kwargs):
+                stats.append(self._entry.name)
+                return self._entry.stat(**kwargs)
+
+        class CountingScandir:
+            def __init__(self, path):
+                self._it = real_scandir(path)
+
+            def __enter__(self):
+                return self
+
+            def __iter__(self):
+                return (CountingEntry(entry) for entry in self._it)
+
+            def __exit__(self, *exc):
+                self._it.close()
+                return False
+
+        def counting_stat(path, *args, **kwargs):
+            if Path(path).parent == files_dir:
+                stats.append(Path(path).name)
+            return real_stat(path, *args, **kwargs)
+
+        manager = self._manager(tmp_path / 'index')
+        with patch('src.file_search_manager.os.scandir', CountingScandir), \
+                patch('os.stat', counting_stat):
+            result = manager.upload_files_from_directory(files_dir, 'store1')
+
+        assert result == 3
+        assert sorted(stats) == ['a.txt', 'b.txt', 'c.txt']
+
+    def test_delete_store_removes_index(self, tmp_path):
+        """Test that deleting a store forgets its uploaded files."""
+        files_dir = tmp_path / 'files'
+        files_dir.mkdir()
+        (files_dir / 'a.txt').write_text('alpha')
+        index_dir = tmp_path / 'index'
+
+        manager = self._manager(index_dir)
+        manager.upload_files_from_directory(files_dir, 'store1')
+        manager.delete_store('store1')
+
+        assert not (index_dir / 'store1.json').exists()
@@ -1,33 +1,36 @@
 """Tests for the GeminiChatClient module."""
 
+import asyncio
 import pytest
-from unittest.mock import Mock, MagicMock, patch, call
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
 from google.genai import types
 from google.genai.errors import APIError
-from src.gemini_client import GeminiChatClient
+from src.gemini_client import GeminiChatClient, HTTP_OPTIONS
+from src.response_cache import ResponseCache
+from src.semantic_cache import SemanticCache
+from tests.factories import make_grounding
 
 
 class TestGeminiChatClientInit:
     """Test cases for GeminiChatClient initialization."""
 
-    @patch('src.gemini_client.genai.Client')
-    def test_init_with_minimal_params(self, mock_genai_client):
-        """Test initialization with minimal parameters."""
-        client = GeminiChatClient(api_key='test-key')
+    def test_init_with_minimal_params(self, mock_genai_client, make_client):
+        """Test initialization with minimal parameters creates one genai.Client."""
+        client = make_client()
 
+        assert client.client is mock_genai_client.return_value
         assert client.model_name == 'gemini-2.5-flash'
         assert client.system_instruction is None
         assert client.enable_thinking is True
         assert client.thinking_budget is None
         assert client.chat is None
         assert client.file_search_store_names == []
-        mock_genai_client.assert_called_once_with(api_key='test-key')
+        mock_genai_client.assert_called_once_with(api_key='test-key', http_options=HTTP_OPTIONS)
 
-    @patch('src.gemini_client.genai.Client')
-    def test_init_with_all_params(self, mock_genai_client):
+    def test_init_with_all_params(self, make_client):
         """Test initialization with all parameters."""
-        client = GeminiChatClient(
-            api_key='test-key',
+        client = make_client(
             model_name='gemini-2.5-pro',
             system_instruction='Test instruction',
             enable_thinking=False,
@@ -39,99 +42,67 @@ class TestGeminiChatClientInit:
         assert client.enable_thinking is False
         assert client.thinking_budget == 128
 
-    @patch('src.gemini_client.genai.Client')
-    def test_init_creates_genai_client(self, mock_genai_client):
-        """Test that initialization creates a genai.Client."""
-        mock_instance = Mock()
-        mock_genai_client.return_value = mock_instance
+    def test_instances_share_client_per_api_key(self, mock_genai_client, make_client):
+        """Test that clients with the same key reuse one genai.Client."""
+        mock_genai_client.side_effect = lambda **kwargs: Mock()
 
-        client = GeminiChatClient(api_key='test-key')
+        first = make_client()
+        second = make_client()
+        other = make_client(api_key='other-key')
+
+        assert first.client is second.client
+        assert other.client is not first.client
+        assert mock_genai_client.call_count == 2
 
-        assert client.client == mock_instance
-        mock_genai_client.assert_called_once_with(api_key='test-key')
 
+    def test_http_options_keep_connections_alive(self):
+        """Test that only the sync transport gets the long keep-alive pool."""
+        limits = HTTP_OPTIONS.client_args['limits']
+        assert limits.max_keepalive_connections > 0
+        assert limits.keepalive_expiry > 0
+        assert HTTP_OPTIONS.async_client_args is None
 
 class TestSetFileSearchStores:
     """Test cases for set_file_search_stores method."""
 
-    @patch('src.gemini_client.genai.Client')
-    def test_set_file_search_stores_single(self, mock_genai_client):
-        """Test setting a single file search store."""
-        client = GeminiChatClient(api_key='test-key')
-        store_names = ['store1']
-
-        client.set_file_search_stores(store_names)
-
-        assert client.file_search_store_names == store_names
-
-    @patch('src.gemini_client.genai.Client')
-    def test_set_file_search_stores_multiple(self, mock_genai_client):
-        """Test setting multiple file search stores."""
-        client = GeminiChatClient(api_key='test-key')
-        store_names = ['store1', 'store2', 'store3']
+    @pytest.mark.parametrize('store_names', [
+        pytest.param(['store1'], id='single'),
+        pytest.param(['store1', 'store2', 'store3'], id='multiple'),
+        pytest.param([], id='empty'),
+    ])
+    def test_set_file_search_stores(self, make_client, store_names):
+        """Test that setting file search stores replaces the previous selection."""
+        client = make_client()
+        client.file_search_store_names = ['existing_store']
 
         client.set_file_search_stores(store_names)
 
         assert client.file_search_store_names == store_names
 
-    @patch('src.gemini_client.genai.Client')
-    def test_set_file_search_stores_empty(self, mock_genai_client):
-        """Test setting empty file search stores list."""
-        client = GeminiChatClient(api_key='test-key')
-        client.file_search_store_names = ['existing_store']
-
-        client.set_file_search_stores([])
-
-        assert client.file_search_store_names == []
-
 
 class TestStartChat:
     """Test cases for start_chat method."""
 
-    @patch('src.gemini_client.genai.Client')
-    def test_start_chat_success(self, mock_genai_client):
-        """Test starting a chat successfully."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
-
-        client = GeminiChatClient(api_key='test-key')
+    @pytest.mark.parametrize('kwargs, model', [
+        pytest.param({}, 'gemini-2.5-flash', id='default-model'),
+        pytest.param({'model_name': 'gemini-2.5-pro'}, 'gemini-2.5-pro', id='custom-model'),
+    ])
+    def test_start_chat_success(self, mock_genai_client, make_client, mock_chat, kwargs, model):
+        """Test starting a chat creates a session for the configured model."""
+        client = make_client(**kwargs)
         result = client.start_chat()
 
         assert result is True
         assert client.chat == mock_chat
-        mock_client_instance.chats.create.assert_called_once_with(
-            model='gemini-2.5-flash'
-        )
+        mock_genai_client.return_value.chats.create.assert_called_once_with(model=model)
 
-    @patch('src.gemini_client.genai.Client')
-    def test_start_chat_with_custom_model(self, mock_genai_client):
-        """Test starting a chat with custom model."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
-
-        client = GeminiChatClient(
-            api_key='test-key',
-            model_name='gemini-2.5-pro'
-        )
-        result = client.start_chat()
-
-        assert result is True
-        mock_client_instance.chats.create.assert_called_once_with(
-            model='gemini-2.5-pro'
-        )
-
-    @patch('src.gemini_client.genai.Client')
-    def test_start_chat_api_error(self, mock_genai_client):
+    def test_start_chat_api_error(self, mock_genai_client, make_client):
         """Test starting a chat when API returns an error."""
         mock_client_instance = Mock()
         mock_client_instance.chats.create.side_effect = APIError(500, {'error': {'message': 'Chat Creation Failed'}})
         mock_genai_client.return_value = mock_client_instance
 
-        client = GeminiChatClient(api_key='test-key')
+        client = make_client()
         result = client.start_chat()
 
         assert result is False
@@ -141,156 +112,394 @@ class TestStartChat:
 class TestSendMessage:
     """Test cases for send_message method."""
 
-    @patch('src.gemini_client.genai.Client')
-    def test_send_message_without_chat(self, mock_genai_client):
+    def test_send_message_without_chat(self, make_client):
         """Test sending a message without starting chat."""
-        client = GeminiChatClient(api_key='test-key')
+        client = make_client()
         result = client.send_message('Hello')
 
         assert result is None
 
-    @patch('src.gemini_client.genai.Client')
-    def test_send_message_simple(self, mock_genai_client):
-        """Test sending a simple message."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
+    @pytest.mark.parametrize('kwargs, stores', [
+        pytest.param({}, [], id='simple'),
+        pytest.param({'system_instruction': 'You are helpful'}, [], id='system-instruction'),
+        pytest.param({'enable_thinking': True, 'thinking_budget': 128}, [], id='thinking'),
+        pytest.param({}, ['store1', 'store2'], id='file-search'),
+        pytest.param({'system_instruction': 'You are helpful', 'enable_thinking': True,
+                      'thinking_budget': 256}, ['store1'], id='all-features'),
+    ])
+    def test_send_message(self, make_client, mock_chat, kwargs, stores):
+        """Test sending a message with each combination of request settings."""
         mock_response = Mock()
         mock_chat.send_message.return_value = mock_response
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
 
-        client = GeminiChatClient(api_key='test-key')
+        client = make_client(**kwargs)
         client.start_chat()
+        client.set_file_search_stores(stores)
         result = client.send_message('Hello')
 
         assert result == mock_response
         mock_chat.send_message.assert_called_once()
+        # A config is only sent when some setting needs one
+        assert ('config' in mock_chat.send_message.call_args[1]) is bool(kwargs or stores)
 
-    @patch('src.gemini_client.genai.Client')
-    def test_send_message_with_system_instruction(self, mock_genai_client):
-        """Test sending a message with system instruction."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
-        mock_response = Mock()
-        mock_chat.send_message.return_value = mock_response
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
+    def test_send_message_reuses_config(self, make_client, mock_chat):
+        """Test that the config is built once and rebuilt only when stores change."""
+        client = make_client()
+        client.start_chat()
+        client.set_file_search_stores(['store1'])
+        client.send_message('First')
+        client.send_message('Second')
 
-        client = GeminiChatClient(
-            api_key='test-key',
-            system_instruction='You are helpful'
-        )
+        first, second = mock_chat.send_message.call_args_list
+        assert first[1]['config'] is second[1]['config']
+
+        client.set_file_search_stores(['store2'])
+        client.send_message('Third')
+
+        config = mock_chat.send_message.call_args[1]['config']
+        assert config is not first[1]['config']
+        assert config.tools[0].file_search.file_search_store_names == ['store2']
+
+    def test_send_message_rebuilds_config_when_settings_change(self, make_client, mock_chat):
+        """Test that changing the system instruction or thinking budget refreshes the config."""
+        client = make_client(system_instruction='First')
         client.start_chat()
-        result = client.send_message('Hello')
+        client.send_message('One')
 
-        assert result == mock_response
-        # Check that config was passed
-        call_args = mock_chat.send_message.call_args
-        assert 'config' in call_args[1]
+        client.system_instruction = 'Second'
+        client.thinking_budget = 64
+        client.send_message('Two')
 
-    @patch('src.gemini_client.genai.Client')
-    def test_send_message_with_thinking_config(self, mock_genai_client):
-        """Test sending a message with thinking configuration."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
-        mock_response = Mock()
-        mock_chat.send_message.return_value = mock_response
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
+        config = mock_chat.send_message.call_args[1]['config']
+        assert config.system_instruction == 'Second'
+        assert config.thinking_config.thinking_budget == 64
 
-        client = GeminiChatClient(
-            api_key='test-key',
-            enable_thinking=True,
-            thinking_budget=128
-        )
+    def test_send_message_api_error(self, make_client, mock_chat):
+        """Test sending a message when API returns an error."""
+        mock_chat.send_message.side_effect = APIError(500, {'error': {'message': 'Message Failed'}})
+
+        client = make_client()
         client.start_chat()
         result = client.send_message('Hello')
 
-        assert result == mock_response
-        call_args = mock_chat.send_message.call_args
-        assert 'config' in call_args[1]
+        assert result is None
 
-    @patch('src.gemini_client.genai.Client')
-    def test_send_message_with_file_search(self, mock_genai_client):
-        """Test sending a message with file search enabled."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
-        mock_response = Mock()
-        mock_chat.send_message.return_value = mock_response
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
 
+class TestResponseCaching:
+    """Test cases for serving repeated requests from the response cache."""
+    def _response(self, text):
+        return types.GenerateContentResponse(candidates=[types.Candidate(
+            content=types.Content(role='model', parts=[types.Part(text=text)])
+        )])
+
+    def test_identical_request_is_served_from_cache(self, tmp_path):
+        """Test that a repeated first turn skips the API and keeps history."""
+        cache = ResponseCache(tmp_path, ttl=60)
+
+        first = GeminiChatClient(api_key='test-key', response_cache=cache)
+        first.start_chat()
+        with patch.object(first.client.models, 'generate_content',
+                          return_value=self._response('Cached answer')) as mock_generate:
+            first.send_message('Hello')
+        mock_generate.assert_called_once()
+
+        second = GeminiChatClient(api_key='test-key', response_cache=cache)
+        second.start_chat()
+        with patch.object(second.client.models, 'generate_content') as mock_generate:
+            response = second.send_message('Hello')
+
+        mock_generate.assert_not_called()
+        assert response.text == 'Cached answer'
+        assert second.stats == {'hits': 1, 'misses': 0, 'semantic_hits': 0}
+        assert [m.role for m in second.get_chat_history()] == ['user', 'model']
+
+    def test_different_history_misses(self, tmp_path):
+        """Test that the same prompt later in a conversation is not reused."""
+        cache = ResponseCache(tmp_path, ttl=60)
+        client = GeminiChatClient(api_key='test-key', response_cache=cache)
+        client.start_chat()
+
+        with patch.object(client.client.models, 'generate_content',
+                          side_effect=[self._response('One'), self._response('Two')]) as mock_generate:
+            client.send_message('Hello')
+            response = client.send_message('Hello')
+
+        assert mock_generate.call_count == 2
+        assert response.text == 'Two'
+        assert client.stats == {'hits': 0, 'misses': 2, 'semantic_hits': 0}
+
+    def test_explicit_thinking_budget_bypasses_cache(self, tmp_path):
+        """Test that requests with a thinking budget are never cached."""
+        cache = ResponseCache(tmp_path, ttl=60)
+        client = GeminiChatClient(api_key='test-key', thinking_budget=128, response_cache=cache)
+        client.start_chat()
+
+        with patch.object(client.client.models, 'generate_content',
+                          return_value=self._response('Answer')):
+            client.send_message('Hello')
+
+        assert client.stats == {'hits': 0, 'misses': 0, 'semantic_hits': 0}
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestSemanticCaching:
+    """Test cases for reusing responses to paraphrased prompts."""
+
+    def _response(self, text):
+        return types.GenerateContentResponse(candidates=[types.Candidate(
+            content=types.Content(role='model', parts=[types.Part(text=text)])
+        )])
+
+    def _embedding(self, values):
+        return types.EmbedContentResponse(embeddings=[types.ContentEmbedding(values=values)])
+
+    def test_paraphrased_prompt_is_served_from_cache(self):
+        """Test that a similar prompt in the same context skips generation."""
+        cache = SemanticCache(threshold=0.9)
+
+        first = GeminiChatClient(api_key='test-key', semantic_cache=cache)
+        first.start_chat()
+        with patch.object(first.client.models, 'embed_content',
+                          return_value=self._embedding([1.0, 0.0])), \
+                patch.object(first.client.models, 'generate_content',
+                             return_value=self._response('Answer')):
+            first.send_message('Summarize the report')
+
+        second = GeminiChatClient(api_key='test-key', semantic_cache=cache)
+        second.start_chat()
+        with patch.object(second.client.models, 'embed_content',
+                          return_value=self._embedding([0.98, 0.1])), \
+                patch.object(second.client.models, 'generate_content') as mock_generate:
+            response = second.send_message('Give me a summary of the report')
+
+        mock_generate.assert_not_called()
+        assert response.text == 'Answer'
+        assert second.stats['semantic_hits'] == 1
+        history = second.get_chat_history()
+        assert history[0].parts[0].text == 'Give me a summary of the report'
+
+    def test_embedding_error_falls_back_to_api(self):
+        """Test that a failed embedding call still sends the message."""
+        client = GeminiChatClient(api_key='test-key', semantic_cache=SemanticCache())
+        client.start_chat()
+
+        with patch.object(client.client.models, 'embed_content',
+                          side_effect=APIError(500, {'error': {'message': 'Embed Failed'}})), \
+                patch.object(client.client.models, 'generate_content',
+                             return_value=self._response('Answer')) as mock_generate:
+            response = client.send_message('Hello')
+
+        mock_generate.assert_called_once()
+        assert response.text == 'Answer'
+
+
+class TestHistoryDigest:
+    """Test cases for the incremental history hash used in cache keys."""
+
+    def _content(self, text):
+        content = Mock()
+        content.to_json_dict.return_value = {'parts': [{'text': text}]}
+        return content
+
+    def test_only_new_messages_are_hashed(self, make_client):
+        """Test that earlier messages are not re-serialized on later calls."""
+        history = [self._content('a'), self._content('b')]
+        client = make_client()
+        client.chat = Mock()
+        client.chat.get_history.return_value = history
+
+        first = client._history_digest()
+        history.append(self._content('c'))
+        second = client._history_digest()
+
+        assert first != second
+        assert history[0].to_json_dict.call_count == 1
+        assert history[2].to_json_dict.call_count == 1
+
+    def test_digest_matches_full_rehash(self, make_client):
+        """Test that the incremental digest equals hashing from scratch."""
+        history = [self._content('a')]
+        client = make_client()
+        client.chat = Mock()
+        client.chat.get_history.return_value = history
+        client._history_digest()
+        history.append(self._content('b'))
+        incremental = client._history_digest()
+
+        fresh = make_client()
+        fresh.chat = Mock()
+        fresh.chat.get_history.return_value = list(history)
+
+        assert fresh._history_digest() == incremental
+
+    def test_new_chat_resets_digest(self, make_client):
+        """Test that switching chat sessions starts the hash over."""
+        client = make_client()
+        client.chat = Mock()
+        client.chat.get_history.return_value = [self._content('a')]
+        client._history_digest()
+
+        client.chat = Mock()
+        client.chat.get_history.return_value = []
+
+        assert client._history_digest() == ''
+
+
+class TestStreaming:
+    """Test cases for streaming responses."""
+
+    def _chunk(self, text, grounding_metadata=None):
+        return types.GenerateContentResponse(candidates=[types.Candidate(
+            content=types.Content(role='model', parts=[types.Part(text=text)]),
+            grounding_metadata=grounding_metadata
+        )])
+
+    def test_send_message_stream_without_chat(self):
+        """Test that streaming requires a started chat."""
+        client = GeminiChatClient(api_key='test-key')
+
+        assert list(client.send_message_stream('Hello')) == []
+
+    def test_display_stream_prints_chunks_and_citations(self, capsys):
+        """Test that chunks are printed as they arrive, followed by citations."""
+        metadata = types.GroundingMetadata(grounding_chunks=[types.GroundingChunk(
+            retrieved_context=types.GroundingChunkRetrievedContext(title='doc.pdf', uri='files/doc')
+        )])
         client = GeminiChatClient(api_key='test-key')
         client.start_chat()
-        client.set_file_search_stores(['store1', 'store2'])
-        result = client.send_message('Search question')
 
-        assert result == mock_response
-        call_args = mock_chat.send_message.call_args
-        assert 'config' in call_args[1]
+        with patch.object(client.client.models, 'generate_content_stream',
+                          return_value=iter([self._chunk('Hel'), self._chunk('lo', metadata)])):
+            assert client.display_stream('Hi') is True
 
-    @patch('src.gemini_client.genai.Client')
-    def test_send_message_api_error(self, mock_genai_client):
-        """Test sending a message when API returns an error."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
-        mock_chat.send_message.side_effect = APIError(500, {'error': {'message': 'Message Failed'}})
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
+        captured = capsys.readouterr()
+        assert 'Assistant: Hello\n' in captured.out
+        assert 'Title: doc.pdf' in captured.out
+        history = client.get_chat_history()
+        assert history[0].role == 'user'
+        assert ''.join(m.parts[0].text for m in history[1:]) == 'Hello'
 
+    def test_display_stream_api_error(self, capsys):
+        """Test that a failed stream reports the error and returns False."""
         client = GeminiChatClient(api_key='test-key')
         client.start_chat()
-        result = client.send_message('Hello')
 
-        assert result is None
+        with patch.object(client.client.models, 'generate_content_stream',
+                          side_effect=APIError(500, {'error': {'message': 'Stream Failed'}})):
+            assert client.display_stream('Hi') is False
+
+        assert 'Error sending message' in capsys.readouterr().out
+
+    def test_display_stream_uses_cache_when_configured(self, tmp_path):
+        """Test that configured response caches route through send_message."""
+        client = GeminiChatClient(api_key='test-key', response_cache=ResponseCache(tmp_path, ttl=60))
+        client.start_chat()
+
+        with patch.object(client, 'send_message', return_value=None) as mock_send, \
+                patch.object(client, 'send_message_stream') as mock_stream:
+            client.display_stream('Hi')
+
+        mock_send.assert_called_once_with('Hi')
+        mock_stream.assert_not_called()
 
-    @patch('src.gemini_client.genai.Client')
-    def test_send_message_with_all_features(self, mock_genai_client):
-        """Test sending a message with all features enabled."""
+
+class TestAsyncChat:
+    """Test cases for the async chat methods."""
+
+    def test_asend_message_without_session(self, make_client):
+        """Test that asend_message requires astart_chat first."""
+        client = make_client()
+
+        assert asyncio.run(client.asend_message('Hello')) is None
+
+    def test_asend_message_uses_async_chat(self, mock_genai_client, make_client):
+        """Test that messages are awaited on the aio chat session with the shared config."""
         mock_client_instance = Mock()
-        mock_chat = Mock()
+        mock_async_chat = Mock()
         mock_response = Mock()
-        mock_chat.send_message.return_value = mock_response
-        mock_client_instance.chats.create.return_value = mock_chat
+        mock_async_chat.send_message = AsyncMock(return_value=mock_response)
+        mock_client_instance.aio.chats.create.return_value = mock_async_chat
         mock_genai_client.return_value = mock_client_instance
 
-        client = GeminiChatClient(
-            api_key='test-key',
-            system_instruction='You are helpful',
-            enable_thinking=True,
-            thinking_budget=256
-        )
-        client.start_chat()
+        client = make_client(system_instruction='Be brief')
         client.set_file_search_stores(['store1'])
-        result = client.send_message('Complex query')
+
+        async def run():
+            await client.astart_chat()
+            return await client.asend_message('Hello')
+
+        result = asyncio.run(run())
 
         assert result == mock_response
-        mock_chat.send_message.assert_called_once()
+        mock_client_instance.aio.chats.create.assert_called_once_with(model='gemini-2.5-flash')
+        config = mock_async_chat.send_message.call_args[1]['config']
+        assert config.system_instruction == 'Be brief'
+        assert config.tools[0].file_search.file_search_store_names == ['store1']
+
+    def test_asend_message_api_error(self, mock_genai_client, make_client):
+        """Test that API errors from the async session return None."""
+        mock_client_instance = Mock()
+        mock_async_chat = Mock()
+        mock_async_chat.send_message = AsyncMock(
+            side_effect=APIError(500, {'error': {'message': 'Message Failed'}})
+        )
+        mock_client_instance.aio.chats.create.return_value = mock_async_chat
+        mock_genai_client.return_value = mock_client_instance
+
+        client = make_client()
+
+        async def run():
+            await client.astart_chat()
+            return await client.asend_message('Hello')
+
+        assert asyncio.run(run()) is None
+
+    def test_aget_chat_history(self, mock_genai_client, make_client):
+        """Test that history comes from the async session."""
+        mock_client_instance = Mock()
+        mock_async_chat = Mock()
+        mock_async_chat.get_history.return_value = ['msg1', 'msg2']
+        mock_client_instance.aio.chats.create.return_value = mock_async_chat
+        mock_genai_client.return_value = mock_client_instance
+
+        client = make_client()
+
+        async def run():
+            await client.astart_chat()
+            return await client.aget_chat_history()
+
+        assert asyncio.run(run()) == ['msg1', 'msg2']
 
 
 class TestGetChatHistory:
     """Test cases for get_chat_history method."""
 
-    @patch('src.gemini_client.genai.Client')
-    def test_get_chat_history_without_chat(self, mock_genai_client):
+    def test_get_chat_history_without_chat(self, make_client):
         """Test getting chat history without starting chat."""
-        client = GeminiChatClient(api_key='test-key')
+        client = make_client()
         result = client.get_chat_history()
 
         assert result == []
 
-    @patch('src.gemini_client.genai.Client')
-    def test_get_chat_history_success(self, mock_genai_client):
+    def test_get_chat_history_with_limit(self, make_client, mock_chat):
+        """Test that a limit returns only the most recent messages."""
+        mock_chat.get_history.return_value = ['m1', 'm2', 'm3']
+
+        client = make_client()
+        client.start_chat()
+
+        assert client.get_chat_history(limit=2) == ['m2', 'm3']
+        assert client.get_chat_history(limit=0) == []
+        with pytest.raises(TypeError):
+            client.get_chat_history(2)
+
+    def test_get_chat_history_success(self, make_client, mock_chat):
         """Test getting chat history successfully."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
         mock_message1 = Mock()
         mock_message2 = Mock()
         mock_chat.get_history.return_value = [mock_message1, mock_message2]
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
 
-        client = GeminiChatClient(api_key='test-key')
+        client = make_client()
         client.start_chat()
         result = client.get_chat_history()
 
@@ -298,31 +507,21 @@ class TestGetChatHistory:
         assert result[0] == mock_message1
         assert result[1] == mock_message2
 
-    @patch('src.gemini_client.genai.Client')
-    def test_get_chat_history_empty(self, mock_genai_client):
+    def test_get_chat_history_empty(self, make_client, mock_chat):
         """Test getting empty chat history."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
         mock_chat.get_history.return_value = []
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
 
-        client = GeminiChatClient(api_key='test-key')
+        client = make_client()
         client.start_chat()
         result = client.get_chat_history()
 
         assert result == []
 
-    @patch('src.gemini_client.genai.Client')
-    def test_get_chat_history_api_error(self, mock_genai_client):
+    def test_get_chat_history_api_error(self, make_client, mock_chat):
         """Test getting chat history when API returns an error."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
         mock_chat.get_history.side_effect = APIError(500, {'error': {'message': 'History Failed'}})
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
 
-        client = GeminiChatClient(api_key='test-key')
+        client = make_client()
         client.start_chat()
         result = client.get_chat_history()
 
@@ -331,46 +530,33 @@ class TestGetChatHistory:
 
 class TestDisplayResponse:
     """Test cases for display_response method."""
-
-    @patch('src.gemini_client.genai.Client')
-    def test_display_response_none(self, mock_genai_client, capsys):
+    def test_display_response_none(self, make_client, capsys):
         """Test displaying None response."""
-        client = GeminiChatClient(api_key='test-key')
+        client = make_client()
         client.display_response(None)
 
         captured = capsys.readouterr()
         assert captured.out == ''
 
-    @patch('src.gemini_client.genai.Client')
-    def test_display_response_simple_text(self, mock_genai_client, capsys):
+    def test_display_response_simple_text(self, make_client, capsys):
         """Test displaying a simple text response."""
-        mock_response = Mock()
-        mock_response.text = 'Hello, how can I help?'
-        mock_response.candidates = []
+        response = SimpleNamespace(text='Hello, how can I help?', candidates=[])
 
-        client = GeminiChatClient(api_key='test-key')
-        client.display_response(mock_response)
+        client = make_client()
+        client.display_response(response)
 
         captured = capsys.readouterr()
         assert 'Hello, how can I help?' in captured.out
 
-    @patch('src.gemini_client.genai.Client')
-    def test_display_response_with_grounding(self, mock_genai_client, capsys):
+    def test_display_response_with_grounding(self, make_client, capsys):
         """Test displaying a response with grounding metadata."""
-        mock_response = Mock()
-        mock_response.text = 'Response with citations'
-
-        mock_grounding = Mock()
-        mock_grounding.grounding_chunks = []
-        mock_grounding.search_entry_point = None
-        mock_grounding.grounding_supports = []
-
-        mock_candidate = Mock()
-        mock_candidate.grounding_metadata = mock_grounding
-        mock_response.candidates = [mock_candidate]
+        response = SimpleNamespace(
+            text='Response with citations',
+            candidates=[SimpleNamespace(grounding_metadata=make_grounding())]
+        )
 
-        client = GeminiChatClient(api_key='test-key')
-        client.display_response(mock_response)
+        client = make_client()
+        client.display_response(response)
 
         captured = capsys.readouterr()
         assert 'Response with citations' in captured.out
@@ -380,94 +566,71 @@ class TestDisplayResponse:
 class TestDisplayCitations:
     """Test cases for _display_citations method."""
 
-    @patch('src.gemini_client.genai.Client')
-    def test_display_citations_with_search_queries(self, mock_genai_client, capsys):
+    def test_display_citations_with_search_queries(self, make_client, capsys):
         """Test displaying citations with search queries."""
-        mock_grounding = Mock()
-        mock_search_entry = Mock()
-        mock_search_entry.rendered_content = 'query1, query2'
-        mock_grounding.search_entry_point = mock_search_entry
-        mock_grounding.grounding_chunks = []
-        mock_grounding.grounding_supports = []
-
-        client = GeminiChatClient(api_key='test-key')
-        client._display_citations(mock_grounding)
+        client = make_client()
+        client._display_citations(make_grounding(query='query1, query2'))
 
         captured = capsys.readouterr()
         assert 'CITATIONS' in captured.out
         assert 'query1, query2' in captured.out
 
-    @patch('src.gemini_client.genai.Client')
-    def test_display_citations_with_web_chunks(self, mock_genai_client, capsys):
+    def test_display_citations_with_web_chunks(self, make_client, capsys):
         """Test displaying citations with web chunks."""
-        mock_chunk = Mock()
-        mock_web = Mock()
-        mock_web.title = 'Example Website'
-        mock_web.uri = 'https://example.com'
-        mock_chunk.web = mock_web
-        mock_chunk.retrieved_context = None
-
-        mock_grounding = Mock()
-        mock_grounding.search_entry_point = None
-        mock_grounding.grounding_chunks = [mock_chunk]
-        mock_grounding.grounding_supports = []
+        chunk = SimpleNamespace(
+            web=SimpleNamespace(title='Example Website', uri='https://example.com'),
+            retrieved_context=None
+        )
 
-        client = GeminiChatClient(api_key='test-key')
-        client._display_citations(mock_grounding)
+        client = make_client()
+        client._display_citations(make_grounding(chunks=[chunk]))
 
         captured = capsys.readouterr()
         assert 'Example Website' in captured.out
         assert 'https://example.com' in captured.out
 
-    @patch('src.gemini_client.genai.Client')
-    def test_display_citations_with_file_search_chunks(self, mock_genai_client, capsys):
+    def test_display_citations_with_file_search_chunks(self, make_client, capsys):
         """Test displaying citations with file search chunks."""
-        mock_chunk = Mock()
-        mock_chunk.web = None
-        mock_retrieved = Mock()
-        mock_retrieved.uri = 'document.pdf'
-        mock_retrieved.title = 'Important Document'
-        mock_chunk.retrieved_context = mock_retrieved
-
-        mock_grounding = Mock()
-        mock_grounding.search_entry_point = None
-        mock_grounding.grounding_chunks = [mock_chunk]
-        mock_grounding.grounding_supports = []
+        chunk = SimpleNamespace(
+            web=None,
+            retrieved_context=SimpleNamespace(uri='document.pdf', title='Important Document')
+        )
 
-        client = GeminiChatClient(api_key='test-key')
-        client._display_citations(mock_grounding)
+        client = make_client()
+        client._display_citations(make_grounding(chunks=[chunk]))
 
         captured = capsys.readouterr()
         assert 'document.pdf' in captured.out
         assert 'Important Document' in captured.out
 
-    @patch('src.gemini_client.genai.Client')
-    def test_display_citations_with_grounding_supports(self, mock_genai_client, capsys):
+    def test_display_citations_with_grounding_supports(self, make_client, capsys):
         """Test displaying citations with grounding supports."""
-        mock_grounding = Mock()
-        mock_grounding.search_entry_point = None
-        mock_grounding.grounding_chunks = []
-        mock_grounding.grounding_supports = [Mock(), Mock(), Mock()]
-
-        client = GeminiChatClient(api_key='test-key')
-        client._display_citations(mock_grounding)
+        client = make_client()
+        client._display_citations(make_grounding(supports=3))
 
         captured = capsys.readouterr()
         assert 'Grounding supports: 3' in captured.out
 
+    def test_display_citations_web_chunk_without_uri(self, make_client, capsys):
+        """Test that a web chunk missing its URI prints only the title."""
+        grounding = types.GroundingMetadata(grounding_chunks=[
+            types.GroundingChunk(web=types.GroundingChunkWeb(title='Example Website'))
+        ])
+
+        client = make_client()
+        client._display_citations(grounding)
+
+        captured = capsys.readouterr()
+        assert 'Web: Example Website' in captured.out
+        assert 'URI:' not in captured.out
+
 
 class TestResetChat:
     """Test cases for reset_chat method."""
 
-    @patch('src.gemini_client.genai.Client')
-    def test_reset_chat(self, mock_genai_client, capsys):
+    def test_reset_chat(self, make_client, mock_chat, capsys):
         """Test resetting a chat session."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
-
-        client = GeminiChatClient(api_key='test-key')
+        client = make_client()
         client.start_chat()
 
         assert client.chat is not None
@@ -478,10 +641,9 @@ class TestResetChat:
         captured = capsys.readouterr()
         assert 'Chat session reset' in captured.out
 
-    @patch('src.gemini_client.genai.Client')
-    def test_reset_chat_when_no_active_chat(self, mock_genai_client):
+    def test_reset_chat_when_no_active_chat(self, make_client):
         """Test resetting when there's no active chat."""
-        client = GeminiChatClient(api_key='test-key')
+        client = make_client()
         assert client.chat is None
 
         client.reset_chat()
@@ -492,37 +654,23 @@ class TestResetChat:
 class TestGeminiChatClientIntegration:
     """Integration tests for GeminiChatClient."""
 
-    @patch('src.gemini_client.genai.Client')
-    def test_full_chat_flow(self, mock_genai_client):
+    def test_full_chat_flow(self, make_client, mock_chat):
         """Test complete chat flow from start to finish."""
-        mock_client_instance = Mock()
-        mock_chat = Mock()
-        mock_response = Mock()
-        mock_response.text = 'Response text'
-        mock_response.candidates = []
-
-        mock_chat.send_message.return_value = mock_response
+        reply = SimpleNamespace(text='Response text', candidates=[])
+        mock_chat.send_message.return_value = reply
         mock_chat.get_history.return_value = []
-        mock_client_instance.chats.create.return_value = mock_chat
-        mock_genai_client.return_value = mock_client_instance
 
-        # Initialize client
-        client = GeminiChatClient(
-            api_key='test-key',
-            system_instruction='Be helpful'
-        )
+        client = make_client(system_instruction='Be helpful')
 
         # Start chat
         assert client.start_chat() is True
-        assert client.chat is not None
+        assert client.chat is mock_chat
 
         # Send message
-        response = client.send_message('Hello')
-        assert response == mock_response
+        assert client.send_message('Hello') is reply
 
         # Get history
-        history = client.get_chat_history()
-        assert isinstance(history, list)
+        assert client.get_chat_history() == []
 
         # Reset chat
         client.reset_chat()
@@ -0,0 +1,63 @@
+"""Tests for the rate_limiter module."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from src.rate_limiter import TokenBucket
+
+
+class TestTokenBucket:
+    """Test cases for TokenBucket."""
+
+    def test_disabled_by_default(self):
+        """Test that a bucket without a rate never waits."""
+        bucket = TokenBucket()
+
+        assert bucket.enabled is False
+        with patch('src.rate_limiter.time.sleep') as mock_sleep:
+            for _ in range(100):
+                with bucket:
+                    pass
+
+        mock_sleep.assert_not_called()
+
+    @patch('src.rate_limiter.time.sleep')
+    @patch('src.rate_limiter.time.monotonic', return_value=0.0)
+    def test_burst_then_waits(self, mock_monotonic, mock_sleep):
+        """Test that calls beyond the burst wait for the refill interval."""
+        bucket = TokenBucket(rate_per_minute=60, burst=2)
+
+        bucket.acquire()
+        bucket.acquire()
+        mock_sleep.assert_not_called()
+
+        bucket.acquire()
+        mock_sleep.assert_called_once_with(pytest.approx(1.0))
+
+    @patch('src.rate_limiter.time.sleep')
+    @patch('src.rate_limiter.time.monotonic')
+    def test_tokens_refill_over_time(self, mock_monotonic, mock_sleep):
+        """Test that elapsed time refills tokens up to the burst size."""
+        mock_monotonic.side_effect = [0.0, 0.0, 10.0]
+        bucket = TokenBucket(rate_per_minute=60, burst=1)
+
+        bucket.acquire()
+        bucket.acquire()
+
+        mock_sleep.assert_not_called()
+
+    @patch('src.rate_limiter.time.monotonic', return_value=0.0)
+    def test_async_acquire_sleeps_without_blocking(self, mock_monotonic):
+        """Test that the async form waits with asyncio.sleep."""
+        bucket = TokenBucket(rate_per_minute=30, burst=1)
+
+        async def run():
+            async with bucket:
+                pass
+            async with bucket:
+                pass
+
+        with patch('src.rate_limiter.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            asyncio.run(run())
+
+        mock_sleep.assert_awaited_once_with(pytest.approx(2.0))
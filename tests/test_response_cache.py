@@ -0,0 +1,52 @@
+"""Tests for the response_cache module."""
+
+import os
+import time
+from src.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Test cases for ResponseCache."""
+
+    def test_make_key_is_order_independent(self):
+        """Test that keys depend on content, not keyword order."""
+        key1 = ResponseCache.make_key(model='m', prompt='hi', tools=['a'])
+        key2 = ResponseCache.make_key(tools=['a'], prompt='hi', model='m')
+
+        assert key1 == key2
+        assert key1 != ResponseCache.make_key(model='m', prompt='hello', tools=['a'])
+
+    def test_set_then_get(self, tmp_path):
+        """Test that a stored payload is returned for the same key."""
+        cache = ResponseCache(tmp_path / 'responses', ttl=60)
+
+        cache.set('abc', {'candidates': []})
+
+        assert cache.get('abc') == {'candidates': []}
+        assert list((tmp_path / 'responses').iterdir()) == [tmp_path / 'responses' / 'abc.json']
+
+    def test_get_missing_key(self, tmp_path):
+        """Test that unknown keys miss."""
+        cache = ResponseCache(tmp_path, ttl=60)
+
+        assert cache.get('missing') is None
+
+    def test_expired_entry_misses(self, tmp_path):
+        """Test that entries older than the TTL are ignored."""
+        cache = ResponseCache(tmp_path, ttl=60)
+        cache.set('abc', {'x': 1})
+        old = time.time() - 61
+        os.utime(tmp_path / 'abc.json', (old, old))
+
+        assert cache.get('abc') is None
+
+    def test_clear_removes_entries(self, tmp_path):
+        """Test that clear deletes all cached responses."""
+        cache = ResponseCache(tmp_path, ttl=60)
+        cache.set('a', {})
+        cache.set('b', {})
+
+        cache.clear()
+
+        assert cache.get('a') is None
+        assert cache.get('b') is None
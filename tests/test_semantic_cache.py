@@ -0,0 +1,49 @@
+"""Tests for the semantic_cache module."""
+
+from src.semantic_cache import SemanticCache, DEFAULT_THRESHOLD
+
+
+class TestSemanticCache:
+    """Test cases for SemanticCache."""
+
+    def test_default_threshold(self):
+        """Test that the cache uses the default similarity threshold."""
+        assert SemanticCache().threshold == DEFAULT_THRESHOLD
+
+    def test_similar_prompt_hits(self):
+        """Test that a nearby embedding returns the cached payload."""
+        cache = SemanticCache(threshold=0.9)
+        cache.add('ctx', [1.0, 0.0, 0.0], 'answer')
+
+        assert cache.lookup('ctx', [0.95, 0.05, 0.0]) == 'answer'
+
+    def test_dissimilar_prompt_misses(self):
+        """Test that embeddings below the threshold miss."""
+        cache = SemanticCache(threshold=0.9)
+        cache.add('ctx', [1.0, 0.0], 'answer')
+
+        assert cache.lookup('ctx', [0.0, 1.0]) is None
+
+    def test_returns_nearest_neighbour(self):
+        """Test that the most similar entry wins."""
+        cache = SemanticCache(threshold=0.5)
+        cache.add('ctx', [1.0, 0.0], 'first')
+        cache.add('ctx', [0.7, 0.7], 'second')
+
+        assert cache.lookup('ctx', [0.6, 0.8]) == 'second'
+
+    def test_contexts_do_not_collide(self):
+        """Test that entries from another context are never returned."""
+        cache = SemanticCache(threshold=0.9)
+        cache.add('ctx-a', [1.0, 0.0], 'answer')
+
+        assert cache.lookup('ctx-b', [1.0, 0.0]) is None
+
+    def test_clear(self):
+        """Test that clear drops all entries."""
+        cache = SemanticCache()
+        cache.add('ctx', [1.0], 'answer')
+
+        cache.clear()
+
+        assert cache.lookup('ctx', [1.0]) is None